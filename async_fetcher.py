@@ -0,0 +1,95 @@
+"""
+Moteur de téléchargement concurrent (asyncio) pour les pages de détail.
+Les requêtes restent faites par une fonction synchrone (requests) exécutée
+dans des threads, mais plusieurs pages sont en vol en même temps.
+La politesse est gardée par un seau à jetons (token bucket) par hôte, et,
+pour les workers qui passent par http_client, par le contrôleur AIMD partagé
+(host_limiter) qui adapte le nombre de requêtes en vol à la santé de l'hôte.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Seau à jetons : au plus `rate` requêtes par seconde, rafales de `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """Applique `worker(url)` (fonction synchrone) à une liste d'URLs en parallèle.
+
+    - `concurrency` : nombre maximal de requêtes en vol (tous hôtes confondus)
+    - `rate_per_host` : requêtes par seconde autorisées par hôte (0 = laissé au
+      contrôleur host_limiter du client HTTP)
+    - `burst` : taille de la rafale autorisée par hôte
+    Les résultats sont renvoyés dans l'ordre des URLs d'entrée, comme en séquentiel.
+    """
+
+    def __init__(self, worker, concurrency=8, rate_per_host=1.0, burst=1):
+        self.worker = worker
+        self.concurrency = max(1, concurrency)
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.pages = 0
+        self.elapsed = 0.0
+
+    def _bucket(self, buckets, url):
+        host = urlparse(url).netloc
+        if host not in buckets:
+            buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return buckets[host]
+
+    async def _run(self, urls):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buckets = {}
+
+        async def fetch_one(url):
+            async with semaphore:
+                if self.rate_per_host > 0:
+                    await self._bucket(buckets, url).acquire()
+                try:
+                    return await asyncio.to_thread(self.worker, url)
+                except Exception as e:
+                    logging.error(f"Erreur inattendue pour {url} : {e}")
+                    return None
+
+        return await asyncio.gather(*(fetch_one(url) for url in urls))
+
+    def run(self, urls):
+        """Traite toutes les URLs et renvoie la liste des résultats (None si échec)."""
+        urls = list(urls)
+        start = time.perf_counter()
+        results = asyncio.run(self._run(urls))
+        elapsed = time.perf_counter() - start
+        self.pages += len(urls)
+        self.elapsed += elapsed
+        if elapsed > 0:
+            logging.info(f"{len(urls)} pages en {elapsed:.1f}s ({len(urls) / elapsed:.2f} pages/s)")
+        return results
+
+    @property
+    def pages_per_sec(self):
+        """Débit moyen depuis la création du moteur."""
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
@@ -0,0 +1,196 @@
+"""
+Réextraction en masse des annonces voursa sur plusieurs cœurs.
+Après un changement des règles d'extraction (nb_chambres, surface_m2,
+caracteristiques...), repasse tout le corpus stocké dans parse_property_page
+/ build_property_data sans rien retélécharger :
+- sources : pages de détail archivées (page_archive), pages du cache HTTP
+  (http_cache) ou JSON data-ad-detail bruts (un objet par ligne)
+- les pages sont découpées en lots envoyés à un pool de processus ; chaque
+  worker relit lui-même les corps depuis le disque (seules les positions
+  transitent entre processus)
+- fusion déterministe : les lots sont rendus dans l'ordre des URLs triées,
+  le CSV est identique quel que soit le nombre de workers
+- `--bench 1 2 4 8` : mesure l'accélération selon le nombre de workers
+
+Usage : python backfill_voursa.py [--source archive|cache|json] [--entree CHEMIN]
+                                  [--workers N] [--lot N] [--sortie fichier.csv] [--bench 1 2 4 ...]
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import http_cache
+import page_archive
+from record_sink import CsvRecordSink
+from scrappring_voursa import COLUMN_ORDER, SOURCE, build_property_data, parse_property_page
+
+# ================== CONFIGURATION ==================
+TAILLE_LOT = 200  # Pages par lot envoyé à un worker
+FICHIER_SORTIE = "data_raw/voursa_backfill.csv"
+COLONNES = COLUMN_ORDER + ["url"]
+MOTIF_ANNONCE = "/ads/"  # URLs des pages de détail
+
+
+# ================== INVENTAIRE ==================
+def pages_archivees(chemin=None):
+    """[(url, ("archive", fichier, position))] des pages de détail archivées."""
+    store = page_archive.ReplayStore(page_archive.archive_files(chemin))
+    return [(url, ("archive",) + position) for url, position in store.responses.items() if MOTIF_ANNONCE in url]
+
+
+def pages_en_cache(dossier=None):
+    """[(url, ("cache", chemin du corps))] des pages de détail du cache HTTP."""
+    pages = []
+    for meta_path in glob.glob(os.path.join(dossier or http_cache.CACHE_DIR, "*", "*.json")):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                url = json.load(f).get("url", "")
+        except (OSError, ValueError):
+            continue
+        if MOTIF_ANNONCE in url:
+            pages.append((url, ("cache", meta_path[:-5] + ".body")))
+    return pages
+
+
+def annonces_json(chemin):
+    """[(url, ("json", ligne))] d'un fichier JSON Lines de data-ad-detail bruts."""
+    entrees = []
+    with open(chemin, encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, 1):
+            if ligne.strip():
+                ad = json.loads(ligne)
+                url = ad.get("url") or f"{chemin}#{numero}"
+                entrees.append((url, ("json", ligne)))
+    return entrees
+
+
+def inventaire(source, entree=None):
+    """Entrées triées par URL (une seule par URL) : l'ordre de sortie en découle."""
+    if source == "archive":
+        entrees = pages_archivees(entree)
+    elif source == "cache":
+        entrees = pages_en_cache(entree)
+    else:
+        entrees = annonces_json(entree)
+    return sorted(dict(entrees).items())
+
+
+# ================== WORKER ==================
+def lire(locator):
+    genre = locator[0]
+    if genre == "archive":
+        _, block = page_archive.read_record(locator[1], locator[2])
+        return page_archive.split_http(block)[2]
+    with open(locator[1], "rb") as f:
+        return f.read()
+
+
+def extraire(url, locator):
+    """Listing de l'annonce (None si la page ne contient pas de data-ad-detail)."""
+    if locator[0] == "json":
+        return build_property_data(json.loads(locator[1]))
+    return parse_property_page(lire(locator), url)
+
+
+def traiter_lot(lot):
+    """Exécuté dans un worker : [(url, enregistrement ou None)] dans l'ordre du lot."""
+    resultats = []
+    for url, locator in lot:
+        try:
+            annonce = extraire(url, locator)
+        except Exception as e:
+            logging.error(f"Réextraction impossible pour {url} : {e}")
+            annonce = None
+        if annonce is not None:
+            enregistrement = annonce.to_dict(COLUMN_ORDER)
+            enregistrement["url"] = url
+            annonce = enregistrement
+        resultats.append((url, annonce))
+    return resultats
+
+
+# ================== EXÉCUTION ==================
+def lots(entrees, taille=TAILLE_LOT):
+    return [entrees[i:i + taille] for i in range(0, len(entrees), taille)]
+
+
+def reextraire(entrees, workers, taille_lot=TAILLE_LOT):
+    """Générateur des enregistrements, dans l'ordre des entrées quel que soit `workers`."""
+    if workers <= 1:
+        for lot in lots(entrees, taille_lot):
+            yield from traiter_lot(lot)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map rend les lots dans l'ordre de soumission : fusion déterministe
+        for resultats in pool.map(traiter_lot, lots(entrees, taille_lot)):
+            yield from resultats
+
+
+def backfill(entrees, sortie, workers, taille_lot=TAILLE_LOT):
+    """Réextrait toutes les entrées vers `sortie` ; renvoie (écrites, échecs, durée)."""
+    debut = time.perf_counter()
+    echecs = 0
+    with CsvRecordSink(sortie, COLONNES, batch_size=1000, mode="w", site=SOURCE) as sink:
+        for _, enregistrement in reextraire(entrees, workers, taille_lot):
+            if enregistrement is None:
+                echecs += 1
+            else:
+                sink.write(enregistrement)
+        ecrites = sink.count
+    return ecrites, echecs, time.perf_counter() - debut
+
+
+def bench(entrees, nombres_workers, sortie, taille_lot=TAILLE_LOT):
+    """Durée et accélération pour chaque nombre de workers ; vérifie que les sorties sont identiques."""
+    reference = None
+    print(f"\n⏱️ Accélération sur {len(entrees)} pages (lots de {taille_lot}):")
+    for workers in nombres_workers:
+        chemin = f"{os.path.splitext(sortie)[0]}_bench_{workers}.csv"
+        ecrites, _, duree = backfill(entrees, chemin, workers, taille_lot)
+        with open(chemin, "rb") as f:
+            contenu = f.read()
+        os.remove(chemin)
+        if reference is None:
+            reference = (duree, contenu)
+        identique = "✅" if contenu == reference[1] else "❌ sortie différente"
+        print(f"   - {workers:2} worker(s): {duree:6.1f}s, {ecrites / duree:7.0f} pages/s, "
+              f"accélération x{reference[0] / duree:.2f} {identique}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réextraction voursa en parallèle (pool de processus)")
+    parser.add_argument("--source", choices=["archive", "cache", "json"], default="archive")
+    parser.add_argument("--entree", help="archive ou dossier d'archives, dossier du cache, fichier JSON Lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--lot", type=int, default=TAILLE_LOT)
+    parser.add_argument("--sortie", default=FICHIER_SORTIE)
+    parser.add_argument("--bench", type=int, nargs="+", metavar="N", help="nombres de workers à comparer")
+    args = parser.parse_args()
+    if args.source == "json" and not args.entree:
+        parser.error("--source json demande --entree fichier.jsonl")
+
+    print("=" * 60)
+    print(f"🔁 RÉEXTRACTION VOURSA ({args.source})")
+    print("=" * 60)
+    entrees = inventaire(args.source, args.entree)
+    if not entrees:
+        print("❌ Aucune page de détail voursa trouvée")
+        return
+    print(f"📄 {len(entrees)} annonces à réextraire")
+
+    if args.bench:
+        bench(entrees, args.bench, args.sortie, args.lot)
+        return
+    ecrites, echecs, duree = backfill(entrees, args.sortie, args.workers, args.lot)
+    print(f"\n💾 {ecrites} annonces dans {args.sortie} ({echecs} sans data-ad-detail), "
+          f"{duree:.1f}s avec {args.workers} worker(s) ({len(entrees) / duree:.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
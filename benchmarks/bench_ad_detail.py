@@ -0,0 +1,68 @@
+"""
+Micro-benchmark : extraction du JSON data-ad-detail de voursa.
+Compare, sur des pages de détail sauvegardées, le chemin BeautifulSoup
+(arbre DOM complet) et le chemin rapide qui lit les octets bruts.
+Les pages sont lues dans le cache HTTP (cache/http) ou dans un dossier de .html.
+
+Usage : python benchmarks/bench_ad_detail.py [dossier] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrappring_voursa import extract_ad_detail_json, extract_ad_detail_soup  # noqa: E402
+
+
+def charger_pages(dossier):
+    """Charge toutes les pages contenant un attribut data-ad-detail."""
+    pages = []
+    for root, _, files in os.walk(dossier):
+        for name in sorted(files):
+            if name.endswith(('.body', '.html')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    content = f.read()
+                if b'data-ad-detail=' in content:
+                    pages.append(content)
+    return pages
+
+
+def mesurer(fonction, pages, repeat):
+    """Temps CPU moyen par page (en ms) sur `repeat` passages."""
+    start = time.process_time()
+    for _ in range(repeat):
+        for content in pages:
+            fonction(content)
+    return (time.process_time() - start) * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('dossier', nargs='?', default=os.path.join('cache', 'http'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = charger_pages(args.dossier)
+    if not pages:
+        print(f"❌ Aucune page voursa avec data-ad-detail dans {args.dossier}")
+        return
+
+    # Vérification : les deux chemins doivent donner exactement le même JSON
+    differences = sum(1 for content in pages
+                      if extract_ad_detail_json(content) != extract_ad_detail_soup(content, 'bench'))
+    rapide = mesurer(extract_ad_detail_json, pages, args.repeat)
+    soup = mesurer(lambda content: extract_ad_detail_soup(content, 'bench'), pages, args.repeat)
+
+    taille = sum(len(content) for content in pages) / len(pages)
+    print(f"📄 {len(pages)} pages (taille moyenne {taille / 1024:.0f} Ko)")
+    print(f"   - BeautifulSoup : {soup:.3f} ms CPU/page")
+    print(f"   - Chemin rapide : {rapide:.3f} ms CPU/page")
+    print(f"   - Gain          : {soup - rapide:.3f} ms/page (x{soup / rapide if rapide else float('inf'):.0f})")
+    print(f"   - Différences   : {differences}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark : recherche des mots-clés (CARAC_KEYWORDS) et des quartiers dans
+les descriptions voursa. Compare les boucles d'origine (un `desc.lower()` et
+un test de sous-chaîne par mot-clé) au KeywordMatcher, et vérifie que les
+résultats sont identiques.
+
+Usage : python benchmarks/bench_keyword_matcher.py [data_raw/voursa_raw.csv] [--repeat N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrappring_voursa import CARAC_KEYWORDS, QUARTIERS, CARAC_MATCHER, QUARTIER_MATCHER  # noqa: E402
+
+
+def caracs_boucle(desc):
+    """Boucle d'origine de extract_property_data."""
+    caracs = []
+    for kw in CARAC_KEYWORDS:
+        if kw.lower() in desc.lower() and kw not in caracs:
+            caracs.append(kw)
+    return caracs
+
+
+def quartier_boucle(desc):
+    for q in QUARTIERS:
+        if q.lower() in desc.lower():
+            return q
+    return None
+
+
+def chronometrer(fonction, descriptions, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for desc in descriptions:
+            fonction(desc)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('fichier', nargs='?', default=os.path.join('data_raw', 'voursa_raw.csv'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.fichier, encoding='utf-8') as f:
+        descriptions = [row.get('description') or '' for row in csv.DictReader(f)]
+    print(f"📄 {len(descriptions)} descriptions ({args.fichier})")
+
+    differences = sum(1 for desc in descriptions
+                      if caracs_boucle(desc) != CARAC_MATCHER.find_all(desc)
+                      or quartier_boucle(desc) != QUARTIER_MATCHER.first(desc))
+    for nom, boucle, matcher in [
+        ("Caractéristiques", caracs_boucle, CARAC_MATCHER.find_all),
+        ("Quartiers", quartier_boucle, QUARTIER_MATCHER.first),
+    ]:
+        t_boucle = chronometrer(boucle, descriptions, args.repeat)
+        t_matcher = chronometrer(matcher, descriptions, args.repeat)
+        print(f"   - {nom:16}: boucle {t_boucle * 1000:7.1f} ms | matcher {t_matcher * 1000:7.1f} ms "
+              f"(x{t_boucle / t_matcher:.1f})")
+    print(f"   - Différences    : {differences}")
+
+
+if __name__ == '__main__':
+    main()
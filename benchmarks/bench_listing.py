@@ -0,0 +1,77 @@
+"""
+Benchmark : enregistrements voursa en dictionnaires (ancien format) contre
+Listing à __slots__. Mesure la mémoire par annonce (tracemalloc) et le coût
+de la conversion en DataFrame, sur l'export voursa (~6 000 annonces).
+
+Usage : python benchmarks/bench_listing.py [data_raw/voursa_raw.csv] [--repeat N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing import Listing, listings_vers_dataframe  # noqa: E402
+from scrappring_voursa import COLUMN_ORDER  # noqa: E402
+
+NUMERIQUES = {'prix', 'surface_m2', 'nb_chambres', 'nb_salons', 'nb_sdb'}
+
+
+def valeur(colonne, texte):
+    """Valeur telle que build_property_data la produit (entiers pour les nombres)."""
+    if not texte:
+        return None
+    if colonne in NUMERIQUES:
+        try:
+            return int(float(texte))
+        except ValueError:
+            return None
+    return texte
+
+
+def mesurer(construire):
+    """Construit les enregistrements sous tracemalloc ; renvoie (enregistrements, octets)."""
+    tracemalloc.start()
+    enregistrements = construire()
+    octets = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return enregistrements, octets
+
+
+def chronometrer(fonction, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fonction()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('fichier', nargs='?', default=os.path.join('data_raw', 'voursa_raw.csv'))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.fichier, encoding='utf-8') as f:
+        lignes = [[valeur(c, row.get(c)) for c in COLUMN_ORDER] for row in csv.DictReader(f)]
+    print(f"📄 {len(lignes)} annonces ({args.fichier})")
+
+    dicts, octets_dicts = mesurer(lambda: [dict(zip(COLUMN_ORDER, ligne)) for ligne in lignes])
+    listings, octets_listings = mesurer(lambda: [Listing(**dict(zip(COLUMN_ORDER, ligne))) for ligne in lignes])
+
+    n = len(lignes)
+    print(f"   - {'Mémoire / annonce':20}: dict {octets_dicts / n:7.0f} o | Listing {octets_listings / n:7.0f} o "
+          f"(x{octets_dicts / octets_listings:.1f})")
+    t_dicts = chronometrer(lambda: pd.DataFrame(dicts), args.repeat)
+    t_listings = chronometrer(lambda: listings_vers_dataframe(listings, COLUMN_ORDER), args.repeat)
+    print(f"   - {'Vers DataFrame':20}: dict {t_dicts * 1000:7.1f} ms | Listing {t_listings * 1000:7.1f} ms "
+          f"(x{t_dicts / t_listings:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+"""
+Benchmark des parseurs de chaque site sur des pages enregistrées (hors ligne).
+Pour chaque site, rejoue parse(clé, contenu) sur les fixtures de
+benchmarks/fixtures/<site>/ et mesure le débit (cartes/s), le temps CPU par
+carte et les allocations (tracemalloc : pic et blocs par carte). Les
+résultats sont sauvegardés en JSON et comparés à l'exécution précédente.
+
+- fixtures versionnées : pour chaque site, quelques pages anonymisées (noms,
+  téléphones et identifiants fictifs) au balisage du site, et les réponses
+  HTTP de parse() dans http/ ; un dépôt fraîchement cloné mesure donc tous
+  les parseurs sans réseau
+- enregistrement (réseau / Chrome nécessaires) :
+    python benchmarks/bench_parsers.py --enregistrer [--sites wassit menazel ...]
+  les pages de fetch() sont écrites avec leur clé dans manifest.json ; les
+  requêtes faites pendant parse() (pages de détail untoitenrim) sont
+  enregistrées aussi et resservies hors ligne à la place de http_client.get.
+  Les pages capturées remplacent les fixtures du site : les anonymiser
+  (vendeurs, téléphones) avant de les versionner
+- voursa-detail : pages de détail voursa (parse_property_page de
+  scrappring_voursa), copiées depuis le cache HTTP à l'enregistrement
+
+Usage : python benchmarks/bench_parsers.py [--sites ...] [--repeat N] [--comparer resultats.json]
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_cache  # noqa: E402
+import http_client  # noqa: E402
+import instrumentation  # noqa: E402
+import listing_fingerprints  # noqa: E402
+from crawler import SITES, charger_plugin  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RESULTATS_DIR = os.path.join('etat', 'bench')
+SEUIL_REGRESSION = 0.10  # +10 % de CPU par carte : signalé comme régression
+MAX_PAGES_DETAIL = 200  # Pages de détail voursa copiées depuis le cache
+VOURSA_DETAIL = 'voursa-detail'
+
+
+# ================== PARSEURS ==================
+class ParseurDetailVoursa:
+    """Adapte parse_property_page (une annonce par page) au protocole des plugins."""
+    SOURCE = 'voursa.com'
+
+    def __init__(self):
+        import scrappring_voursa
+        self.module = scrappring_voursa
+
+    def parse(self, url, content):
+        data = self.module.parse_property_page(content, url)
+        return [data] if data else []
+
+
+def charger_parseur(site):
+    return ParseurDetailVoursa() if site == VOURSA_DETAIL else charger_plugin(site)
+
+
+# ================== FIXTURES ==================
+def dossier_site(site):
+    return os.path.join(FIXTURES_DIR, site)
+
+
+def nom_fichier(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + '.body'
+
+
+def ecrire(chemin, contenu):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, 'wb') as f:
+        f.write(contenu.encode('utf-8') if isinstance(contenu, str) else contenu)
+
+
+def enregistrer_site(site):
+    """Rejoue fetch() + parse() en ligne et écrit pages, clés et sous-requêtes."""
+    dossier = dossier_site(site)
+    plugin = charger_plugin(site)
+    manifest = {'site': site, 'date': datetime.now().isoformat(timespec='seconds'), 'pages': [], 'http': {}}
+    get_reseau = http_client.get
+
+    def get_enregistre(url, *args, **kwargs):
+        response = get_reseau(url, *args, **kwargs)
+        if response.status_code == 200:
+            ecrire(os.path.join(dossier, 'http', nom_fichier(url)), response.content)
+            manifest['http'][url] = nom_fichier(url)
+        return response
+
+    with contextlib.closing(plugin.fetch()) as pages:
+        for i, (cle, contenu) in enumerate(pages, 1):
+            fichier = f"{i:04d}.{'txt' if isinstance(contenu, str) else 'body'}"
+            ecrire(os.path.join(dossier, fichier), contenu)
+            manifest['pages'].append({'cle': cle, 'fichier': fichier})
+            http_client.get = get_enregistre
+            try:
+                plugin.parse(cle, contenu)
+            finally:
+                http_client.get = get_reseau
+    ecrire(os.path.join(dossier, 'manifest.json'), json.dumps(manifest, ensure_ascii=False, indent=2))
+    return len(manifest['pages'])
+
+
+def enregistrer_detail_voursa(maximum=MAX_PAGES_DETAIL):
+    """Copie des pages de détail voursa depuis le cache HTTP (aucune requête)."""
+    dossier = dossier_site(VOURSA_DETAIL)
+    manifest = {'site': VOURSA_DETAIL, 'date': datetime.now().isoformat(timespec='seconds'), 'pages': [], 'http': {}}
+    for meta_path in sorted(glob.glob(os.path.join(http_cache.CACHE_DIR, '*', '*.json'))):
+        with open(meta_path, encoding='utf-8') as f:
+            url = json.load(f).get('url', '')
+        if '/ads/' not in url:
+            continue
+        with open(meta_path[:-5] + '.body', 'rb') as f:
+            contenu = f.read()
+        if b'data-ad-detail=' not in contenu:
+            continue
+        fichier = nom_fichier(url)
+        ecrire(os.path.join(dossier, fichier), contenu)
+        manifest['pages'].append({'cle': url, 'fichier': fichier})
+        if len(manifest['pages']) >= maximum:
+            break
+    ecrire(os.path.join(dossier, 'manifest.json'), json.dumps(manifest, ensure_ascii=False, indent=2))
+    return len(manifest['pages'])
+
+
+def charger_fixtures(site):
+    """(pages [(clé, contenu)], réponses HTTP {url: octets}) ; None si rien d'enregistré."""
+    dossier = dossier_site(site)
+    chemin = os.path.join(dossier, 'manifest.json')
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        manifest = json.load(f)
+    pages = []
+    for page in manifest['pages']:
+        with open(os.path.join(dossier, page['fichier']), 'rb') as f:
+            contenu = f.read()
+        # Les pages rendues par Selenium (page_source) sont du texte
+        pages.append((page['cle'], contenu.decode('utf-8') if page['fichier'].endswith('.txt') else contenu))
+    reponses = {}
+    for url, fichier in manifest['http'].items():
+        with open(os.path.join(dossier, 'http', fichier), 'rb') as f:
+            reponses[url] = f.read()
+    return pages, reponses
+
+
+@contextlib.contextmanager
+def hors_ligne(reponses):
+    """Remplace http_client.get par les réponses enregistrées (erreur réseau sinon)."""
+    get_reseau = http_client.get
+
+    def get_fixture(url, *args, **kwargs):
+        if url not in reponses:
+            raise requests.exceptions.ConnectionError(f"hors ligne : {url} non enregistrée")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = reponses[url]
+        response.headers = CaseInsensitiveDict()
+        response.encoding = 'utf-8'
+        response.url = url
+        response.from_cache = True
+        return response
+
+    http_client.get = get_fixture
+    try:
+        yield
+    finally:
+        http_client.get = get_reseau
+
+
+# ================== MESURES ==================
+def passer(plugin, pages):
+    annonces = 0
+    for cle, contenu in pages:
+        annonces += len(plugin.parse(cle, contenu))
+    return annonces
+
+
+def cartes_analysees(source):
+    return instrumentation.metrics(source).counters.get('cartes', 0)
+
+
+def mesurer(site, repeat):
+    """Débit, CPU par carte et allocations du parseur de `site` sur ses fixtures."""
+    fixtures = charger_fixtures(site)
+    if fixtures is None:
+        return None
+    pages, reponses = fixtures
+    plugin = charger_parseur(site)
+    source = plugin.SOURCE
+
+    # Affichages des parseurs (une ligne par page, erreurs) envoyés vers /dev/null
+    with open(os.devnull, 'w') as nul, contextlib.redirect_stdout(nul), hors_ligne(reponses):
+        passer(plugin, pages)  # échauffement (imports, regex compilées, caches)
+
+        debut_cartes = cartes_analysees(source)
+        debut_cpu, debut = time.process_time(), time.perf_counter()
+        for _ in range(repeat):
+            annonces = passer(plugin, pages)
+        cpu, duree = time.process_time() - debut_cpu, time.perf_counter() - debut
+        cartes = (cartes_analysees(source) - debut_cartes) // repeat
+
+        tracemalloc.start()
+        avant = tracemalloc.take_snapshot()
+        passer(plugin, pages)
+        apres = tracemalloc.take_snapshot()
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    blocs = sum(stat.count_diff for stat in apres.compare_to(avant, 'filename') if stat.count_diff > 0)
+
+    par_carte = max(cartes, 1)
+    return {
+        'pages': len(pages),
+        'octets': sum(len(contenu) for _, contenu in pages),
+        'cartes': cartes,
+        'annonces': annonces,
+        'cartes_par_s': round(cartes * repeat / duree, 1) if duree > 0 else None,
+        'cpu_ms_par_carte': round(cpu * 1000 / (repeat * par_carte), 4),
+        'pic_ko_par_carte': round(pic / 1024 / par_carte, 2),
+        'blocs_par_carte': round(blocs / par_carte, 1),
+    }
+
+
+# ================== RÉSULTATS ==================
+def dernier_resultat():
+    fichiers = sorted(glob.glob(os.path.join(RESULTATS_DIR, 'parsers_*.json')))
+    return fichiers[-1] if fichiers else None
+
+
+def sauvegarder(resultats):
+    os.makedirs(RESULTATS_DIR, exist_ok=True)
+    chemin = os.path.join(RESULTATS_DIR, f"parsers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump({'date': datetime.now().isoformat(timespec='seconds'), 'python': sys.version.split()[0],
+                   'resultats': resultats}, f, ensure_ascii=False, indent=2)
+    return chemin
+
+
+def charger_resultats(chemin):
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)['resultats']
+
+
+def comparer(resultats, anciens, reference):
+    """Écart de CPU par carte avec l'exécution de référence ; renvoie les régressions."""
+    regressions = []
+    print(f"\n🔁 Comparaison avec {reference}:")
+    for site, mesure in resultats.items():
+        ancien = anciens.get(site)
+        if not ancien or not ancien['cpu_ms_par_carte']:
+            continue
+        ecart = mesure['cpu_ms_par_carte'] / ancien['cpu_ms_par_carte'] - 1
+        statut = '⚠️ régression' if ecart > SEUIL_REGRESSION else '✅'
+        if ecart > SEUIL_REGRESSION:
+            regressions.append(site)
+        print(f"   - {site:14}: {ancien['cpu_ms_par_carte']:.4f} -> {mesure['cpu_ms_par_carte']:.4f} "
+              f"ms CPU/carte ({ecart:+.0%}) {statut}")
+    return regressions
+
+
+def main():
+    sites_connus = list(SITES) + [VOURSA_DETAIL]
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sites', nargs='+', choices=sites_connus, default=sites_connus)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--enregistrer', action='store_true', help="capturer les fixtures (réseau/Chrome)")
+    parser.add_argument('--comparer', help="résultats de référence (défaut : la dernière exécution)")
+    args = parser.parse_args()
+
+    if args.enregistrer:
+        for site in args.sites:
+            n = enregistrer_detail_voursa() if site == VOURSA_DETAIL else enregistrer_site(site)
+            print(f"💾 {site}: {n} pages enregistrées dans {dossier_site(site)}")
+        return
+
+    # Référence lue avant la sauvegarde des nouveaux résultats
+    reference = args.comparer or dernier_resultat()
+    anciens = charger_resultats(reference) if reference else None
+    instrumentation.PROGRESS_INTERVAL = float('inf')  # pas de ligne de progression pendant la mesure
+    listing_fingerprints.FINGERPRINTS_ENABLED = False  # chaque passage reparse les pages de détail
+    resultats = {}
+    for site in args.sites:
+        mesure = mesurer(site, args.repeat)
+        if mesure is None:
+            print(f"⏭️  {site}: aucune fixture (lancer avec --enregistrer)")
+            continue
+        resultats[site] = mesure
+        print(f"📄 {site:14}: {mesure['cartes']:5} cartes sur {mesure['pages']} pages, "
+              f"{mesure['cartes_par_s'] or 0:8.0f} cartes/s, {mesure['cpu_ms_par_carte']:.4f} ms CPU/carte, "
+              f"pic {mesure['pic_ko_par_carte']:.1f} Ko/carte, {mesure['blocs_par_carte']:.0f} blocs/carte")
+
+    if not resultats:
+        return
+    chemin = sauvegarder(resultats)
+    print(f"\n💾 Résultats: {chemin}")
+    if anciens:
+        regressions = comparer(resultats, anciens, reference)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
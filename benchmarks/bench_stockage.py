@@ -0,0 +1,89 @@
+"""
+Benchmark : stockage CSV actuel (QUOTE_ALL, UTF-8-SIG, complet + light)
+contre le dataset Parquet partitionné de stockage.py. Mesure la taille sur
+disque, l'écriture, la lecture complète, la projection "light" et la
+lecture d'une seule source.
+
+Usage : python benchmarks/bench_stockage.py [dataset_complet.csv] [--repeat N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stockage  # noqa: E402
+
+
+def chronometrer(fonction, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        resultat = fonction()
+    return (time.perf_counter() - start) / repeat, resultat
+
+
+def lire_source_csv(chemin, source):
+    df = pd.read_csv(chemin, encoding='utf-8-sig')
+    return df[df['source'] == source]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('fichier', nargs='?', default='dataset_complet.csv')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not stockage.parquet_disponible():
+        print("❌ pyarrow n'est pas installé")
+        return
+
+    df = pd.read_csv(args.fichier, encoding='utf-8-sig')
+    colonnes_light = [c for c in stockage.COLONNES_LIGHT if c in df.columns]
+    source = df['source'].mode()[0]
+    print(f"📄 {len(df)} lignes, {len(df.columns)} colonnes ({args.fichier})")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        csv_complet = os.path.join(dossier, 'complet.csv')
+        csv_light = os.path.join(dossier, 'light.csv')
+        parquet = os.path.join(dossier, 'parquet')
+
+        def ecrire_csv():
+            df.to_csv(csv_complet, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
+            df[colonnes_light].to_csv(csv_light, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
+
+        mesures = {
+            "Écriture": (
+                chronometrer(ecrire_csv, args.repeat)[0],
+                chronometrer(lambda: stockage.ecrire_parquet(df, parquet), args.repeat)[0],
+            ),
+            "Lecture complète": (
+                chronometrer(lambda: pd.read_csv(csv_complet, encoding='utf-8-sig'), args.repeat)[0],
+                chronometrer(lambda: stockage.lire_parquet(parquet), args.repeat)[0],
+            ),
+            "Lecture light": (
+                chronometrer(lambda: pd.read_csv(csv_light, encoding='utf-8-sig'), args.repeat)[0],
+                chronometrer(lambda: stockage.lire_light(parquet), args.repeat)[0],
+            ),
+            f"Une source ({source})": (
+                chronometrer(lambda: lire_source_csv(csv_complet, source), args.repeat)[0],
+                chronometrer(lambda: stockage.lire_parquet(parquet, filtres={'source': source}), args.repeat)[0],
+            ),
+        }
+
+        taille_csv = stockage.taille_disque(csv_complet) + stockage.taille_disque(csv_light)
+        taille_parquet = stockage.taille_disque(parquet)
+        print(f"   - {'Taille disque':22}: CSV {taille_csv / 1e6:8.2f} Mo | Parquet {taille_parquet / 1e6:8.2f} Mo "
+              f"(x{taille_csv / taille_parquet:.1f})")
+        for nom, (t_csv, t_parquet) in mesures.items():
+            print(f"   - {nom:22}: CSV {t_csv * 1000:8.1f} ms | Parquet {t_parquet * 1000:8.1f} ms "
+                  f"(x{t_csv / t_parquet:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Pool de navigateurs Chrome headless partagé par les scrapers Selenium.
+- instances gardées chaudes entre deux pages ou deux sites (pas de
+  relance de Chrome), onglets réutilisés pour les chargements parallèles
+- chemin du chromedriver résolu une seule fois, puis relu depuis le disque
+  (plus de ChromeDriverManager().install() à chaque exécution)
+- images, médias et polices bloqués (préférences Chrome + CDP
+  Network.setBlockedURLs) : seul le HTML et le JavaScript sont téléchargés
+- pages indépendantes chargées en même temps dans des onglets
+- temps de chargement et mémoire (RSS) du navigateur relevés par site
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:  # pragma: no cover - Selenium Manager trouve alors le driver
+    ChromeDriverManager = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - mesure RSS indisponible
+    psutil = None
+
+# ================== CONFIGURATION ==================
+POOL_SIZE = 4  # Navigateurs ouverts au maximum (un par site Selenium en parallèle)
+PAGE_TIMEOUT = 30  # Attente maximale du chargement d'une page (secondes)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DRIVER_PATH_FILE = os.path.join("cache", "chromedriver_path.txt")
+BLOCKED_URLS = [
+    # images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # polices
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # médias
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+]
+CHROME_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+_driver_path = None
+_driver_lock = threading.Lock()
+
+
+# ================== CHROMEDRIVER ==================
+def driver_path():
+    """Chemin du chromedriver ("" = laisser Selenium Manager le trouver), résolu une fois."""
+    global _driver_path
+    with _driver_lock:
+        if _driver_path is None:
+            _driver_path = _resolve_driver_path()
+    return _driver_path
+
+
+def _resolve_driver_path():
+    path = os.environ.get("CHROMEDRIVER", "")
+    if path and os.path.exists(path):
+        return path
+    if os.path.exists(DRIVER_PATH_FILE):
+        with open(DRIVER_PATH_FILE, encoding="utf-8") as f:
+            path = f.read().strip()
+        if os.path.exists(path):
+            return path
+    if ChromeDriverManager is None:
+        return ""
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_PATH_FILE), exist_ok=True)
+    with open(DRIVER_PATH_FILE, "w", encoding="utf-8") as f:
+        f.write(path)
+    return path
+
+
+def chrome_options(user_agent=USER_AGENT):
+    """Options communes : headless, sans images/médias, fenêtre de bureau."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    options.add_experimental_option("prefs", CHROME_PREFS)
+    options.add_argument(f"user-agent={user_agent}")
+    return options
+
+
+def block_resources(driver):
+    """Bloque images, polices et médias dans l'onglet courant (CDP)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except WebDriverException as e:
+        logging.warning(f"Blocage CDP indisponible : {e}")
+
+
+def browser_rss(driver):
+    """Mémoire résidente (octets) de chromedriver et de tous les processus Chrome."""
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+    except (psutil.Error, AttributeError):
+        return None
+
+
+# ================== POOL ==================
+class BrowserPool:
+    """Pool de Chrome : `with pool.browser() as driver: pool.load(driver, url, site)`.
+
+    - `size` : nombre maximal de navigateurs ; au-delà, on attend qu'un se libère
+    - un navigateur rendu au pool garde ses onglets (remis sur about:blank)
+    - un navigateur qui a planté est fermé et remplacé au prochain emprunt
+    """
+
+    def __init__(self, size=POOL_SIZE, user_agent=USER_AGENT):
+        self.size = max(1, size)
+        self.user_agent = user_agent
+        self.idle = queue.LifoQueue()  # le plus récemment utilisé d'abord (le plus chaud)
+        self.created = 0
+        self.lock = threading.Lock()
+        self.all = []
+        self.stats = {}
+
+    def _create(self):
+        service = Service(driver_path()) if driver_path() else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options(self.user_agent))
+        driver.set_page_load_timeout(PAGE_TIMEOUT)
+        block_resources(driver)
+        with self.lock:
+            self.all.append(driver)
+        return driver
+
+    def _acquire(self):
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                creer = self.created < self.size
+                if creer:
+                    self.created += 1
+            if creer:
+                try:
+                    return self._create()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue  # un navigateur a pu être fermé entre-temps : on peut en créer un
+
+    def _discard(self, driver):
+        with self.lock:
+            self.created -= 1
+            if driver in self.all:
+                self.all.remove(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    @contextmanager
+    def browser(self):
+        """Emprunte un navigateur chaud (créé au besoin) et le rend à la sortie."""
+        driver = self._acquire()
+        try:
+            yield driver
+        except WebDriverException:
+            self._discard(driver)
+            raise
+        except BaseException:
+            # Erreur du scraper (ou générateur fermé) : le navigateur reste utilisable
+            self._release(driver)
+            raise
+        self._release(driver)
+
+    def _release(self, driver):
+        try:
+            self._reset(driver)
+        except WebDriverException:
+            self._discard(driver)
+            return
+        self.idle.put(driver)
+
+    def _reset(self, driver):
+        """Remet tous les onglets sur about:blank (ils restent ouverts pour la suite)."""
+        handles = driver.window_handles
+        for handle in handles:
+            driver.switch_to.window(handle)
+            driver.get("about:blank")
+        driver.switch_to.window(handles[0])
+
+    # -------------------- chargements --------------------
+    def _record(self, site, seconds, driver):
+        rss = browser_rss(driver)
+        with self.lock:
+            entry = self.stats.setdefault(site or "?", {"pages": 0, "load_time": 0.0, "rss_max": 0})
+            entry["pages"] += 1
+            entry["load_time"] += seconds
+            if rss:
+                entry["rss_max"] = max(entry["rss_max"], rss)
+
+    def load(self, driver, url, site=None):
+        """driver.get(url) chronométré pour `site`."""
+        start = time.perf_counter()
+        driver.get(url)
+        self._record(site, time.perf_counter() - start, driver)
+
+    def load_parallel(self, driver, urls, site=None, ready=None, timeout=PAGE_TIMEOUT):
+        """Charge toutes les `urls` en même temps, une par onglet.
+
+        Génère (url, page_source) dans l'ordre des URLs. `ready(driver)` est
+        appelé sur chaque onglet avant de lire son HTML (défilement, attente
+        du rendu...). Les onglets supplémentaires restent ouverts pour le
+        prochain lot.
+        """
+        first = driver.window_handles[0]
+        spare = [handle for handle in driver.window_handles if handle != first]
+        tabs = []
+        start = time.perf_counter()
+        for i, url in enumerate(urls):
+            if i == 0:
+                driver.switch_to.window(first)
+            elif spare:
+                driver.switch_to.window(spare.pop(0))
+            else:
+                driver.switch_to.new_window("tab")
+                block_resources(driver)
+            # Navigation lancée sans attendre la fin du chargement. L'onglet peut
+            # être réutilisé (lot précédent) : l'ancien document est marqué pour
+            # ne pas être pris pour la nouvelle page tant qu'elle n'a pas remplacé
+            # l'ancienne (son readyState vaut déjà 'complete').
+            driver.execute_script("window.__scrapeAncienne = true; window.location.href = arguments[0];", url)
+            tabs.append((url, driver.current_window_handle))
+
+        for url, handle in tabs:
+            driver.switch_to.window(handle)
+            WebDriverWait(driver, timeout).until(lambda d: d.execute_script(
+                "return location.href !== 'about:blank' && !window.__scrapeAncienne "
+                "&& document.readyState === 'complete';"))
+            # Temps écoulé depuis le lancement du lot (les onglets chargent ensemble)
+            self._record(site, time.perf_counter() - start, driver)
+            if ready:
+                ready(driver)
+            yield url, driver.page_source
+        driver.switch_to.window(first)
+
+    def close(self):
+        """Ferme tous les navigateurs du pool."""
+        with self.lock:
+            drivers, self.all = self.all, []
+            self.created = 0
+        self.idle = queue.LifoQueue()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+    def log_stats(self, log=logging.info):
+        """Temps de chargement moyen et pic de mémoire du navigateur, par site."""
+        for site, entry in sorted(self.stats.items()):
+            moyenne = entry["load_time"] / entry["pages"] if entry["pages"] else 0
+            rss = f"{entry['rss_max'] / 1e6:.0f} Mo" if entry["rss_max"] else "n/d"
+            log(f"{site} : {entry['pages']} pages, chargement moyen {moyenne:.2f}s, RSS max {rss}")
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Pool partagé du processus (créé au premier appel, fermé à la sortie)."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+            atexit.register(_default_pool.close)
+    return _default_pool
+
+
+def browser():
+    """Raccourci : `with browser_pool.browser() as driver:` sur le pool partagé."""
+    return default_pool().browser()
+
+
+def load(driver, url, site=None):
+    default_pool().load(driver, url, site)
+
+
+def load_parallel(driver, urls, site=None, ready=None, timeout=PAGE_TIMEOUT):
+    return default_pool().load_parallel(driver, urls, site, ready, timeout)
+
+
+def log_stats(log=logging.info):
+    default_pool().log_stats(log)
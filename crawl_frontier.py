@@ -0,0 +1,111 @@
+"""
+Frontière de crawl persistante (SQLite) pour le scraping des pages de détail.
+Chaque URL a un état (pending / fetched / failed / parsed) et un nombre de
+tentatives ; l'enregistrement extrait est stocké avec l'URL une fois parsée.
+Un redémarrage reprend exactement là où le précédent s'est arrêté, sans
+relancer la collecte des URLs.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ================== CONFIGURATION ==================
+FRONTIER_DB = os.path.join("etat", "voursa_frontier.sqlite")
+MAX_ATTEMPTS = 3  # Au-delà, une URL en échec n'est plus retentée
+
+PENDING = "pending"
+FETCHED = "fetched"
+FAILED = "failed"
+PARSED = "parsed"
+
+
+class CrawlFrontier:
+    """File d'URLs persistante, utilisable depuis plusieurs threads."""
+
+    def __init__(self, path=FRONTIER_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    record TEXT,
+                    updated_at REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_state ON urls(state, position)")
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def add_urls(self, urls):
+        """Ajoute les URLs collectées (les URLs déjà connues gardent leur état)."""
+        with self.lock, self.conn:
+            start = self.conn.execute("SELECT COALESCE(MAX(position), 0) FROM urls").fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, position, updated_at) VALUES (?, ?, ?)",
+                ((url, start + i, time.time()) for i, url in enumerate(urls, 1)),
+            )
+
+    def urls_to_process(self, max_attempts=MAX_ATTEMPTS):
+        """URLs restant à traiter, dans l'ordre de collecte."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url FROM urls WHERE state != ? AND attempts < ? ORDER BY position",
+                (PARSED, max_attempts),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def _update(self, url, state, increment=0, error=None, record=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE urls SET state = ?, attempts = attempts + ?, error = ?, "
+                "record = COALESCE(?, record), updated_at = ? WHERE url = ?",
+                (state, increment, error, record, time.time(), url),
+            )
+
+    def mark_fetched(self, url):
+        """Page téléchargée : compte comme une tentative."""
+        self._update(url, FETCHED, increment=1)
+
+    def mark_failed(self, url, error, count_attempt=True):
+        """Échec du téléchargement ou de l'extraction."""
+        self._update(url, FAILED, increment=1 if count_attempt else 0, error=str(error)[:500])
+
+    def mark_parsed(self, url, record):
+        """Extraction réussie : l'enregistrement est stocké avec l'URL."""
+        self._update(url, PARSED, record=json.dumps(record, ensure_ascii=False))
+
+    def iter_records(self):
+        """Enregistrements extraits, dans l'ordre de collecte (générateur)."""
+        # Connexion de lecture dédiée : les lignes sont lues au fil de l'eau
+        reader = sqlite3.connect(self.path)
+        try:
+            for (record,) in reader.execute(
+                "SELECT record FROM urls WHERE state = ? ORDER BY position", (PARSED,)
+            ):
+                yield json.loads(record)
+        finally:
+            reader.close()
+
+    def counts(self):
+        """Nombre d'URLs par état."""
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,179 @@
+"""
+Lancement de tous les scrapers en parallèle, suivi d'une seule fusion.
+
+Chaque site est un module "plugin" (scrap_*.py) qui expose :
+- SOURCE : nom de la source (l'hôte)
+- fetch() : générateur de pages brutes (clé, contenu), délais de politesse compris
+- parse(clé, contenu) : liste de Listing extraits de la page
+- ARRET_PAGE_VIDE (optionnel) : la première page sans annonce arrête la pagination
+
+Chaque page est archivée (voir page_archive) ; `--replay` relance l'extraction
+de tous les sites depuis l'archive, sans réseau ni navigateur.
+Les sites triés du plus récent au plus ancien (menazel, voursa) arrêtent leur
+pagination au repère du crawl précédent (voir watermarks) ; `--full` force un
+crawl complet.
+
+Un site = un worker : les pages d'un même hôte restent séquentielles, avec les
+délais de politesse du site, pendant que les autres sites avancent en
+parallèle. La durée totale est proche de celle du site le plus lent, pas de
+la somme de tous les sites. Les fichiers communs ne sont fusionnés qu'une
+fois, à la fin.
+
+Usage : python crawler.py [--sites wassit lagence ...] [--workers N] [--sortie fichier.csv] [--replay [archive]] [--full]
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import csv
+import importlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+
+import pandas as pd
+
+import browser_pool
+import host_limiter
+import instrumentation
+import listing_fingerprints
+import page_archive
+import page_waits
+import watermarks
+from listing import listings_vers_dataframe
+
+# ================== CONFIGURATION ==================
+# Nom court -> module du scraper (importlib : "scrap_mauri-home" n'est pas un nom importable)
+SITES = {
+    'wassit': 'scrap_wassit_info',
+    'lagence': 'scrap_lagence',
+    'afribaba': 'scrap_afribaba',
+    'untoitenrim': 'scrap_untoitenrim',
+    'menazel': 'scrap_menazel',
+    'mauri-home': 'scrap_mauri-home',
+    'elminassa': 'scrap_elminassa',
+    'voursa': 'scrap_voursa',
+}
+FICHIER_FUSION = 'data_raw/final_data_raw.csv'
+
+
+def charger_plugin(nom):
+    """Module du scraper `nom` (voir SITES)."""
+    return importlib.import_module(SITES[nom])
+
+
+# ================== EXÉCUTION D'UN SITE ==================
+def executer_site(nom, replay=None):
+    """Fait tourner fetch/parse d'un site ; renvoie ses annonces et ses statistiques.
+
+    Une erreur n'arrête que ce site : les annonces déjà extraites sont gardées.
+    `replay` (non None) : pages lues dans l'archive au lieu de fetch().
+    """
+    debut = time.perf_counter()
+    resultat = {'site': nom, 'annonces': [], 'pages': 0, 'erreur': None}
+    try:
+        plugin = charger_plugin(nom)
+        source = getattr(plugin, 'SOURCE', nom)
+        arret_page_vide = getattr(plugin, 'ARRET_PAGE_VIDE', False)
+        # closing : un arrêt anticipé ferme le générateur (et donc le navigateur)
+        with closing(instrumentation.pages(source, page_archive.source_pages(source, plugin.fetch, replay))) as pages:
+            for cle, contenu in pages:
+                resultat['pages'] += 1
+                annonces = plugin.parse(cle, contenu)
+                if not annonces and arret_page_vide:
+                    break
+                resultat['annonces'].extend(annonces)
+    except Exception as e:
+        logging.exception(f"Site {nom} interrompu")
+        resultat['erreur'] = str(e)
+    resultat['duree'] = time.perf_counter() - debut
+    return resultat
+
+
+def executer(sites, workers=None, replay=None):
+    """Lance les sites en parallèle (un worker par site par défaut)."""
+    resultats = []
+    if replay is not None:
+        page_archive.start_replay(replay or None)  # index construit une fois pour tous les sites
+    with ThreadPoolExecutor(max_workers=workers or len(sites)) as pool:
+        futures = {pool.submit(executer_site, nom, replay): nom for nom in sites}
+        for future in as_completed(futures):
+            resultat = future.result()
+            statut = f"❌ {resultat['erreur']}" if resultat['erreur'] else "✅"
+            print(f"{statut} {resultat['site']}: {len(resultat['annonces'])} annonces, "
+                  f"{resultat['pages']} pages en {resultat['duree']:.1f}s")
+            resultats.append(resultat)
+    return resultats
+
+
+# ================== FUSION ==================
+def fusionner(resultats, sortie=FICHIER_FUSION):
+    """Ajoute les annonces de tous les sites au fichier commun, une seule fois.
+
+    Une annonce déjà présente (même source, même URL ou même id_unique) est
+    remplacée par la version la plus récente.
+    """
+    annonces = [annonce for resultat in resultats for annonce in resultat['annonces']]
+    if not annonces:
+        return None
+    df = listings_vers_dataframe(annonces)
+    if os.path.exists(sortie):
+        df_existant = pd.read_csv(sortie, dtype=str, encoding='utf-8-sig')
+        df = pd.concat([df_existant, df], ignore_index=True, sort=False)
+    # Clé d'une annonce : son URL, ou à défaut son identifiant sur le site
+    identifiants = df.reindex(columns=['url', 'id_unique'])
+    cle = identifiants['url'].fillna(identifiants['id_unique'])
+    doublons = cle.notna() & pd.DataFrame({'source': df['source'], 'cle': cle}).duplicated(keep='last')
+    df = df[~doublons]
+    os.makedirs(os.path.dirname(sortie) or '.', exist_ok=True)
+    with instrumentation.timer('fusion', 'write'):
+        df.to_csv(sortie, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lancement de tous les scrapers en parallèle")
+    parser.add_argument('--sites', nargs='+', choices=list(SITES), default=list(SITES))
+    parser.add_argument('--workers', type=int, help="sites en parallèle (défaut : tous)")
+    parser.add_argument('--sortie', default=FICHIER_FUSION)
+    parser.add_argument('--replay', nargs='?', const='', metavar='ARCHIVE',
+                        help="réextraire depuis l'archive (défaut : la plus récente de chaque site)")
+    parser.add_argument('--full', action='store_true',
+                        help="crawl complet, sans arrêt au repère du crawl précédent")
+    args = parser.parse_args()
+    watermarks.FULL_CRAWL = args.full
+
+    print("="*60)
+    print(f"🚀 CRAWL DE {len(args.sites)} SITES EN PARALLÈLE")
+    print("="*60)
+
+    debut = time.perf_counter()
+    resultats = executer(args.sites, args.workers, args.replay)
+    duree = time.perf_counter() - debut
+
+    df = fusionner(resultats, args.sortie)
+
+    print("\n📊 RÉSULTAT:")
+    for resultat in sorted(resultats, key=lambda r: r['site']):
+        print(f"   - {resultat['site']:12}: {len(resultat['annonces']):5} annonces "
+              f"({resultat['duree']:.1f}s)")
+    somme = sum(resultat['duree'] for resultat in resultats)
+    print(f"   - Durée totale: {duree:.1f}s (somme des sites: {somme:.1f}s)")
+    print("\n🌐 Navigateurs (pool partagé):")
+    browser_pool.log_stats(lambda ligne: print(f"   - {ligne}"))
+    page_waits.log_savings(lambda ligne: print(f"   - {ligne}"))
+    print("\n🚦 Concurrence par hôte (AIMD):")
+    host_limiter.log_stats(lambda ligne: print(f"   - {ligne}"))
+    print("\n🧬 Pages de détail (empreintes des cartes):")
+    listing_fingerprints.log_stats(lambda ligne: print(f"   - {ligne}"))
+    print("\n⏱️ Mesures par site:")
+    instrumentation.report('crawl', lambda ligne: print(f"   - {ligne}"))
+    if df is not None:
+        print(f"💾 Fusion: {args.sortie} ({len(df)} annonces)")
+    else:
+        print("❌ Aucune annonce récupérée")
+
+
+if __name__ == '__main__':
+    main()
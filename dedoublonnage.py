@@ -0,0 +1,266 @@
+"""
+Détection des quasi-doublons entre sources (même bien publié sur voursa,
+menazel, lagence, mauri-home...) par MinHash + LSH.
+
+1. titre + description normalisés (français et arabe, voir gazetteer.normaliser)
+   découpés en k-grammes de caractères ; les k-grammes présents dans trop
+   d'annonces (formules de politesse, téléphone d'un même vendeur) sont
+   retirés avant le MinHash
+2. signature MinHash de chaque annonce (NB_PERMUTATIONS fonctions de hachage)
+3. LSH : la signature est coupée en bandes ; deux annonces qui partagent une
+   bande deviennent candidates (pas de comparaison de toutes les paires)
+4. vérification des candidats : similarité estimée + champs numériques
+   compatibles (prix, surface, chambres, quartier)
+5. union-find : chaque groupe de doublons reçoit un id_cluster ; une paire
+   n'unit deux groupes que si les champs restent compatibles sur tout le
+   groupe fusionné (pas de chaînage A~B~C avec A et C incompatibles)
+
+Aucune ligne n'est supprimée : on ajoute id_cluster et taille_cluster.
+
+Usage : python dedoublonnage.py dataset_complet.csv [--sortie fichier.csv]
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import csv
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from gazetteer import NON_SPECIFIE, normaliser
+from normalisation import extraire_nombre, normaliser_prix
+
+# ================== CONFIGURATION ==================
+TAILLE_SHINGLE = 5  # k-grammes de caractères
+NB_PERMUTATIONS = 64
+NB_BANDES = 16  # 16 bandes de 4 lignes : seuil LSH ≈ (1/16)^(1/4) ≈ 0.5
+SEUIL_SIMILARITE = 0.6  # Jaccard estimée minimale pour retenir une paire
+TOLERANCE_NUMERIQUE = 0.10  # Écart relatif toléré sur le prix et la surface
+FENETRE = 20  # Voisins comparés dans un seau LSH (tous si le seau est plus petit)
+FREQUENCE_MAX_SHINGLE = 0.005  # k-gramme dans plus de 0,5 % des annonces : texte type, ignoré
+MIN_ANNONCES_TEXTE_TYPE = 10  # ... mais jamais en dessous de 10 annonces (petits fichiers)
+
+# Hachage universel "multiply-shift" : (a * x + b) mod 2^64, 32 bits de poids fort
+_graine = np.random.RandomState(2024)
+_A = _graine.randint(1, 1 << 62, size=NB_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_B = _graine.randint(0, 1 << 62, size=NB_PERMUTATIONS, dtype=np.uint64)
+_VIDE = np.iinfo(np.uint32).max
+
+
+# ================== MINHASH ==================
+def shingles(texte, k=TAILLE_SHINGLE):
+    """Empreintes (crc32, stables d'une exécution à l'autre) des k-grammes du texte normalisé."""
+    texte = normaliser(texte)
+    if len(texte) < k:
+        return np.array([zlib.crc32(texte.encode())], dtype=np.uint64) if texte else None
+    return np.fromiter({zlib.crc32(texte[i:i + k].encode()) for i in range(len(texte) - k + 1)},
+                       dtype=np.uint64)
+
+
+def shingles_types(ensembles, frequence_max=FREQUENCE_MAX_SHINGLE):
+    """k-grammes présents dans trop d'annonces (texte type d'un vendeur, formules)."""
+    presents = [e for e in ensembles if e is not None]
+    if not presents:
+        return np.empty(0, dtype=np.uint64)
+    valeurs, nombres = np.unique(np.concatenate(presents), return_counts=True)
+    return valeurs[nombres > max(MIN_ANNONCES_TEXTE_TYPE, frequence_max * len(ensembles))]
+
+
+def signatures(textes):
+    """Matrice (n, NB_PERMUTATIONS) des signatures MinHash ; ligne vide -> _VIDE partout.
+
+    Les k-grammes de texte type sont retirés : une annonce réduite à du texte
+    type n'a pas de signature.
+    """
+    resultat = np.full((len(textes), NB_PERMUTATIONS), _VIDE, dtype=np.uint32)
+    ensembles = [shingles(texte) if isinstance(texte, str) else None for texte in textes]
+    types = shingles_types(ensembles)
+    if len(types):
+        # Un seul np.isin sur toutes les annonces, puis redécoupage par annonce
+        tailles = [0 if e is None else len(e) for e in ensembles]
+        garde = ~np.isin(np.concatenate([e for e in ensembles if e is not None]), types)
+        morceaux = np.split(garde, np.cumsum(tailles)[:-1])
+        ensembles = [None if e is None else e[g] for e, g in zip(ensembles, morceaux)]
+    for i, empreintes in enumerate(ensembles):
+        if empreintes is not None and len(empreintes):
+            hachages = (np.outer(empreintes, _A) + _B) >> np.uint64(32)
+            resultat[i] = hachages.min(axis=0).astype(np.uint32)
+    return resultat
+
+
+# ================== LSH ==================
+def paires_candidates(sig, nb_bandes=NB_BANDES, fenetre=FENETRE):
+    """Paires (i, j), i < j, qui partagent au moins une bande de signature.
+
+    Dans chaque seau, chaque annonce est appariée à ses `fenetre` suivantes :
+    toutes les paires pour les petits seaux, un nombre linéaire pour les gros
+    (textes types), l'union-find reliant ensuite les chaînes.
+    """
+    lignes = sig.shape[1] // nb_bandes
+    valides = np.flatnonzero(sig[:, 0] != _VIDE)
+    gauche, droite = [], []
+    for bande in range(nb_bandes):
+        tranche = np.ascontiguousarray(sig[valides, bande * lignes:(bande + 1) * lignes])
+        cles = tranche.view(np.dtype((np.void, tranche.dtype.itemsize * lignes))).ravel()
+        seaux = np.unique(cles, return_inverse=True)[1].ravel()
+        ordre = np.argsort(seaux, kind="stable")  # stable : indices croissants dans un seau
+        seaux, membres = seaux[ordre], valides[ordre]
+        for decalage in range(1, fenetre + 1):
+            meme_seau = seaux[decalage:] == seaux[:-decalage]
+            gauche.append(membres[:-decalage][meme_seau])
+            droite.append(membres[decalage:][meme_seau])
+    if not gauche:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cles = np.unique(np.concatenate(gauche).astype(np.int64) * len(sig) + np.concatenate(droite))
+    return cles // len(sig), cles % len(sig)
+
+
+def _compatibles(valeurs, i, j, tolerance=None):
+    """Vrai si les deux valeurs sont compatibles (ou si l'une des deux manque)."""
+    a, b = valeurs[i], valeurs[j]
+    manquant = pd.isna(a) | pd.isna(b)
+    if tolerance is None:
+        egal = a == b
+    else:
+        egal = np.abs(a - b) <= tolerance * np.maximum(np.abs(a), np.abs(b))
+    return manquant | np.nan_to_num(egal, nan=False).astype(bool)
+
+
+def champs(df):
+    """Champs comparés entre doublons : {nom: (valeurs, tolérance relative ou None si égalité)}."""
+    resultat = {}
+    if "prix" in df:
+        resultat["prix"] = (normaliser_prix(df["prix"])["prix_mru"].astype("float64").to_numpy(),
+                            TOLERANCE_NUMERIQUE)
+    if "surface_m2" in df:
+        resultat["surface"] = (extraire_nombre(df["surface_m2"]).astype("float64").to_numpy(), TOLERANCE_NUMERIQUE)
+    if "nb_chambres" in df:
+        resultat["chambres"] = (extraire_nombre(df["nb_chambres"]).astype("float64").to_numpy(), None)
+    colonne_quartier = "quartier_canonique" if "quartier_canonique" in df else "quartier"
+    if colonne_quartier in df:
+        quartier = df[colonne_quartier].astype(object).where(lambda q: q.notna() & (q != NON_SPECIFIE))
+        resultat["quartier"] = (quartier.to_numpy(), None)
+    return resultat
+
+
+def verifier(sig, df, i, j, valeurs=None):
+    """Filtre les paires candidates : similarité MinHash + champs numériques."""
+    similarite = (sig[i] == sig[j]).mean(axis=1)
+    garde = similarite >= SEUIL_SIMILARITE
+    for colonne, tolerance in (valeurs if valeurs is not None else champs(df)).values():
+        garde &= _compatibles(colonne, i, j, tolerance)
+    return i[garde], j[garde], similarite[garde]
+
+
+# ================== CLUSTERS ==================
+class _Groupe:
+    """Valeurs connues d'un groupe : intervalle (champs numériques) ou valeur unique."""
+
+    def __init__(self, valeurs, x):
+        self.bornes = {}
+        for nom, (colonne, _) in valeurs.items():
+            v = colonne[x]
+            self.bornes[nom] = None if pd.isna(v) else (v, v)
+
+    def fusion(self, autre, valeurs):
+        """Bornes du groupe fusionné, ou None si un champ devient incompatible."""
+        bornes = {}
+        for nom, (_, tolerance) in valeurs.items():
+            a, b = self.bornes[nom], autre.bornes[nom]
+            if a is None or b is None:
+                bornes[nom] = a or b
+                continue
+            if tolerance is None:
+                if a[0] != b[0]:
+                    return None
+                bornes[nom] = a
+                continue
+            bas, haut = min(a[0], b[0]), max(a[1], b[1])
+            if haut - bas > tolerance * max(abs(bas), abs(haut)):
+                return None
+            bornes[nom] = (bas, haut)
+        return bornes
+
+
+def clusters(n, i, j, valeurs=None, similarite=None):
+    """Union-find : id_cluster = plus petit indice de ligne du groupe.
+
+    Avec `valeurs` (voir champs()), deux groupes ne sont unis que si chaque
+    champ reste compatible sur tout le groupe fusionné (prix et surface dans
+    la tolérance entre le minimum et le maximum, une seule valeur de chambres
+    et de quartier). Les paires les plus similaires sont unies en premier.
+    """
+    parent = np.arange(n)
+    groupes = {}
+
+    def racine(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    ordre = np.argsort(-similarite, kind="stable") if similarite is not None else range(len(i))
+    for k in ordre:
+        ra, rb = racine(i[k]), racine(j[k])
+        if ra == rb:
+            continue
+        if valeurs:
+            ga = groupes.get(ra) or _Groupe(valeurs, ra)
+            gb = groupes.get(rb) or _Groupe(valeurs, rb)
+            bornes = ga.fusion(gb, valeurs)
+            if bornes is None:
+                continue
+            ga.bornes = bornes
+            groupes.pop(rb, None)
+            groupes.pop(ra, None)
+            groupes[min(ra, rb)] = ga
+        parent[max(ra, rb)] = min(ra, rb)
+    return np.array([racine(x) for x in range(n)])
+
+
+def dedoublonner(df, colonnes_texte=("titre", "description")):
+    """Ajoute id_cluster et taille_cluster à une copie de `df` (aucune ligne supprimée)."""
+    df = df.reset_index(drop=True)
+    textes = df[list(colonnes_texte)].fillna("").astype(str).agg(" ".join, axis=1).str.strip()
+    sig = signatures(textes.where(textes != "").tolist())
+    i, j = paires_candidates(sig)
+    nb_candidates = len(i)
+    valeurs = champs(df)
+    i, j, similarite = verifier(sig, df, i, j, valeurs)
+    resultat = df.copy()
+    resultat["id_cluster"] = clusters(len(df), i, j, valeurs, similarite)
+    resultat["taille_cluster"] = resultat.groupby("id_cluster")["id_cluster"].transform("size")
+    resultat.attrs["paires_candidates"] = nb_candidates
+    resultat.attrs["paires_retenues"] = len(i)
+    return resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection des quasi-doublons entre sources (MinHash/LSH)")
+    parser.add_argument("fichier", nargs="?", default="dataset_complet.csv")
+    parser.add_argument("--sortie", help="CSV de sortie avec les colonnes id_cluster et taille_cluster")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.fichier, dtype=str, encoding="utf-8-sig")
+    debut = time.perf_counter()
+    resultat = dedoublonner(df)
+    duree = time.perf_counter() - debut
+
+    doublons = resultat[resultat["taille_cluster"] > 1]
+    print(f"🔎 {len(df)} annonces analysées en {duree:.1f}s")
+    print(f"   - Paires candidates (LSH): {resultat.attrs['paires_candidates']}")
+    print(f"   - Paires retenues: {resultat.attrs['paires_retenues']}")
+    print(f"   - Annonces en doublon: {len(doublons)} dans {doublons['id_cluster'].nunique()} groupes")
+    if "source" in doublons:
+        inter_sources = doublons.groupby("id_cluster")["source"].nunique()
+        print(f"   - Groupes couvrant plusieurs sources: {(inter_sources > 1).sum()}")
+
+    if args.sortie:
+        resultat.to_csv(args.sortie, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+        print(f"💾 Sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
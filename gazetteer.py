@@ -0,0 +1,336 @@
+"""
+Gazetteer unique des quartiers de Nouakchott et des villes, avec leurs alias
+français, arabes et translittérés, et un résolveur qui ramène un texte libre
+(quartier saisi, titre, description) au nom canonique.
+Les villes ont leur propre table (resoudre_ville) : "route de Rosso" ou
+"Nouadhibou" ne donnent jamais de quartier.
+
+Ordre de résolution :
+1. alias exact (après normalisation : minuscules, accents, formes arabes)
+2. alias présent dans le texte : mots entiers, ou sous-chaîne pour l'arabe
+   (le plus long gagne)
+3. correspondance approchée : index de trigrammes + distance d'édition
+Les résultats sont mémorisés (cache LRU borné à TAILLE_CACHE chaînes : les
+quartiers saisis restent en cache, les titres libres n'accumulent pas).
+
+Usage : python gazetteer.py dataset_complet.csv [--colonne quartier] [--sortie fichier.csv] [--verifier]
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import csv
+import math
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from keyword_matcher import KeywordMatcher
+
+NON_SPECIFIE = "Non spécifié"
+
+# ================== GAZETTEER ==================
+# (nom canonique, ville, moughataa ou None si incertaine, alias)
+QUARTIERS = [
+    # Moughataas de Nouakchott
+    ("Tevragh Zeina", "Nouakchott", "Tevragh Zeina",
+     ["Tevragh-Zeina", "Tavragh Zeina", "Tefragh Zeina", "Tevragh Zeine", "Tevrag Zeina", "تفرغ زينة"]),
+    ("Ksar", "Nouakchott", "Ksar", ["El Ksar", "Lksar", "Lekssar", "Ksar Ancien", "لكصر", "الكصر"]),
+    ("Teyarett", "Nouakchott", "Teyarett", ["Teyaret", "Tiyarett", "Tayarett", "Teyarette", "تيارت"]),
+    ("Dar Naim", "Nouakchott", "Dar Naim", ["Dar Naïm", "Dar Nayim", "Dar El Naim", "Dar-Naim", "دار النعيم"]),
+    ("Arafat", "Nouakchott", "Arafat", ["Arafatt", "عرفات"]),
+    ("Toujounine", "Nouakchott", "Toujounine", ["Toujounin", "Tojounine", "Toujenine", "توجنين"]),
+    ("El Mina", "Nouakchott", "El Mina", ["Elmina", "El-Mina", "Mina", "الميناء"]),
+    ("Sebkha", "Nouakchott", "Sebkha", ["Sebkhe", "Sebka", "Sebkhaa", "السبخة"]),
+    ("Riyadh", "Nouakchott", "Riyadh", ["Riyad", "Riad", "Ryad", "الرياض"]),
+    # Quartiers et îlots de Nouakchott
+    ("Cité Plage", "Nouakchott", "Tevragh Zeina", ["Cite Plage", "Cité-Plage", "Cité de la Plage"]),
+    ("Las Palmas", "Nouakchott", "Tevragh Zeina", ["Las Palmas", "Laspalmas"]),
+    ("Ilot K", "Nouakchott", "Tevragh Zeina", ["Ilot-K", "Îlot K"]),
+    ("Ilot M", "Nouakchott", "Tevragh Zeina", ["Ilot-M", "Îlot M"]),
+    ("Ilot F Nord", "Nouakchott", "Tevragh Zeina", ["F Nord", "FNord", "F-Nord", "Îlot F Nord"]),
+    ("Ilot E Nord", "Nouakchott", "Tevragh Zeina", ["E Nord", "ENord", "E-Nord", "Îlot E Nord"]),
+    ("Ilot B", "Nouakchott", None, ["Ilot-B", "Îlot B"]),
+    ("Module A", "Nouakchott", None, ["ModuleA", "Module-A"]),
+    ("Module E", "Nouakchott", None, ["ModuleE", "Module-E"]),
+    ("Module M", "Nouakchott", None, ["ModuleM", "Module-M"]),
+    ("Socogim", "Nouakchott", None, ["Socogim PS", "Socojim", "سوكوجيم"]),
+    ("Centre Émetteur", "Nouakchott", None, ["Centre Emetteur", "Emetteur"]),
+    ("Mégafoot", "Nouakchott", None, ["Megafoot"]),
+    ("Soukouk", "Nouakchott", None, ["Soukouk"]),
+    ("Sahraoui", "Nouakchott", None, ["Sahraouiya", "الصحراوي"]),
+]
+
+# (nom canonique, alias) : villes, résolues uniquement vers la colonne ville
+VILLES = [
+    ("Nouakchott", ["Nktt", "NKC", "نواكشوط", "انواكشوط"]),
+    ("Nouadhibou", ["Nouâdhibou", "Nouadibou", "NDB", "نواذيبو"]),
+    ("Rosso", ["روصو"]),
+    ("Akjoujt", ["أكجوجت"]),
+    ("Atar", ["أطار"]),
+    ("Aleg", ["ألاك"]),
+    ("Sélibaby", ["Selibaby", "سيلبابي"]),
+    ("Chami", ["الشامي"]),
+    ("Mederdra", ["المذرذرة"]),
+    ("Ouad Naga", ["Ouad-Naga", "Wad Naga", "واد الناقة"]),
+]
+
+SEUIL_SIMILARITE = 0.8  # Similarité minimale (1 - distance / longueur) pour une correspondance approchée
+MAX_CANDIDATS = 8  # Candidats issus de l'index de trigrammes vérifiés par distance d'édition
+TAILLE_CACHE = 4096  # Chaînes résolues gardées en mémoire (mémoire bornée sur les gros fichiers)
+RECOUVREMENT_MIN = 0.5  # Part minimale de trigrammes communs (Dice) avant le calcul de distance
+
+# ================== NORMALISATION ==================
+_ARABE = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي", "ـ": None})
+_NON_ALNUM = re.compile(r"[^\w]+")
+
+
+def normaliser(texte):
+    """Minuscules, sans accents ni diacritiques arabes, ponctuation remplacée par des espaces."""
+    texte = unicodedata.normalize("NFKD", str(texte).lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    texte = texte.translate(_ARABE)
+    return _NON_ALNUM.sub(" ", texte).strip()
+
+
+def _est_arabe(texte):
+    return any("\u0600" <= c <= "\u06ff" for c in texte)
+
+
+def trigrammes(texte):
+    padded = f"  {texte} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def distance_edition(a, b, maximum):
+    """Distance de Levenshtein, arrêtée dès qu'elle dépasse `maximum`."""
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    precedente = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        courante = [i]
+        for j, cb in enumerate(b, 1):
+            courante.append(min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + (ca != cb)))
+        if min(courante) > maximum:
+            return maximum + 1
+        precedente = courante
+    return precedente[-1]
+
+
+# ================== INDEX ==================
+class Gazetteer:
+    """Index des alias : table exacte, automates de recherche et trigrammes."""
+
+    def __init__(self, entrees=QUARTIERS, seuil=SEUIL_SIMILARITE):
+        self.seuil = seuil
+        self.entrees = {nom: {"quartier": nom, "ville": ville, "moughataa": moughataa}
+                        for nom, ville, moughataa, _ in entrees}
+        self.alias = {}
+        for nom, _, _, alias in entrees:
+            for variante in [nom] + list(alias):
+                self.alias.setdefault(normaliser(variante), nom)
+        # Alias les plus longs en premier : "ilot f nord" l'emporte sur "f nord".
+        # Les alias arabes sont cherchés comme sous-chaînes, car les préfixes
+        # (ب، و، ل...) s'attachent au mot : "بتفرغ زينة".
+        ordonnes = sorted(self.alias, key=len, reverse=True)
+        self._matcher_mots = KeywordMatcher([a for a in ordonnes if not _est_arabe(a)],
+                                            ignore_case=False, whole_words=True)
+        self._matcher_arabe = KeywordMatcher([a for a in ordonnes if _est_arabe(a)], ignore_case=False)
+        self._trigrammes = defaultdict(set)
+        for variante in self.alias:
+            for tri in trigrammes(variante):
+                self._trigrammes[tri].add(variante)
+        self.resoudre = lru_cache(maxsize=TAILLE_CACHE)(self._resoudre)
+
+    def _approche(self, texte):
+        """Meilleur alias proche du texte et sa similarité (index de trigrammes + distance d'édition)."""
+        tri_texte = trigrammes(texte)
+        scores = Counter()
+        for tri in tri_texte:
+            for variante in self._trigrammes.get(tri, ()):
+                scores[variante] += 1
+        meilleur, meilleure_sim = None, 0.0
+        for variante, communs in scores.most_common(MAX_CANDIDATS):
+            # Filtres bon marché : trigrammes partagés et longueurs comparables
+            if 2 * communs / (len(tri_texte) + len(trigrammes(variante))) < RECOUVREMENT_MIN:
+                continue
+            longueur = max(len(variante), len(texte))
+            if min(len(variante), len(texte)) / longueur < self.seuil:
+                continue
+            # Tolérance : 10 * (1 - 0.8) vaut 1.99999..., la borne exacte est 2
+            maximum = math.floor(longueur * (1 - self.seuil) + 1e-9)
+            distance = distance_edition(texte, variante, maximum)
+            if distance > maximum:
+                continue  # Arrêt anticipé : candidat rejeté
+            sim = 1 - distance / longueur
+            if sim >= self.seuil and sim > meilleure_sim:
+                meilleur, meilleure_sim = variante, sim
+        return meilleur, meilleure_sim
+
+    def correspondance(self, texte):
+        """(alias retenu, méthode) pour `texte` : "exact", "texte", "approche" ; (None, None) sinon."""
+        if texte is None:
+            return None, None
+        cle = normaliser(texte)
+        if not cle or cle == normaliser(NON_SPECIFIE):
+            return None, None
+        if cle in self.alias:
+            return cle, "exact"
+        trouves = [a for a in (self._matcher_mots.first(cle), self._matcher_arabe.first(cle)) if a]
+        if trouves:
+            return max(trouves, key=len), "texte"
+        # La correspondance approchée ne vaut que pour des saisies courtes
+        if len(cle) <= 40:
+            variante, _ = self._approche(cle)
+            if variante:
+                return variante, "approche"
+        return None, None
+
+    def _resoudre(self, texte):
+        """Nom canonique du quartier mentionné dans `texte` (ou None)."""
+        variante, _ = self.correspondance(texte)
+        return self.alias[variante] if variante else None
+
+    def infos(self, texte):
+        """Quartier canonique, ville et moughataa (dictionnaire vide si inconnu)."""
+        nom = self.resoudre(texte)
+        return self.entrees[nom] if nom else {}
+
+    def resoudre_tout(self, textes):
+        """Résolution en masse : les valeurs répétées sont servies par le cache."""
+        return [self.resoudre(texte) for texte in textes]
+
+
+_defaut = None
+_villes = None
+
+
+def gazetteer():
+    """Gazetteer partagé (construit au premier appel)."""
+    global _defaut
+    if _defaut is None:
+        _defaut = Gazetteer()
+    return _defaut
+
+
+def villes():
+    """Gazetteer des villes (même résolveur, table VILLES)."""
+    global _villes
+    if _villes is None:
+        _villes = Gazetteer([(nom, nom, None, alias) for nom, alias in VILLES])
+    return _villes
+
+
+def resoudre_quartier(texte):
+    """Raccourci : nom canonique du quartier mentionné dans `texte` (ou None)."""
+    return gazetteer().resoudre(texte)
+
+
+def resoudre_ville(texte):
+    """Raccourci : nom canonique de la ville mentionnée dans `texte` (ou None)."""
+    return villes().resoudre(texte)
+
+
+# ================== VÉRIFICATION ==================
+# Chaînes qui ne doivent résoudre vers aucun quartier (faux positifs déjà rencontrés)
+SANS_QUARTIER = ["Nouakchott", "Nktt", "tvz", "Maison a vendre", "نيمرو فرصة", "Nouadhibou",
+                 "route de Rosso Nouakchott", "Terrain à Atar"]
+# Fautes de frappe qui doivent rester reconnues
+ATTENDUS = {"Tevragh zein": "Tevragh Zeina", "Tefrag zeina": "Tevragh Zeina",
+            "Dar naym": "Dar Naim", "sebkba": "Sebkha"}
+VILLES_ATTENDUES = {"nouadhibo": "Nouadhibou", "route de Rosso": "Rosso", "Nktt": "Nouakchott"}
+
+
+def verifier(fichier, colonnes=("ville", "quartier", "titre"), g=None):
+    """Contrôle de non-régression sur les valeurs distinctes d'un CSV ; renvoie la liste des erreurs.
+
+    - chaque correspondance approchée est recalculée avec la distance exacte
+      (sans arrêt anticipé) et doit atteindre le seuil
+    - la colonne ville (des noms de villes) ne doit donner aucun quartier
+    - SANS_QUARTIER, ATTENDUS et VILLES_ATTENDUES
+    """
+    g = g or gazetteer()
+    erreurs = []
+    with open(fichier, encoding="utf-8-sig", newline="") as f:
+        lignes = list(csv.DictReader(f))
+    for colonne in colonnes:
+        valeurs = {ligne.get(colonne) for ligne in lignes if ligne.get(colonne)}
+        approchees = 0
+        for valeur in sorted(valeurs):
+            variante, methode = g.correspondance(valeur)
+            if methode == "approche":
+                approchees += 1
+                cle = normaliser(valeur)
+                longueur = max(len(cle), len(variante))
+                sim = 1 - distance_edition(cle, variante, longueur) / longueur
+                if sim < g.seuil:
+                    erreurs.append(f"{colonne}: {valeur!r} -> {g.alias[variante]} (similarité {sim:.2f})")
+            if colonne == "ville" and variante:
+                erreurs.append(f"ville: {valeur!r} -> quartier {g.alias[variante]}")
+        print(f"   - {colonne}: {len(valeurs)} valeurs distinctes, {approchees} correspondances approchées")
+    for texte in SANS_QUARTIER:
+        if g.resoudre(texte):
+            erreurs.append(f"{texte!r} -> {g.resoudre(texte)} (aucun quartier attendu)")
+    for texte, attendu in ATTENDUS.items():
+        if g.resoudre(texte) != attendu:
+            erreurs.append(f"{texte!r} -> {g.resoudre(texte)} ({attendu} attendu)")
+    for texte, attendu in VILLES_ATTENDUES.items():
+        if resoudre_ville(texte) != attendu:
+            erreurs.append(f"ville {texte!r} -> {resoudre_ville(texte)} ({attendu} attendu)")
+    return erreurs
+
+
+# ================== EXÉCUTION EN MASSE ==================
+def main():
+    parser = argparse.ArgumentParser(description="Résolution des quartiers d'un CSV vers le gazetteer")
+    parser.add_argument("fichier", nargs="?", default="dataset_complet.csv")
+    parser.add_argument("--colonne", default="quartier")
+    parser.add_argument("--repli", nargs="*", default=["titre", "description"],
+                        help="colonnes lues si la colonne principale ne donne rien")
+    parser.add_argument("--sortie", help="CSV de sortie avec les colonnes quartier_canonique et moughataa")
+    parser.add_argument("--verifier", action="store_true",
+                        help="contrôle de non-régression sur les valeurs distinctes du fichier")
+    args = parser.parse_args()
+
+    if args.verifier:
+        print(f"🔬 Vérification du gazetteer sur {args.fichier}")
+        erreurs = verifier(args.fichier)
+        for erreur in erreurs:
+            print(f"   ❌ {erreur}")
+        print(f"{'❌' if erreurs else '✅'} {len(erreurs)} erreur(s)")
+        sys.exit(1 if erreurs else 0)
+
+    with open(args.fichier, encoding="utf-8-sig", newline="") as f:
+        lignes = list(csv.DictReader(f))
+
+    g = gazetteer()
+    debut = time.perf_counter()
+    for ligne in lignes:
+        nom = g.resoudre(ligne.get(args.colonne))
+        for colonne in args.repli:
+            if nom:
+                break
+            nom = g.resoudre(ligne.get(colonne))
+        infos = g.entrees[nom] if nom else {}
+        ligne["quartier_canonique"] = nom or ""
+        ligne["moughataa"] = infos.get("moughataa") or ""
+    duree = time.perf_counter() - debut
+
+    resolues = sum(1 for ligne in lignes if ligne["quartier_canonique"])
+    print(f"📍 {resolues}/{len(lignes)} lignes résolues en {duree:.2f}s "
+          f"({g.resoudre.cache_info().currsize} chaînes distinctes)")
+    for nom, nombre in Counter(l["quartier_canonique"] or NON_SPECIFIE for l in lignes).most_common(15):
+        print(f"   - {nom}: {nombre}")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(lignes[0].keys()), quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            writer.writerows(lignes)
+        print(f"💾 Sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
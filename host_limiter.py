@@ -0,0 +1,231 @@
+"""
+Contrôle adaptatif (AIMD) de la concurrence par hôte, partagé par tous les
+téléchargements (http_client, donc aussi le moteur async_fetcher).
+- chaque hôte a une limite de requêtes en vol et un intervalle minimal entre
+  deux départs (`delay` / limite) : le délai de politesse configuré n'est plus
+  que le point de départ, tenu tant que l'hôte n'a pas fait ses preuves
+- hausse additive (+1 par fenêtre de `limite` réponses saines), tant que les
+  erreurs restent absentes et que la latence p95 ne monte pas, et seulement
+  pour les requêtes qui ont attendu une place (hôte saturé) : un scraper
+  séquentiel garde son délai de politesse
+- baisse multiplicative (x0.5) sur 429/5xx, timeout, erreur réseau ou p95 en
+  hausse ; les requêtes parties avant une baisse ne déclenchent pas la suivante
+- Retry-After respecté (l'hôte est suspendu jusqu'à l'échéance, ou
+  THROTTLE_PAUSE sans en-tête) et plafond configurable par hôte ; 429/503 ne
+  sont pas retentés par urllib3, et ses autres tentatives (5xx, erreurs
+  réseau) comptent chacune comme signal de congestion
+- chaque décision est journalisée ; log_stats() résume les limites par hôte
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# ================== CONFIGURATION ==================
+CEILING = 8  # Requêtes en vol au maximum par hôte
+HOST_CEILING = {}  # Plafonds particuliers, ex. {"voursa.com": 4}
+INITIAL_LIMIT = 1  # Limite de départ (comportement séquentiel d'avant)
+DECREASE_FACTOR = 0.5  # Baisse multiplicative
+LATENCY_WINDOW = 20  # Latences gardées pour le calcul du p95
+LATENCY_MIN_SAMPLES = 5  # Échantillons nécessaires avant de juger le p95
+LATENCY_FACTOR = 2.0  # p95 > LATENCY_FACTOR x p95 de référence : hôte saturé
+MAX_RETRY_AFTER = 300  # Suspension maximale demandée par un Retry-After (secondes)
+THROTTLE_PAUSE = 2.0  # Suspension de l'hôte sur 429/503 sans Retry-After (secondes)
+ERROR_STATUS = (429, 500, 502, 503, 504)
+
+
+def host_of(url):
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def retry_after_seconds(headers):
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), None sinon."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+def p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+# ================== ÉTAT D'UN HÔTE ==================
+class HostState:
+    """Limite AIMD, requêtes en vol et latences récentes d'un hôte."""
+
+    def __init__(self, host, ceiling, delay):
+        self.host = host
+        self.ceiling = max(1, ceiling)
+        self.delay = delay
+        self.limit = float(min(INITIAL_LIMIT, self.ceiling))
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.baseline = None  # p95 de référence (hôte sain)
+        self.condition = threading.Condition()
+        self.stats = {"requetes": 0, "hausses": 0, "baisses": {}, "limite_max": self.limit}
+
+    @property
+    def slots(self):
+        return max(1, int(self.limit))
+
+    @property
+    def interval(self):
+        """Écart minimal entre deux départs : le délai de politesse réparti sur la limite."""
+        return self.delay / self.limit
+
+    # -------------------- décisions --------------------
+    def _increase(self):
+        before = self.slots
+        self.limit = min(self.ceiling, self.limit + 1 / self.limit)
+        if self.slots != before:
+            self.stats["hausses"] += 1
+            self.stats["limite_max"] = max(self.stats["limite_max"], self.slots)
+            logging.info(f"[{self.host}] concurrence {before} -> {self.slots} "
+                         f"(p95 {self._p95_text()}, intervalle {self.interval:.2f}s)")
+
+    def _decrease(self, reason, started):
+        if started < self.last_decrease:
+            return  # Requête partie avant la dernière baisse : déjà prise en compte
+        before = self.slots
+        self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+        self.last_decrease = time.monotonic()
+        # La latence de référence est réapprise à la nouvelle limite
+        self.latencies.clear()
+        self.baseline = None
+        self.stats["baisses"][reason] = self.stats["baisses"].get(reason, 0) + 1
+        logging.warning(f"[{self.host}] {reason} : concurrence {before} -> {self.slots} "
+                        f"(intervalle {self.interval:.2f}s)")
+
+    def _p95_text(self):
+        return f"{p95(self.latencies):.2f}s" if self.latencies else "n/d"
+
+    def observe(self, started, latency, status=None, headers=None, error=None, saturated=False):
+        """Met à jour la limite d'après l'issue d'une requête.
+
+        `saturated` : la requête a attendu une place libre ; sans cela une
+        réponse saine ne justifie pas de hausse (la limite n'est pas le frein).
+        """
+        self.stats["requetes"] += 1
+        pause = (retry_after_seconds(headers) or THROTTLE_PAUSE) if status in (429, 503) else None
+        if pause:
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            logging.warning(f"[{self.host}] Retry-After : pause de {pause:.0f}s")
+        if error is not None:
+            self._decrease(error, started)
+        elif status in ERROR_STATUS:
+            self._decrease(f"HTTP {status}", started)
+        else:
+            self.latencies.append(latency)
+            if len(self.latencies) >= LATENCY_MIN_SAMPLES:
+                current = p95(self.latencies)
+                if self.baseline is not None and current > LATENCY_FACTOR * self.baseline:
+                    self._decrease("p95 en hausse", started)
+                    return
+                self.baseline = current if self.baseline is None else min(self.baseline, current)
+            if saturated:
+                self._increase()
+
+
+# ================== CONTRÔLEUR ==================
+class HostLimiter:
+    """`token = limiter.acquire(url, delay)` ... `limiter.release(token, status, headers)`.
+
+    - `delay` : délai de politesse de départ de l'hôte (retenu au premier appel)
+    - `ceiling` / `host_ceiling` : plafond de concurrence, global ou par hôte
+    Sûr entre threads : un même hôte est partagé par tous les scrapers du processus.
+    """
+
+    def __init__(self, ceiling=CEILING, host_ceiling=None):
+        self.ceiling = ceiling
+        self.host_ceiling = HOST_CEILING if host_ceiling is None else host_ceiling
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def state(self, url, delay=0):
+        host = host_of(url)
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostState(host, self.host_ceiling.get(host, self.ceiling), delay)
+            return self.hosts[host]
+
+    def acquire(self, url, delay=0):
+        """Attend une place libre pour l'hôte de `url` (limite, intervalle, Retry-After)."""
+        state = self.state(url, delay)
+        saturated = False  # Toutes les places étaient prises à un moment de l'attente
+        with state.condition:
+            while True:
+                now = time.monotonic()
+                wait = max(state.paused_until, state.next_start) - now
+                saturated = saturated or state.in_flight >= state.slots
+                if wait <= 0 and state.in_flight < state.slots:
+                    break
+                state.condition.wait(timeout=wait if wait > 0 else None)
+            state.in_flight += 1
+            state.next_start = now + state.interval
+        return state, now, saturated
+
+    def release(self, token, status=None, headers=None, error=None, retries=()):
+        """Libère la place et transmet l'issue de la requête (statut ou type d'erreur).
+
+        `retries` : historique des tentatives refaites par urllib3
+        (response.raw.retries.history) ; chaque 5xx ou erreur réseau retenté
+        est un signal de congestion, jugé avant la réponse finale.
+        """
+        state, started, saturated = token
+        with state.condition:
+            state.in_flight -= 1
+            latency = time.monotonic() - started
+            for retried in retries:
+                if retried.status in ERROR_STATUS:
+                    state.observe(started, latency, retried.status)
+                elif retried.error is not None:
+                    state.observe(started, latency, error="erreur réseau")
+            if status is not None or error is not None:  # sinon : requête abandonnée, rien à juger
+                state.observe(started, latency, status, headers, error, saturated)
+            state.condition.notify_all()
+
+    def log_stats(self, log=logging.info):
+        """Limite atteinte, hausses et baisses (par motif), par hôte."""
+        with self.lock:
+            hosts = list(self.hosts.values())
+        for state in sorted(hosts, key=lambda s: s.host):
+            with state.condition:
+                baisses = ", ".join(f"{motif} x{n}" for motif, n in sorted(state.stats["baisses"].items()))
+                log(f"{state.host} : {state.stats['requetes']} requêtes, concurrence finale "
+                    f"{state.slots} (max {state.stats['limite_max']:.0f}/{state.ceiling}), "
+                    f"{state.stats['hausses']} hausses, baisses : {baisses or 'aucune'}")
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def default_limiter():
+    """Contrôleur partagé du processus (créé au premier appel)."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = HostLimiter()
+    return _default_limiter
+
+
+def log_stats(log=logging.info):
+    default_limiter().log_stats(log)
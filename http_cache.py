@@ -0,0 +1,177 @@
+"""
+Cache disque des réponses HTTP, partagé par les fonctions de téléchargement.
+- une entrée par URL, adressée par le hash SHA-256 de l'URL
+- durée de validité (TTL) par site, puis revalidation conditionnelle
+  (If-None-Match / If-Modified-Since) : un 304 réutilise le corps stocké
+- éviction LRU (entrées les moins récemment lues) au-delà d'un budget disque
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# ================== CONFIGURATION ==================
+CACHE_DIR = os.path.join("cache", "http")
+MAX_BYTES = 500 * 1024 * 1024  # Budget disque (500 Mo)
+DEFAULT_TTL = 24 * 3600  # Validité par défaut d'une page (secondes)
+SITE_TTL = {
+    "voursa.com": 24 * 3600,
+    "untoitenrim.com": 24 * 3600,
+    "lagence-mr.com": 12 * 3600,
+    "wassit.info": 12 * 3600,
+}
+
+
+class ResponseCache:
+    """Cache disque : `<clé>.body` (corps brut) + `<clé>.json` (métadonnées)."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, site_ttl=None, default_ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.site_ttl = SITE_TTL if site_ttl is None else site_ttl
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    # -------------------- chemins --------------------
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def _entries(self):
+        """Parcourt le cache : (chemin méta, taille, dernier accès)."""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    meta_path = os.path.join(root, name)
+                    body_path = meta_path[:-5] + ".body"
+                    try:
+                        size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+                        yield meta_path, size, os.path.getmtime(meta_path)
+                    except OSError:
+                        continue
+
+    def ttl_for(self, url):
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return self.site_ttl.get(host, self.default_ttl)
+
+    # -------------------- lecture --------------------
+    def lookup(self, url):
+        """Renvoie les métadonnées de l'URL (ou None si absente du cache)."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path) or meta.get("url") != url:
+            return None
+        return meta
+
+    def is_fresh(self, meta, ttl=None):
+        ttl = self.ttl_for(meta["url"]) if ttl is None else ttl
+        return time.time() - meta["stored_at"] < ttl
+
+    def load(self, meta):
+        """Lit le corps stocké et marque l'entrée comme récemment utilisée."""
+        meta_path, body_path = self._paths(meta["url"])
+        with open(body_path, "rb") as f:
+            body = f.read()
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return body
+
+    def validators(self, meta):
+        """En-têtes de requête conditionnelle pour revalider une entrée expirée."""
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    # -------------------- écriture --------------------
+    def store(self, url, body, headers, encoding=None):
+        """Enregistre (ou remplace) la réponse 200 d'une URL."""
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        old_size = 0
+        if os.path.exists(meta_path) and os.path.exists(body_path):
+            old_size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+        meta = {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "encoding": encoding,
+            "headers": {k: v for k, v in headers.items()
+                        if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")},
+        }
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        with self.lock:
+            self.total_bytes += os.path.getsize(meta_path) + len(body) - old_size
+            over_budget = self.total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def refresh(self, meta):
+        """Après un 304 : la page n'a pas changé, on repart pour un TTL complet."""
+        meta_path, _ = self._paths(meta["url"])
+        meta["stored_at"] = time.time()
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Supprime les entrées les moins récemment lues jusqu'à 90 % du budget."""
+        with self.lock:
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            removed = 0
+            for meta_path, size, _ in entries:
+                if total <= target:
+                    break
+                for path in (meta_path, meta_path[:-5] + ".body"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+            self.total_bytes = total
+        if removed:
+            logging.info(f"Cache HTTP : {removed} entrée(s) évincée(s), {total / 1e6:.1f} Mo utilisés")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Cache partagé du processus (créé au premier appel)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+    return _default_cache
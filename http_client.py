@@ -0,0 +1,183 @@
+"""
+Client HTTP partagé par tous les scrapers basés sur requests.
+- un pool de connexions par hôte, réutilisées (keep-alive) entre les pages
+- négociation gzip/deflate (et brotli si le module est installé)
+- une politique commune de nouvelles tentatives avec backoff exponentiel
+- statistiques de réutilisation des connexions par hôte
+- cache disque transparent (voir http_cache) : un hit évite réseau et délai
+- concurrence et délai de politesse adaptés par hôte (voir host_limiter)
+- latence, retries et hits du cache comptés par hôte (voir instrumentation)
+- chaque réponse servie est archivée (WARC) et peut être rejouée hors ligne
+  (voir page_archive)
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+import http_cache
+import host_limiter
+import instrumentation
+import page_archive
+
+try:
+    import brotli  # noqa: F401  (requests/urllib3 décompressent "br" s'il est présent)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# ================== CONFIGURATION ==================
+TIMEOUT = 30  # Délai maximal d'une requête (secondes)
+CACHE_ENABLED = True  # Consulter le cache disque avant le réseau
+POOL_CONNECTIONS = 20  # Nombre d'hôtes gardés en pool
+POOL_MAXSIZE = 16  # Connexions gardées ouvertes par hôte
+# 429 et 503 (limitation de débit) ne sont pas retentés par urllib3 : get() les
+# rend au contrôleur AIMD (baisse immédiate, Retry-After) puis retente lui-même,
+# sans garder de place en vol pendant la pause
+THROTTLE_STATUS = (429, 503)
+THROTTLE_RETRIES = 3  # Nouvelles tentatives après un 429/503
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=1,  # 1s, 2s, 4s entre les tentatives
+    status_forcelist=(500, 502, 504),
+    allowed_methods=("GET", "HEAD"),
+    respect_retry_after_header=False,  # sinon urllib3 retente lui-même les 429/503 avec Retry-After
+    raise_on_status=False,  # on rend la dernière réponse, l'appelant teste status_code
+)
+
+# Un seul adaptateur (donc un seul jeu de pools) partagé par toutes les sessions
+_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                       max_retries=RETRY_POLICY)
+_local = threading.local()
+
+
+def get_session():
+    """Renvoie la session du thread courant (les pools de connexions sont partagés)."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("http://", _adapter)
+        session.mount("https://", _adapter)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        _local.session = session
+    return session
+
+
+def get(url, headers=None, timeout=TIMEOUT, delay=0, ttl=None, cache=None, **kwargs):
+    """GET via le client partagé (même signature que requests.get).
+
+    - `delay` : pause de politesse de départ, faite seulement si on part sur le
+      réseau ; le contrôleur AIMD de l'hôte la réduit tant que l'hôte répond vite
+      et sans erreur, et la rallonge sur 429/5xx, timeout ou latence en hausse
+    - `ttl` : durée de validité du cache pour cette URL (None = TTL du site,
+      0 = toujours revalider, ce qui coûte au plus un 304)
+    - `cache` : False pour ignorer le cache (None = CACHE_ENABLED)
+    La réponse porte un attribut `from_cache` (True si le réseau a été évité
+    ou si le serveur a répondu 304). En mode rejeu, la réponse vient de
+    l'archive (ConnectionError si l'URL n'y est pas).
+    """
+    replay = page_archive.replay_store()
+    if replay is not None:
+        return replay.response(url)
+    use_cache = CACHE_ENABLED if cache is None else cache
+    store = http_cache.default_cache() if use_cache else None
+    meta = store.lookup(url) if store else None
+    host = host_limiter.host_of(url)
+    if meta and store.is_fresh(meta, ttl):
+        store.hits += 1
+        instrumentation.count(host, "cache_hits")
+        return _archived(url, _cached_response(url, meta, store.load(meta)))
+
+    request_headers = dict(headers or {})
+    if meta:
+        request_headers.update(store.validators(meta))
+    limiter = host_limiter.default_limiter()
+    for tentative in range(THROTTLE_RETRIES + 1):
+        token = limiter.acquire(url, delay)  # attend aussi la fin d'un Retry-After
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=request_headers, timeout=timeout, **kwargs)
+        except requests.exceptions.Timeout:
+            limiter.release(token, error="timeout")
+            raise
+        except requests.exceptions.ConnectionError:
+            limiter.release(token, error="erreur réseau")
+            raise
+        except BaseException:
+            limiter.release(token)
+            raise
+        # Les 5xx retentés par urllib3 comptent aussi comme signaux de congestion
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        limiter.release(token, response.status_code, response.headers, retries=retries)
+        # Durée de la requête, backoff des nouvelles tentatives compris (hors attente du contrôleur)
+        instrumentation.observe(host, "requete", time.perf_counter() - start)
+        instrumentation.count(host, "requetes")
+        if retries:
+            instrumentation.count(host, "retries", len(retries))
+        if response.status_code not in THROTTLE_STATUS or tentative == THROTTLE_RETRIES:
+            break
+        instrumentation.count(host, "retries")
+        logging.info(f"HTTP {response.status_code} pour {url} : nouvelle tentative {tentative + 1}/{THROTTLE_RETRIES}")
+
+    if meta and response.status_code == 304:
+        store.revalidated += 1
+        instrumentation.count(host, "cache_hits")
+        store.refresh(meta)
+        return _archived(url, _cached_response(url, meta, store.load(meta)))
+    response.from_cache = False
+    if store and response.status_code == 200:
+        store.misses += 1
+        store.store(url, response.content, response.headers, response.encoding)
+    return _archived(url, response)
+
+
+def _archived(url, response):
+    """Archive la réponse servie (voir page_archive) et la renvoie."""
+    page_archive.record_response(url, response)
+    return response
+
+
+def _cached_response(url, meta, body):
+    """Reconstruit un objet Response à partir d'une entrée du cache."""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    response.encoding = meta.get("encoding")
+    response.url = url
+    response.from_cache = True
+    return response
+
+
+def connection_stats():
+    """Statistiques par hôte : connexions ouvertes, requêtes, handshakes évités."""
+    stats = {}
+    pools = _adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        host = f"{pool.scheme}://{pool.host}"
+        entry = stats.setdefault(host, {"connexions": 0, "requetes": 0, "handshakes_evites": 0})
+        entry["connexions"] += pool.num_connections
+        entry["requetes"] += pool.num_requests
+        entry["handshakes_evites"] = max(0, entry["requetes"] - entry["connexions"])
+    return stats
+
+
+def log_connection_stats(log=logging.info):
+    """Affiche les statistiques de réutilisation (logging par défaut, ou `print`)."""
+    for host, entry in connection_stats().items():
+        log(f"{host} : {entry['requetes']} requêtes sur {entry['connexions']} "
+            f"connexion(s), {entry['handshakes_evites']} handshakes évités")
+    if CACHE_ENABLED:
+        store = http_cache.default_cache()
+        log(f"Cache HTTP : {store.hits} hits, {store.revalidated} revalidés (304), "
+            f"{store.misses} téléchargés")
+    host_limiter.log_stats(log)
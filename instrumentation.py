@@ -0,0 +1,237 @@
+"""
+Mesures par étape et par site pour chaque exécution des scrapers.
+- étapes chronométrées : fetch (attente de chaque page, politesse et rendu
+  Selenium compris), requete (chaque GET réseau, voir http_client), parse
+  (construction de l'arbre BeautifulSoup), extract (traitement d'une carte),
+  write (écriture CSV)
+- compteurs : pages, octets, requêtes, retries, hits du cache, cartes,
+  annonces, erreurs
+- un résumé JSON par exécution (pages/s, octets, p50/p95/p99 par étape,
+  retries, rendement du parse) écrit dans etat/runs/
+- un rapport de progression limité à une ligne toutes les PROGRESS_INTERVAL
+  secondes par site, à la place d'un print par annonce
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ================== CONFIGURATION ==================
+PROGRESS_INTERVAL = 2.0  # Une ligne de progression au plus toutes les N secondes, par site
+RUNS_DIR = os.path.join("etat", "runs")  # Résumés JSON des exécutions
+PERCENTILES = (50, 95, 99)
+
+_sites = {}
+_progress = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# ================== COLLECTE ==================
+class SiteMetrics:
+    """Durées par étape et compteurs d'un site."""
+
+    def __init__(self, site):
+        self.site = site
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+
+
+def metrics(site):
+    with _lock:
+        if site not in _sites:
+            _sites[site] = SiteMetrics(site)
+        return _sites[site]
+
+
+def observe(site, stage, seconds):
+    """Enregistre une durée pour l'étape `stage` du site."""
+    entry = metrics(site)
+    with _lock:
+        entry.stages.setdefault(stage, []).append(seconds)
+
+
+def count(site, name, n=1):
+    """Incrémente le compteur `name` du site."""
+    entry = metrics(site)
+    with _lock:
+        entry.counters[name] = entry.counters.get(name, 0) + n
+
+
+def _nested():
+    return getattr(_local, "nested", 0.0)
+
+
+@contextmanager
+def timer(site, stage):
+    """`with instrumentation.timer(SOURCE, "write"): ...` chronomètre un bloc."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        # Temps déjà compté ici : exclu de la boucle each() englobante
+        _local.nested = _nested() + elapsed
+        observe(site, stage, elapsed)
+
+
+def each(site, stage, items, counter="cartes"):
+    """Itère sur `items` en chronométrant le corps de la boucle pour chaque élément.
+
+    `for carte in instrumentation.each(SOURCE, "extract", cartes):` : la durée
+    d'un tour (hors blocs timer() imbriqués, ex. un fetch de détail) va dans
+    `stage`, et chaque élément incrémente `counter`.
+    """
+    n = 0
+    try:
+        for item in items:
+            n += 1
+            start, nested = time.perf_counter(), _nested()
+            yield item
+            observe(site, stage, time.perf_counter() - start - (_nested() - nested))
+    finally:
+        count(site, counter, n)
+
+
+def pages(site, fetched):
+    """Enveloppe un générateur fetch() : chronomètre l'attente de chaque page, compte pages et octets."""
+    iterator = iter(fetched)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                key, content = next(iterator)
+            except StopIteration:
+                return
+            observe(site, "fetch", time.perf_counter() - start)
+            count(site, "pages")
+            count(site, "octets", len(content) if isinstance(content, (bytes, str)) else 0)
+            yield key, content
+    finally:
+        # Arrêt anticipé : on ferme aussi fetch() (et donc le navigateur)
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+
+
+# ================== PROGRESSION ==================
+class Progress:
+    """Compteur affiché au plus une fois toutes les `interval` secondes.
+
+    Chaque update() compte aussi `n` dans le compteur `unit` du site
+    (ex. "annonces", utilisé pour le rendement du parse).
+    """
+
+    def __init__(self, site, unit="annonces", interval=PROGRESS_INTERVAL, log=print):
+        self.site = site
+        self.unit = unit
+        self.interval = interval
+        self.log = log
+        self.done = 0
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.lock = threading.Lock()
+
+    def update(self, n=1, message=None):
+        count(self.site, self.unit, n)
+        with self.lock:
+            self.done += n
+            now = time.perf_counter()
+            if now - self.last < self.interval:
+                return
+            self.last = now
+            done, rate = self.done, self.done / (now - self.started)
+        suffix = f" - dernier : {message}" if message else ""
+        self.log(f"  ⏳ [{self.site}] {done} {self.unit} ({rate:.1f}/s){suffix}")
+
+
+def progress(site, unit="annonces"):
+    """Rapport de progression partagé du site (créé au premier appel)."""
+    with _lock:
+        if site not in _progress:
+            _progress[site] = Progress(site, unit, interval=PROGRESS_INTERVAL)
+        return _progress[site]
+
+
+# ================== RÉSUMÉ ==================
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def _stage_summary(durations):
+    resume = {"n": len(durations), "total_s": round(sum(durations), 4)}
+    for p in PERCENTILES:
+        resume[f"p{p}_ms"] = round(percentile(durations, p) * 1000, 2)
+    return resume
+
+
+def summary():
+    """{site: statistiques} de l'exécution en cours (sérialisable en JSON)."""
+    now = time.perf_counter()
+    with _lock:
+        sites = {site: (entry.started, dict(entry.counters),
+                        {stage: list(durations) for stage, durations in entry.stages.items()})
+                 for site, entry in _sites.items()}
+    resume = {}
+    for site, (started, counters, stages) in sorted(sites.items()):
+        duree = now - started
+        nb_pages = counters.get("pages", 0)
+        cartes = counters.get("cartes", 0)
+        annonces = counters.get("annonces", 0)
+        resume[site] = {
+            "duree_s": round(duree, 2),
+            "pages": nb_pages,
+            "pages_par_s": round(nb_pages / duree, 3) if duree > 0 else 0.0,
+            "octets": counters.get("octets", 0),
+            "requetes": counters.get("requetes", 0),
+            "retries": counters.get("retries", 0),
+            "cache_hits": counters.get("cache_hits", 0),
+            "cartes": cartes,
+            "annonces": annonces,
+            "erreurs": counters.get("erreurs", 0),
+            # Rendement du parse : annonces gardées par carte analysée
+            "rendement_parse": round(annonces / cartes, 3) if cartes else None,
+            "etapes": {stage: _stage_summary(durations) for stage, durations in sorted(stages.items()) if durations},
+        }
+    return resume
+
+
+def write_summary(name="run", directory=RUNS_DIR):
+    """Écrit le résumé JSON de l'exécution ; renvoie son chemin."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"date": datetime.now().isoformat(timespec="seconds"), "sites": summary()},
+                  f, ensure_ascii=False, indent=2)
+    return path
+
+
+def log_summary(log=logging.info):
+    """Une ligne par site : débit, volume, latences du fetch, rendement du parse."""
+    for site, entry in summary().items():
+        fetch = entry["etapes"].get("fetch") or entry["etapes"].get("requete")
+        latences = (f", fetch p50/p95/p99 {fetch['p50_ms']:.0f}/{fetch['p95_ms']:.0f}/{fetch['p99_ms']:.0f} ms"
+                    if fetch else "")
+        rendement = f", rendement {entry['rendement_parse']:.0%}" if entry["rendement_parse"] is not None else ""
+        log(f"{site} : {entry['pages']} pages ({entry['pages_par_s']:.2f}/s), "
+            f"{entry['octets'] / 1e6:.1f} Mo, {entry['retries']} retries, "
+            f"{entry['annonces']} annonces{rendement}{latences}")
+        temps = ", ".join(f"{stage} {stats['total_s']:.2f}s" for stage, stats in entry["etapes"].items())
+        if temps:
+            log(f"{site} : temps par étape : {temps}")
+
+
+def report(name="run", log=print):
+    """Fin d'exécution : résumé lisible + fichier JSON."""
+    log_summary(log)
+    path = write_summary(name)
+    log(f"Résumé JSON : {path}")
+    return path
@@ -0,0 +1,83 @@
+"""
+Recherche simultanée d'une liste de mots-clés (caractéristiques, quartiers)
+dans un texte, en une seule passe d'expression régulière combinée.
+Le résultat est identique à la boucle `for kw in liste: if kw in texte`
+(recherche de sous-chaînes, ordre de la liste conservé), mais le texte n'est
+mis en minuscules qu'une fois et parcouru une seule fois.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import re
+
+
+class KeywordMatcher:
+    """Automate construit une fois (à l'import) pour une liste de mots-clés.
+
+    - `ignore_case` : comparaison sur le texte en minuscules (comme `kw.lower() in texte.lower()`)
+    - `whole_words` : n'accepter que des mots entiers (frontières de mots)
+    """
+
+    def __init__(self, keywords, ignore_case=True, whole_words=False):
+        self.keywords = list(dict.fromkeys(keywords))  # doublons retirés, ordre conservé
+        self.ignore_case = ignore_case
+        self.whole_words = whole_words
+        normalized = [self._normalize(kw) for kw in self.keywords]
+        self._index = {}
+        for i, kw in enumerate(normalized):
+            self._index.setdefault(kw, []).append(i)
+
+        alternatives = "|".join(re.escape(kw) for kw in sorted(self._index, key=len, reverse=True))
+        if whole_words:
+            alternatives = rf"(?<!\w)(?:{alternatives})(?!\w)"
+        # Balayage sans chevauchement (rapide) + version "lookahead" pour les
+        # rares positions où un mot-clé peut commencer à l'intérieur d'un autre
+        self._scan = re.compile(alternatives)
+        self._probe = re.compile(f"(?=({alternatives}))")
+
+        self._contained = {}
+        self._risky_offsets = {}
+        for long_kw in self._index:
+            # Mots-clés entièrement contenus dans `long_kw` : trouvés avec lui
+            self._contained[long_kw] = [
+                i for kw, indexes in self._index.items()
+                if self._contains(long_kw, kw)
+                for i in indexes
+            ]
+            # Décalages où un autre mot-clé commence dans `long_kw` et déborde après
+            self._risky_offsets[long_kw] = [
+                offset for offset in range(1, len(long_kw))
+                if any(len(kw) > len(long_kw) - offset and kw.startswith(long_kw[offset:])
+                       for kw in self._index)
+            ]
+
+    def _normalize(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def _contains(self, text, kw):
+        if self.whole_words:
+            return re.search(rf"(?<!\w){re.escape(kw)}(?!\w)", text) is not None
+        return kw in text
+
+    def _matched_indexes(self, text):
+        """Indices (dans self.keywords) de tous les mots-clés présents."""
+        if not text:
+            return set()
+        text = self._normalize(text)
+        found = set()
+        for match in self._scan.finditer(text):
+            kw = match.group()
+            found.update(self._contained[kw])
+            for offset in self._risky_offsets[kw]:
+                probe = self._probe.match(text, match.start() + offset)
+                if probe:
+                    found.update(self._contained[probe.group(1)])
+        return found
+
+    def find_all(self, text):
+        """Tous les mots-clés présents dans le texte, dans l'ordre de la liste."""
+        return [self.keywords[i] for i in sorted(self._matched_indexes(text))]
+
+    def first(self, text):
+        """Premier mot-clé de la liste présent dans le texte (ou None)."""
+        found = self._matched_indexes(text)
+        return self.keywords[min(found)] if found else None
@@ -0,0 +1,92 @@
+"""
+Type d'enregistrement commun à tous les scrapers : une annonce = un Listing.
+- `__slots__` (dataclass slots=True) : pas de dictionnaire par annonce
+- champs optionnels typés ; "Non spécifié", "Non spécifiée" et "" -> None
+- conversion par lots directement en colonnes (listings_vers_colonnes),
+  sans passer par une liste de dictionnaires dont pandas devine le schéma
+
+Les valeurs numériques lues dans le HTML restent du texte brut ("120 m²",
+"6 000 000 MRO") : normalisation.py les convertit en bloc après coup.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import List, Optional, Union
+
+import pandas as pd
+
+SENTINELLES = frozenset({"Non spécifié", "Non spécifiée", "Non specifie", ""})
+
+# Nombre déjà converti (JSON voursa) ou texte brut à normaliser
+Nombre = Optional[Union[int, float, str]]
+
+
+@dataclass(slots=True)
+class Listing:
+    source: str
+    url: Optional[str] = None
+    id_unique: Optional[str] = None
+    titre: Optional[str] = None
+    prix: Nombre = None
+    type_bien: Optional[str] = None
+    type_annonce: Optional[str] = None
+    quartier: Optional[str] = None
+    ville: Optional[str] = None
+    surface_m2: Nombre = None
+    nb_chambres: Nombre = None
+    nb_salons: Nombre = None
+    nb_sdb: Nombre = None
+    nb_pieces_total: Nombre = None
+    meuble: Optional[str] = None
+    description: Optional[str] = None
+    caracteristiques: Optional[Union[List[str], str]] = None
+    point_repere: Optional[str] = None
+    vendeur: Optional[str] = None
+    telephone: Optional[str] = None
+    whatsapp: Optional[str] = None
+    date_publication: Optional[str] = None
+    nb_vues: Nombre = None
+    nb_images: Nombre = None
+    image_url: Optional[str] = None
+    page: Optional[int] = None
+    date_scraping: Optional[str] = None
+
+    def __post_init__(self):
+        for champ in CHAMPS:
+            valeur = getattr(self, champ)
+            if isinstance(valeur, str) and valeur.strip() in SENTINELLES:
+                setattr(self, champ, None)
+
+    def to_dict(self, colonnes=None):
+        """Dictionnaire (pour un CsvRecordSink, la frontière de crawl, un JSON...)."""
+        return {champ: getattr(self, champ) for champ in (colonnes or CHAMPS)}
+
+    def __getitem__(self, champ):
+        # Compatibilité avec le code qui lisait les dictionnaires : annonce['titre']
+        return getattr(self, champ)
+
+
+CHAMPS = tuple(champ.name for champ in fields(Listing))
+
+
+# ================== CONVERSION PAR LOTS ==================
+def listings_vers_colonnes(listings, colonnes=None):
+    """Liste de Listing -> {colonne: liste de valeurs}.
+
+    Sans `colonnes`, on garde les champs renseignés au moins une fois,
+    dans l'ordre de la classe.
+    """
+    listings = list(listings)
+    resultat = {}
+    for colonne in colonnes or CHAMPS:
+        valeurs = list(map(attrgetter(colonne), listings))
+        if colonnes or any(v is not None for v in valeurs):
+            resultat[colonne] = valeurs
+    return resultat
+
+
+def listings_vers_dataframe(listings, colonnes=None):
+    """DataFrame construit colonne par colonne (pas d'inférence ligne à ligne)."""
+    donnees = listings_vers_colonnes(listings, colonnes)
+    return pd.DataFrame(donnees, columns=list(donnees) if colonnes is None else colonnes)
@@ -0,0 +1,132 @@
+"""
+Empreintes des cartes d'annonces (SQLite) pour ne télécharger les pages de
+détail que des annonces nouvelles ou modifiées.
+- une entrée par (source, id_unique) : empreinte SHA-1 des champs visibles
+  sur la carte de la page de liste (titre, prix, statut, aperçu...) et champs
+  extraits de la page de détail lors du dernier téléchargement
+- carte inchangée : les champs de détail stockés sont réutilisés, sans
+  requête ni pause de politesse
+- carte nouvelle ou modifiée : le scraper télécharge le détail puis
+  enregistre la nouvelle empreinte
+Un recrawl quotidien ne coûte plus qu'environ une requête par nouvelle annonce.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import page_archive
+
+# ================== CONFIGURATION ==================
+FINGERPRINTS_ENABLED = True  # Réutiliser les détails des cartes inchangées
+FINGERPRINTS_DB = os.path.join("etat", "empreintes.sqlite")
+
+
+def fingerprint(*champs):
+    """Empreinte stable des champs d'une carte (None et "" sont équivalents)."""
+    texte = "\x1f".join("" if champ is None else str(champ).strip() for champ in champs)
+    return hashlib.sha1(texte.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Empreintes et détails par (source, id_unique), utilisable depuis plusieurs threads."""
+
+    def __init__(self, path=FINGERPRINTS_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS empreintes (
+                    source TEXT NOT NULL,
+                    id_unique TEXT NOT NULL,
+                    empreinte TEXT NOT NULL,
+                    details TEXT NOT NULL,
+                    updated_at REAL,
+                    PRIMARY KEY (source, id_unique)
+                )
+            """)
+        self.stats = {}  # source -> {"reutilises": n, "telecharges": n}
+
+    def _count(self, source, name):
+        with self.lock:
+            compteurs = self.stats.setdefault(source, {"reutilises": 0, "telecharges": 0})
+            compteurs[name] += 1
+
+    def details(self, source, id_unique, empreinte):
+        """Détails stockés si la carte n'a pas changé, None s'il faut télécharger le détail."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT empreinte, details FROM empreintes WHERE source = ? AND id_unique = ?",
+                (source, str(id_unique)),
+            ).fetchone()
+        if row is None or row[0] != empreinte:
+            self._count(source, "telecharges")
+            return None
+        self._count(source, "reutilises")
+        return json.loads(row[1])
+
+    def store(self, source, id_unique, empreinte, details):
+        """Enregistre l'empreinte de la carte et les détails qui viennent d'être extraits."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO empreintes (source, id_unique, empreinte, details, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source, str(id_unique), empreinte, json.dumps(details, ensure_ascii=False), time.time()),
+            )
+
+    def log_stats(self, log=print):
+        with self.lock:
+            stats = {source: dict(compteurs) for source, compteurs in self.stats.items()}
+        for source, compteurs in sorted(stats.items()):
+            log(f"{source} : {compteurs['telecharges']} détails téléchargés (cartes nouvelles ou modifiées), "
+                f"{compteurs['reutilises']} réutilisés (cartes inchangées)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """Magasin d'empreintes partagé du processus (créé au premier appel)."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = FingerprintStore()
+    return _default_store
+
+
+def cached_details(source, id_unique, empreinte, telecharger):
+    """Détails d'une annonce : stockés si sa carte est inchangée, sinon `telecharger()`.
+
+    `telecharger()` renvoie un dictionnaire ; vide = échec, rien n'est stocké
+    et l'annonce sera retentée au prochain passage. Sans FINGERPRINTS_ENABLED,
+    sans identifiant ou en rejeu (le détail doit venir de l'archive), le détail
+    est toujours téléchargé.
+    """
+    if not FINGERPRINTS_ENABLED or not id_unique or page_archive.replay_store() is not None:
+        return telecharger()
+    store = default_store()
+    details = store.details(source, id_unique, empreinte)
+    if details is not None:
+        return details
+    details = telecharger()
+    if details:
+        store.store(source, id_unique, empreinte, details)
+    return details
+
+
+def log_stats(log=print):
+    if _default_store is not None:
+        _default_store.log_stats(log)
@@ -1,196 +1,216 @@
 import pandas as pd
 import os
-import numpy as np
 import csv
-
-print("="*60)
-print("🔄 FUSION ROBUSTE - SOURCE EN PREMIÈRE COLONNE")
-print("="*60)
+import sys
+import shutil
+import argparse
+from collections import Counter
+from contextlib import ExitStack
+from gazetteer import gazetteer, NON_SPECIFIE
+from normalisation import normaliser_dataset
+from stockage import COLONNES_LIGHT, PARQUET_DIR, ecrire_parquet, parquet_disponible, taille_disque
 
 # Chemins des fichiers
 fichier_voursa = 'data_raw/voursa_raw.csv'
 fichier_final = 'data_raw/final_data_raw.csv'
 fichier_sortie = 'data_raw/dataset_complet.csv'
+fichier_light = 'data_raw/dataset_light.csv'
 
-# Vérifier que les fichiers existent
-if not os.path.exists(fichier_voursa):
-    print(f"❌ Fichier voursa non trouvé: {fichier_voursa}")
-    exit()
-
-if not os.path.exists(fichier_final):
-    print(f"❌ Fichier final non trouvé: {fichier_final}")
-    exit()
-
-print("📂 Chargement du fichier voursa...")
-df_voursa = pd.read_csv(fichier_voursa)
-print(f"✅ Voursa: {len(df_voursa)} lignes")
-
-# ============================================
-# CHARGEMENT ROBUSTE DU FICHIER FINAL
-# ============================================
-print("\n🔧 Chargement du fichier final avec gestion des erreurs...")
-
-# Lire le fichier ligne par ligne avec le module csv
-lignes_valides = []
-en_tete = None
-lignes_ignorees = 0
-
-with open(fichier_final, 'r', encoding='utf-8') as f:
-    reader = csv.reader(f, quotechar='"', delimiter=',', quoting=csv.QUOTE_ALL)
-    
-    for i, ligne in enumerate(reader):
-        if i == 0:
-            en_tete = ligne
-            lignes_valides.append(ligne)
-            print(f"📋 En-tête ({len(ligne)} champs): {ligne}")
-        else:
-            if len(ligne) == len(en_tete):
-                lignes_valides.append(ligne)
-            else:
-                lignes_ignorees += 1
-                print(f"⚠️ Ligne {i+1} ignorée: {len(ligne)} champs au lieu de {len(en_tete)}")
-                print(f"   Début: {str(ligne)[:100]}...")
-
-print(f"\n📊 Statistiques de chargement:")
-print(f"   - Lignes valides: {len(lignes_valides)}")
-print(f"   - Lignes ignorées: {lignes_ignorees}")
-
-# Créer un DataFrame à partir des lignes valides
-if len(lignes_valides) > 1:  # Au moins l'en-tête + 1 ligne
-    # Convertir en DataFrame
-    df_final = pd.DataFrame(lignes_valides[1:], columns=lignes_valides[0])
-    print(f"✅ Final chargé: {len(df_final)} lignes")
-else:
-    print("❌ Aucune ligne valide dans le fichier final")
-    exit()
-
-# ============================================
-# ALIGNEMENT DES COLONNES
-# ============================================
-print("\n🔄 Analyse des colonnes...")
-
-colonnes_voursa = list(df_voursa.columns)
-colonnes_final = list(df_final.columns)
-
-print(f"\n📋 Colonnes Voursa ({len(colonnes_voursa)}):")
-for col in colonnes_voursa:
-    print(f"   - {col}")
-
-print(f"\n📋 Colonnes Final ({len(colonnes_final)}):")
-for col in colonnes_final:
-    print(f"   - {col}")
-
-# Créer la liste de toutes les colonnes
-toutes_colonnes = list(set(colonnes_voursa + colonnes_final))
-print(f"\n📋 Total colonnes avant réorganisation: {len(toutes_colonnes)}")
-
-# ============================================
-# RÉORGANISATION - METTRE 'source' EN PREMIER
-# ============================================
-print("\n🔄 Réorganisation des colonnes...")
-
-# S'assurer que 'source' est dans la liste
-if 'source' not in toutes_colonnes:
-    toutes_colonnes.append('source')
-
-# Mettre 'source' en premier, puis toutes les autres colonnes triées
-autres_colonnes = [col for col in toutes_colonnes if col != 'source']
-autres_colonnes.sort()  # Tri alphabétique pour le reste
-colonnes_ordonnees = ['source'] + autres_colonnes
-
-print(f"\n📋 Ordre des colonnes:")
-for i, col in enumerate(colonnes_ordonnees):
-    print(f"   {i+1:2}. {col}")
-
-# ============================================
-# PRÉPARATION DES DATAFRAMES
-# ============================================
-print("\n🔄 Alignement des colonnes...")
-
-# Préparer df_voursa avec toutes les colonnes dans le bon ordre
-df_voursa_prepare = pd.DataFrame()
-for col in colonnes_ordonnees:
-    if col in df_voursa.columns:
-        df_voursa_prepare[col] = df_voursa[col]
-    else:
-        df_voursa_prepare[col] = np.nan
-
-# S'assurer que source est 'voursa.com' pour ces lignes
-df_voursa_prepare['source'] = 'voursa.com'
-
-# Préparer df_final avec toutes les colonnes dans le bon ordre
-df_final_prepare = pd.DataFrame()
-for col in colonnes_ordonnees:
-    if col in df_final.columns:
-        df_final_prepare[col] = df_final[col]
-    else:
-        df_final_prepare[col] = np.nan
-
-# ============================================
-# FUSION
-# ============================================
-print("\n🔄 Fusion des DataFrames...")
+# Les fichiers sont lus par blocs de TAILLE_BLOC lignes : la mémoire reste
+# bornée quelle que soit la taille des entrées
+TAILLE_BLOC = 50_000
 
-df_fusion = pd.concat([df_final_prepare, df_voursa_prepare], ignore_index=True)
+# Colonne qui reçoit les champs en trop d'une ligne mal formée (virgules non
+# protégées dans un texte libre) ; à défaut, la dernière colonne
+COLONNES_TEXTE = ['description', 'titre']
 
-print(f"\n📊 STATISTIQUES APRÈS FUSION:")
-print(f"   - Total lignes: {len(df_fusion)}")
-print(f"   - Total colonnes: {len(df_fusion.columns)}")
-print(f"   - Première colonne: {df_fusion.columns[0]}")
 
 # ============================================
-# STATISTIQUES PAR SOURCE
-# ============================================
-print(f"\n📊 RÉPARTITION PAR SOURCE:")
-if 'source' in df_fusion.columns:
-    sources = df_fusion['source'].value_counts()
-    for source, count in sources.items():
+# LECTURE PAR BLOCS
+# ============================================
+def lire_en_tete(chemin):
+    """Première ligne du CSV (sans lire le reste du fichier)"""
+    with open(chemin, 'r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f))
+
+
+def reparateur(en_tete, compteur):
+    """Renvoie la fonction appelée par pandas pour chaque ligne trop longue.
+
+    Les champs en trop sont recollés (avec la virgule perdue) dans la colonne
+    de texte libre au lieu de jeter la ligne.
+    """
+    nb_colonnes = len(en_tete)
+    colonne = next((c for c in COLONNES_TEXTE if c in en_tete), en_tete[-1])
+    position = en_tete.index(colonne)
+
+    def reparer(champs):
+        excedent = len(champs) - nb_colonnes
+        if excedent <= 0:
+            compteur['ignorees'] += 1
+            return None
+        compteur['reparees'] += 1
+        fusion = ','.join(champs[position:position + excedent + 1])
+        return champs[:position] + [fusion] + champs[position + excedent + 1:]
+
+    return reparer
+
+
+def lire_par_blocs(chemin, taille_bloc, compteur):
+    """Itère sur le CSV par blocs de chaînes (aucune inférence de type)"""
+    en_tete = lire_en_tete(chemin)
+    return pd.read_csv(
+        chemin, dtype=str, keep_default_na=False, na_values=[''], encoding='utf-8-sig',
+        chunksize=taille_bloc, engine='python', on_bad_lines=reparateur(en_tete, compteur),
+    )
+
+
+def schema_union(en_tetes):
+    """'source' en premier, puis toutes les autres colonnes triées"""
+    toutes = set()
+    for en_tete in en_tetes:
+        toutes.update(en_tete)
+    toutes.discard('source')
+    return ['source'] + sorted(toutes)
+
+
+# ============================================
+# TRAITEMENT D'UN BLOC
+# ============================================
+def preparer_bloc(bloc, colonnes, source=None):
+    """Aligne un bloc sur le schéma commun puis ajoute les colonnes dérivées"""
+    # Une seule réindexation (pas de copie colonne par colonne)
+    bloc = bloc.reindex(columns=colonnes).astype('string')
+    if source:
+        bloc['source'] = source
+
+    # Quartier canonique (gazetteer) : cache LRU borné, la mémoire reste plate d'un bloc à l'autre
+    g = gazetteer()
+    quartier_canonique = bloc['quartier'].map(g.resoudre, na_action='ignore')
+    manquants = quartier_canonique.isna()
+    quartier_canonique[manquants] = bloc.loc[manquants, 'titre'].map(g.resoudre, na_action='ignore')
+    bloc['quartier_canonique'] = quartier_canonique.fillna(NON_SPECIFIE)
+
+    # Prix en MRU, surfaces et nombres de pièces numériques, statut du parsing
+    return normaliser_dataset(bloc)
+
+
+def fusionner(entrees, sortie, taille_bloc=TAILLE_BLOC, parquet=True):
+    """Fusionne les CSV `entrees` [(chemin, source imposée ou None)] bloc par bloc.
+
+    Chaque bloc est écrit dès qu'il est prêt (CSV, et Parquet si disponible) :
+    seul un bloc est en mémoire à la fois.
+    """
+    colonnes = schema_union(lire_en_tete(chemin) for chemin, _ in entrees)
+    print(f"\n📋 Schéma commun ({len(colonnes)} colonnes): {', '.join(colonnes)}")
+
+    parquet = parquet and parquet_disponible()
+    if parquet and os.path.exists(PARQUET_DIR):
+        shutil.rmtree(PARQUET_DIR)
+    stats = {'lignes': 0, 'sources': Counter(), 'remplies': Counter(), 'quartiers': 0,
+             'prix': 0, 'echecs': 0, 'apercu': None}
+    compteur = Counter()
+    numero = 0
+
+    with ExitStack() as fichiers:
+        f_sortie = fichiers.enter_context(open(sortie, 'w', encoding='utf-8-sig', newline=''))
+        if not parquet:
+            f_light = fichiers.enter_context(open(fichier_light, 'w', encoding='utf-8-sig', newline=''))
+        for chemin, source in entrees:
+            print(f"\n📂 Lecture de {chemin} par blocs de {taille_bloc} lignes...")
+            for bloc in lire_par_blocs(chemin, taille_bloc, compteur):
+                bloc = preparer_bloc(bloc, colonnes, source)
+                premier = numero == 0
+
+                bloc.to_csv(f_sortie, header=premier, index=False, quoting=csv.QUOTE_ALL)
+                if parquet:
+                    ecrire_parquet(bloc, PARQUET_DIR, ajout=numero)
+                else:
+                    colonnes_light = [col for col in COLONNES_LIGHT if col in bloc.columns]
+                    bloc[colonnes_light].to_csv(f_light, header=premier, index=False, quoting=csv.QUOTE_ALL)
+
+                stats['lignes'] += len(bloc)
+                stats['sources'].update(bloc['source'].value_counts().to_dict())
+                stats['remplies'].update(bloc.notna().sum().to_dict())
+                stats['quartiers'] += (bloc['quartier_canonique'] != NON_SPECIFIE).sum()
+                stats['prix'] += bloc['prix_mru'].notna().sum()
+                stats['echecs'] += (bloc['statut_parsing'] != 'ok').sum()
+                if stats['apercu'] is None:
+                    stats['apercu'] = bloc.iloc[:10, :6]
+                numero += 1
+                print(f"   ✅ Bloc {numero}: {len(bloc)} lignes (total {stats['lignes']})")
+
+    stats.update(colonnes=list(bloc.columns) if numero else colonnes, blocs=numero,
+                 reparees=compteur['reparees'], ignorees=compteur['ignorees'], parquet=parquet)
+    return stats
+
+
+def memoire_max_mo():
+    """Pic de mémoire résidente du processus (Mo), si disponible"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1e6 if sys.platform == 'darwin' else pic / 1e3
+
+
+# ============================================
+# EXÉCUTION
+# ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Fusion de voursa_raw.csv et final_data_raw.csv")
+    parser.add_argument('--taille-bloc', type=int, default=TAILLE_BLOC)
+    parser.add_argument('--sans-parquet', action='store_true', help="écrire seulement les CSV")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔄 FUSION PAR BLOCS - SOURCE EN PREMIÈRE COLONNE")
+    print("="*60)
+
+    # Vérifier que les fichiers existent
+    for chemin in (fichier_voursa, fichier_final):
+        if not os.path.exists(chemin):
+            print(f"❌ Fichier non trouvé: {chemin}")
+            return
+
+    # Les lignes de final d'abord, puis voursa (source imposée 'voursa.com')
+    stats = fusionner([(fichier_final, None), (fichier_voursa, 'voursa.com')], fichier_sortie,
+                      taille_bloc=args.taille_bloc, parquet=not args.sans_parquet)
+
+    print(f"\n📊 STATISTIQUES APRÈS FUSION:")
+    print(f"   - Total lignes: {stats['lignes']} ({stats['blocs']} blocs)")
+    print(f"   - Total colonnes: {len(stats['colonnes'])}")
+    print(f"   - Lignes mal formées réparées: {stats['reparees']}")
+    print(f"   - Lignes ignorées: {stats['ignorees']}")
+    print(f"   - Quartier reconnu: {stats['quartiers']}/{stats['lignes']}")
+    print(f"   - Prix convertis en MRU: {stats['prix']}/{stats['lignes']} ({stats['echecs']} lignes en échec)")
+    pic = memoire_max_mo()
+    if pic:
+        print(f"   - Pic mémoire: {pic:.0f} Mo")
+
+    print(f"\n📊 RÉPARTITION PAR SOURCE:")
+    for source, count in stats['sources'].most_common():
         print(f"   - {source}: {count} annonces")
 
-# ============================================
-# ANALYSE DES COLONNES
-# ============================================
-print(f"\n📋 TAUX DE REMPLISSAGE (10 premières colonnes):")
-for i, col in enumerate(df_fusion.columns[:10]):
-    non_null = df_fusion[col].notna().sum()
-    pct = (non_null / len(df_fusion)) * 100
-    print(f"   {i+1:2}. {col}: {non_null}/{len(df_fusion)} ({pct:.1f}%)")
+    print(f"\n📋 TAUX DE REMPLISSAGE (10 premières colonnes):")
+    for i, col in enumerate(stats['colonnes'][:10]):
+        non_null = stats['remplies'][col]
+        pct = (non_null / stats['lignes']) * 100 if stats['lignes'] else 0
+        print(f"   {i+1:2}. {col}: {non_null}/{stats['lignes']} ({pct:.1f}%)")
 
-# ============================================
-# SAUVEGARDE
-# ============================================
-print(f"\n💾 Sauvegarde du fichier fusionné...")
-
-# Sauvegarder avec protection des guillemets
-df_fusion.to_csv(fichier_sortie, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
-print(f"✅ Fichier sauvegardé: {fichier_sortie}")
+    if stats['apercu'] is not None:
+        print(f"\n👀 Aperçu des 10 premières lignes (premières colonnes):")
+        print(stats['apercu'].to_string())
 
-# ============================================
-# VERSION ALLÉGÉE
-# ============================================
-print(f"\n📦 Création d'une version allégée...")
+    light = f"{PARQUET_DIR} (projection stockage.lire_light)" if stats['parquet'] else fichier_light
+    print("\n🎉 Fusion terminée avec succès!")
+    print(f"📁 Fichiers générés:")
+    print(f"   - Complet (source en 1ère): {fichier_sortie}")
+    if stats['parquet']:
+        print(f"   - Parquet partitionné: {PARQUET_DIR} ({taille_disque(PARQUET_DIR) / 1e6:.2f} Mo)")
+    print(f"   - Light: {light}")
 
-colonnes_essentielles = [
-    'source', 'titre', 'prix', 'type_bien', 'type_annonce',
-    'quartier', 'ville', 'surface_m2', 'nb_chambres', 'nb_sdb',
-    'nb_salons', 'description', 'date_publication', 'vendeur',
-    'caracteristiques'
-]
 
-colonnes_presentes = [col for col in colonnes_essentielles if col in df_fusion.columns]
-df_light = df_fusion[colonnes_presentes].copy()
-fichier_light = 'data_raw/dataset_light.csv'
-df_light.to_csv(fichier_light, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
-print(f"✅ Version allégée sauvegardée: {fichier_light}")
-
-# ============================================
-# APERÇU
-# ============================================
-print(f"\n👀 Aperçu des 10 premières lignes (premières colonnes):")
-colonnes_apercu = df_fusion.columns[:6].tolist()  # 6 premières colonnes
-print(df_fusion[colonnes_apercu].head(10).to_string())
-
-print("\n🎉 Fusion terminée avec succès!")
-print(f"📁 Fichiers générés:")
-print(f"   - Complet (source en 1ère): {fichier_sortie}")
-print(f"   - Light: {fichier_light}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
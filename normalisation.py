@@ -0,0 +1,185 @@
+"""
+Normalisation vectorisée des prix, surfaces et nombres de pièces, toutes
+sources confondues. Chaque colonne est convertie en une fois avec les
+opérations de chaînes de pandas, une seule fois par valeur distincte
+(aucune boucle Python par ligne) :
+- chiffres arabes-indiens (٠١٢...) et persans convertis en chiffres latins
+- séparateurs de milliers ("6,000,000", "3 800 000", espaces insécables)
+- anciennes ouguiyas (MRO) converties en MRU (÷ 10) ; "UM" et "MRU" = MRU
+- suffixes de location ("/mois", "par nuit", "شهريا"...) -> colonne periode
+- "3,5 millions" -> 3 500 000
+
+Statuts de parsing : "ok", "vide" (pas de valeur), "echec" (texte sans nombre)
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import pandas as pd
+
+# ================== CONFIGURATION ==================
+SENTINELLES = ["Non spécifié", "Non spécifiée", "Non specifie", "nan", "NaN", "None", "N/A"]
+TAUX_MRO_MRU = 10  # Réforme de 2018 : 10 anciennes ouguiyas = 1 ouguiya nouvelle
+
+OK, VIDE, ECHEC = "ok", "vide", "echec"
+
+# Chaînes pandas stockées en Python : les motifs ci-dessous utilisent la syntaxe
+# du module re (lookahead...), que le moteur RE2 des chaînes pyarrow refuse
+CHAINE = pd.StringDtype("python")
+
+_CHIFFRES = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+_ESPACES = r"[\u00a0\u202f\u2009\u066c]"  # insécables, fines, séparateur de milliers arabe
+# Partie entière (avec séparateurs de milliers éventuels) puis décimales
+_NOMBRE = r"(\d{1,3}(?:[ ,.]\d{3})+(?!\d)|\d+)(?:[.,٫](\d+))?"
+_MRO = r"\bMRO\b|anciennes?\s+ouguiyas?|أوقية\s+قديمة"
+# "M" seul est sensible à la casse ("500 m" est une surface, pas 500 millions)
+_MILLION = r"\d\s*(?:(?i:millions?)|M)\b|مليون"
+_PERIODES = {
+    "mois": r"/\s*mois|par\s+mois|mensuel|شهر",
+    "jour": r"/\s*(?:jour|nuit)|par\s+(?:jour|nuit)|journalier|يوم|ليلة",
+    "semaine": r"/\s*semaine|par\s+semaine|hebdo|أسبوع",
+    "an": r"/\s*an\b|par\s+an\b|annuel|سنة|سنوي",
+}
+
+
+def _texte(serie):
+    """Série de chaînes nettoyée : sentinelles -> NA, chiffres latins, espaces simples."""
+    texte = serie.astype(CHAINE).str.strip()
+    texte = texte.mask(texte.isin(SENTINELLES) | (texte == ""))
+    texte = texte.str.translate(_CHIFFRES)
+    return texte.str.replace(_ESPACES, " ", regex=True)
+
+
+def _distinctes(serie):
+    """Valeurs distinctes nettoyées + codes pour revenir à la série complète.
+
+    Les prix et surfaces se répètent énormément : le parsing est fait une
+    fois par valeur distincte puis diffusé avec `take`, sans boucle par ligne.
+    """
+    serie = pd.Series(serie)
+    codes, valeurs = pd.factorize(serie)
+    # NA ajouté en dernière position : le code -1 (valeur manquante) le désigne avec take()
+    texte = _texte(pd.Series(valeurs, dtype=object).reindex(range(len(valeurs) + 1)))
+    return codes, texte
+
+
+def _diffuser(resultat, codes, index):
+    resultat = resultat.take(codes)
+    resultat.index = index
+    return resultat
+
+
+def _contient(texte, motif, casse=False):
+    return texte.str.contains(motif, case=casse, regex=True).fillna(False).astype(bool)
+
+
+def _statut(texte, valeur):
+    return pd.Series(ECHEC, index=texte.index, dtype=CHAINE).mask(valeur.notna(), OK).mask(texte.isna(), VIDE)
+
+
+def _nombre(texte):
+    parties = texte.str.extract(_NOMBRE)
+    entier = parties[0].str.replace(r"[ ,.]", "", regex=True)
+    nombre = pd.to_numeric(entier, errors="coerce").astype("Float64")
+    decimales = pd.to_numeric(parties[1], errors="coerce").astype("Float64")
+    return nombre + (decimales / 10 ** parties[1].str.len()).fillna(0)
+
+
+def _prix(texte):
+    prix = _nombre(texte)
+    prix = prix.mask(_contient(texte, _MILLION, casse=True) & (prix < 1000).fillna(False), prix * 1_000_000)
+    prix = prix.mask(_contient(texte, _MRO), prix / TAUX_MRO_MRU)
+    periode = pd.Series(pd.NA, index=texte.index, dtype=CHAINE)
+    for nom, motif in _PERIODES.items():
+        periode = periode.mask(periode.isna() & _contient(texte, motif), nom)
+    return pd.DataFrame({
+        "prix_mru": prix.round().astype("Int64"),
+        "prix_periode": periode,
+        "prix_statut": _statut(texte, prix),
+    })
+
+
+def extraire_nombre(serie):
+    """Premier nombre de chaque valeur -> Float64 (séparateurs de milliers retirés)."""
+    codes, texte = _distinctes(serie)
+    return _diffuser(_nombre(texte), codes, serie.index)
+
+
+def normaliser_prix(serie):
+    """Prix en MRU + période de location + statut.
+
+    Renvoie un DataFrame aligné sur `serie` : prix_mru (Int64),
+    prix_periode ("mois", "jour", "semaine", "an" ou NA pour une vente /
+    période inconnue) et prix_statut.
+    """
+    codes, texte = _distinctes(serie)
+    return _diffuser(_prix(texte), codes, serie.index)
+
+
+def normaliser_surface(serie):
+    """Surface en m² ("120 m²", "260.0", "1 400 m2") -> DataFrame surface_m2 (Float64) + surface_statut."""
+    codes, texte = _distinctes(serie)
+    surface = _nombre(texte)
+    resultat = pd.DataFrame({"surface_m2": surface, "surface_statut": _statut(texte, surface)})
+    return _diffuser(resultat, codes, serie.index)
+
+
+def normaliser_entier(serie):
+    """Nombre de pièces / chambres / images ("3", "3.0", "٣") -> DataFrame valeur (Int64) + statut."""
+    codes, texte = _distinctes(serie)
+    valeur = _nombre(texte).round().astype("Int64")
+    return _diffuser(pd.DataFrame({"valeur": valeur, "statut": _statut(texte, valeur)}), codes, serie.index)
+
+
+# ================== DATASET COMPLET ==================
+COLONNES_ENTIERES = ["nb_chambres", "nb_salons", "nb_sdb", "nb_pieces_total", "nb_images"]
+
+
+def normaliser_dataset(df):
+    """Ajoute les colonnes numériques normalisées et une colonne statut_parsing.
+
+    statut_parsing vaut "ok", ou la liste des champs en échec ("prix,surface_m2").
+    Les colonnes d'origine ne sont pas modifiées, sauf surface_m2 et les
+    nombres de pièces, remplacés par leur valeur numérique.
+    """
+    df = df.copy()
+    echecs = {}
+    if "prix" in df.columns:
+        prix = normaliser_prix(df["prix"])
+        df["prix_mru"] = prix["prix_mru"]
+        df["prix_periode"] = prix["prix_periode"]
+        echecs["prix"] = prix["prix_statut"] == ECHEC
+    if "surface_m2" in df.columns:
+        surface = normaliser_surface(df["surface_m2"])
+        df["surface_m2"] = surface["surface_m2"]
+        echecs["surface_m2"] = surface["surface_statut"] == ECHEC
+    for colonne in COLONNES_ENTIERES:
+        if colonne in df.columns:
+            entier = normaliser_entier(df[colonne])
+            df[colonne] = entier["valeur"]
+            echecs[colonne] = entier["statut"] == ECHEC
+
+    statut = pd.Series("", index=df.index, dtype=CHAINE)
+    for colonne, masque in echecs.items():
+        statut = statut.mask(masque, statut + colonne + ",")
+    df["statut_parsing"] = statut.str.rstrip(",").replace("", OK)
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Normalisation des prix / surfaces / pièces d'un CSV")
+    parser.add_argument("fichier", nargs="?", default="dataset_complet.csv")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.fichier, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    debut = time.perf_counter()
+    resultat = normaliser_dataset(df)
+    duree = time.perf_counter() - debut
+    print(f"⚡ {len(df)} lignes normalisées en {duree * 1000:.0f} ms")
+    print("\n📊 Statut du parsing:")
+    for statut, nombre in resultat["statut_parsing"].value_counts().items():
+        print(f"   - {statut}: {nombre}")
+    if "source" in resultat.columns:
+        print("\n💰 Prix médian (MRU) par source:")
+        print(resultat.groupby("source")["prix_mru"].median().to_string())
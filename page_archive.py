@@ -0,0 +1,355 @@
+"""
+Archive des pages téléchargées (format WARC compressé) et rejeu hors ligne.
+- chaque GET de http_client (réseau ou cache) est écrit comme enregistrement
+  WARC "response" : URL, date, en-têtes HTTP et corps
+- chaque page rendue à un parseur (clé + contenu, y compris le page_source
+  de Selenium) est écrite comme enregistrement "resource" avec le site et la
+  clé ; un contenu déjà archivé (même empreinte SHA-1) devient un "revisit"
+  sans corps
+- un fichier archive/<date>_<pid>.warc.gz par exécution, un membre gzip par
+  enregistrement : un arrêt brutal ne perd que le dernier
+- rétention : à l'ouverture d'une nouvelle archive, les plus anciennes sont
+  supprimées au-delà de MAX_ARCHIVES fichiers ou de MAX_ARCHIVE_BYTES octets
+- mode rejeu (`--replay`) : les pages viennent de l'archive la plus récente
+  du site et http_client.get répond depuis l'archive, sans réseau ni délai
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# ================== CONFIGURATION ==================
+ARCHIVE_ENABLED = True  # Archiver chaque page téléchargée
+ARCHIVE_DIR = "archive"
+MAX_ARCHIVES = 10  # Exécutions archivées gardées (les plus récentes)
+MAX_ARCHIVE_BYTES = 1024 * 1024 * 1024  # Budget disque des archives (1 Go)
+CHUNK = 1024 * 1024  # Lecture des archives par blocs de 1 Mo
+REVISIT_PROFILE = "http://netpreserve.org/warc/1.0/revisit/identical-payload-digest"
+# En-têtes recalculés par requests (corps déjà décompressé) : pas archivés
+EXCLUDED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+_writer = None
+_replay = None
+_lock = threading.Lock()
+
+
+def digest(payload):
+    return "sha1:" + base64.b32encode(hashlib.sha1(payload).digest()).decode("ascii")
+
+
+# ================== ÉCRITURE ==================
+class WarcWriter:
+    """Écrit des enregistrements WARC/1.0, un membre gzip chacun (sûr entre threads)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "ab")
+        self.lock = threading.Lock()
+        self.digests = {}  # empreinte -> WARC-Record-ID déjà écrit
+        self.records = 0
+
+    def _write(self, warc_type, headers, block=b""):
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        lines = [
+            "WARC/1.0",
+            f"WARC-Type: {warc_type}",
+            f"WARC-Record-ID: {record_id}",
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append(f"Content-Length: {len(block)}")
+        record = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        member = compressor.compress(record) + compressor.flush()
+        with self.lock:
+            self.file.write(member)
+            self.file.flush()
+            self.records += 1
+        return record_id
+
+    def response(self, url, status, headers, body):
+        """Réponse HTTP complète (statut, en-têtes, corps)."""
+        lines = [f"HTTP/1.1 {status}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()
+                  if name.lower() not in EXCLUDED_HEADERS]
+        http_block = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8", errors="replace") + body
+        payload_digest = digest(body)
+        record_id = self._write("response", {
+            "WARC-Target-URI": url,
+            "WARC-Payload-Digest": payload_digest,
+            "Content-Type": "application/http; msgtype=response",
+        }, http_block)
+        with self.lock:
+            self.digests.setdefault(payload_digest, record_id)
+
+    def page(self, site, key, content, url=None):
+        """Page remise au parseur ; "revisit" si le même contenu est déjà archivé."""
+        text = isinstance(content, str)
+        payload = content.encode("utf-8") if text else content
+        payload_digest = digest(payload)
+        headers = {
+            "WARC-Target-URI": url or f"scrape://{site}/{key}",
+            "WARC-Payload-Digest": payload_digest,
+            "WARC-Scrape-Site": site,
+            "WARC-Scrape-Key": json.dumps(key, ensure_ascii=False),
+            "WARC-Scrape-Payload": "str" if text else "bytes",
+        }
+        with self.lock:
+            refers_to = self.digests.get(payload_digest)
+        if refers_to:
+            headers.update({"WARC-Profile": REVISIT_PROFILE, "WARC-Refers-To": refers_to})
+            self._write("revisit", headers)
+            return
+        headers["Content-Type"] = "text/html; charset=utf-8" if text else "application/octet-stream"
+        record_id = self._write("resource", headers, payload)
+        with self.lock:
+            self.digests.setdefault(payload_digest, record_id)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def prune(directory=None, max_files=None, max_bytes=None):
+    """Supprime les archives les plus anciennes au-delà du nombre de fichiers ou du budget disque.
+
+    La place de l'archive qui va être ouverte est comptée : il en reste au plus
+    `max_files` - 1. Renvoie la liste des fichiers supprimés.
+    """
+    max_files = MAX_ARCHIVES if max_files is None else max_files
+    max_bytes = MAX_ARCHIVE_BYTES if max_bytes is None else max_bytes
+    files = archive_files(directory or ARCHIVE_DIR)
+    sizes = {}
+    for path in files:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError:
+            sizes[path] = 0
+    total = sum(sizes.values())
+    removed = []
+    for path in files:  # de la plus ancienne à la plus récente
+        if len(files) - len(removed) < max_files and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= sizes[path]
+        removed.append(path)
+    if removed:
+        logging.info(f"Archives : {len(removed)} fichier(s) supprimé(s), {total / 1e6:.1f} Mo gardés")
+    return removed
+
+
+def writer():
+    """Archive de l'exécution en cours (créée au premier enregistrement, après rétention)."""
+    global _writer
+    with _lock:
+        if _writer is None:
+            prune()
+            name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.warc.gz"
+            _writer = WarcWriter(os.path.join(ARCHIVE_DIR, name))
+    return _writer
+
+
+def record_response(url, response):
+    """Archive une réponse de http_client (appelé pour chaque GET servi)."""
+    if not ARCHIVE_ENABLED or _replay is not None:
+        return
+    try:
+        writer().response(url, f"{response.status_code} {response.reason or ''}".strip(),
+                          response.headers, response.content or b"")
+    except OSError as e:
+        logging.warning(f"Archivage impossible pour {url} : {e}")
+
+
+def record_page(site, key, content):
+    """Archive une page (HTML brut ou page_source Selenium) remise au parseur."""
+    if not ARCHIVE_ENABLED or _replay is not None or not isinstance(content, (bytes, str)):
+        return
+    try:
+        writer().page(site, key, content, key if isinstance(key, str) and "://" in key else None)
+    except OSError as e:
+        logging.warning(f"Archivage impossible ({site}, {key}) : {e}")
+
+
+def recording(site, fetched):
+    """Enveloppe un générateur fetch() : archive chaque (clé, contenu) au passage."""
+    iterator = iter(fetched)
+    try:
+        for key, content in iterator:
+            record_page(site, key, content)
+            yield key, content
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+
+
+# ================== LECTURE ==================
+def _read_member(f, buffer=b""):
+    """Décompresse le membre gzip suivant : (données, octets consommés, reste lu en trop)."""
+    decompressor = zlib.decompressobj(31)
+    parts, consumed = [], 0
+    while not decompressor.eof:
+        if not buffer:
+            buffer = f.read(CHUNK)
+            if not buffer:
+                return None, consumed, b""  # fin de fichier (ou dernier membre tronqué)
+        parts.append(decompressor.decompress(buffer))
+        consumed += len(buffer) - len(decompressor.unused_data)
+        buffer = decompressor.unused_data
+    return b"".join(parts), consumed, buffer
+
+
+def _parse_record(data):
+    """(en-têtes WARC, bloc) d'un enregistrement décompressé."""
+    head, _, rest = data.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("utf-8", errors="replace").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers, rest[:int(headers.get("Content-Length", 0))]
+
+
+def iter_records(path):
+    """Parcourt une archive : (position du membre, en-têtes WARC, bloc)."""
+    with open(path, "rb") as f:
+        offset, buffer = 0, b""
+        while True:
+            data, consumed, buffer = _read_member(f, buffer)
+            if data is None:
+                return
+            headers, block = _parse_record(data)
+            yield offset, headers, block
+            offset += consumed
+
+
+def read_record(path, offset):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data, _, _ = _read_member(f)
+    return _parse_record(data)
+
+
+def split_http(block):
+    """Bloc "application/http" -> (code, en-têtes, corps)."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("utf-8", errors="replace").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return status, headers, body
+
+
+def archive_files(path=None):
+    """Archives à rejouer, de la plus ancienne à la plus récente."""
+    if path and os.path.isfile(path):
+        return [path]
+    return sorted(glob.glob(os.path.join(path or ARCHIVE_DIR, "*.warc.gz")))
+
+
+class ReplayStore:
+    """Index des archives (positions seulement : les corps sont relus à la demande)."""
+
+    def __init__(self, files):
+        self.files = files
+        self.responses = {}  # URL -> (fichier, position), la plus récente
+        self.payloads = {}  # empreinte -> (fichier, position) d'un enregistrement avec corps
+        self.pages = {}  # site -> (fichier, [(clé, type, empreinte)]) de l'archive la plus récente
+        for path in files:
+            pages = {}
+            for offset, headers, _ in iter_records(path):
+                warc_type = headers.get("WARC-Type")
+                payload_digest = headers.get("WARC-Payload-Digest")
+                if warc_type in ("response", "resource") and payload_digest:
+                    self.payloads[payload_digest] = (path, offset)
+                if warc_type == "response":
+                    self.responses[headers["WARC-Target-URI"]] = (path, offset)
+                site = headers.get("WARC-Scrape-Site")
+                if site:
+                    pages.setdefault(site, []).append((json.loads(headers["WARC-Scrape-Key"]),
+                                                       headers.get("WARC-Scrape-Payload"), payload_digest))
+            for site, entries in pages.items():
+                self.pages[site] = (path, entries)
+
+    def payload(self, payload_digest):
+        path, offset = self.payloads[payload_digest]
+        headers, block = read_record(path, offset)
+        if headers.get("WARC-Type") == "response":
+            return split_http(block)[2]
+        return block
+
+    def site_pages(self, site):
+        """(clé, contenu) du site, dans l'ordre de l'archive."""
+        path, entries = self.pages.get(site, (None, []))
+        if path:
+            logging.info(f"Rejeu de {site} depuis {path} ({len(entries)} pages)")
+        for key, kind, payload_digest in entries:
+            payload = self.payload(payload_digest)
+            yield key, payload.decode("utf-8") if kind == "str" else payload
+
+    def urls(self, contains=""):
+        return [url for url in self.responses if contains in url]
+
+    def response(self, url):
+        """Réponse archivée de `url` (ConnectionError si l'URL n'a jamais été archivée)."""
+        if url not in self.responses:
+            raise requests.exceptions.ConnectionError(f"rejeu : {url} absente de l'archive")
+        status, headers, body = split_http(read_record(*self.responses[url])[1])
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers = headers
+        response.encoding = requests.utils.get_encoding_from_headers(headers) or "utf-8"
+        response.url = url
+        response.from_cache = True
+        return response
+
+
+# ================== REJEU ==================
+def start_replay(path=None):
+    """Active le rejeu pour tout le processus (http_client compris) ; renvoie l'index."""
+    global _replay
+    files = archive_files(path)
+    if not files:
+        raise FileNotFoundError(f"Aucune archive à rejouer dans {path or ARCHIVE_DIR}")
+    with _lock:
+        _replay = ReplayStore(files)
+    return _replay
+
+
+def replay_store():
+    """Index de rejeu actif (None en mode normal)."""
+    return _replay
+
+
+def replay_arg(argv=None):
+    """Lit `--replay [archive]` dans la ligne de commande (None si absent, "" = toutes les archives)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--replay", nargs="?", const="", default=None)
+    return parser.parse_known_args(argv)[0].replay
+
+
+def source_pages(site, fetch, replay=None):
+    """Pages à parser : archivées si `replay` n'est pas None, sinon fetch() en direct (archivé)."""
+    if replay is None:
+        return recording(site, fetch())
+    store = _replay or start_replay(replay or None)
+    return store.site_pages(site)
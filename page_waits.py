@@ -0,0 +1,157 @@
+"""
+Attentes sur condition pour les scrapers Selenium (à la place des time.sleep fixes).
+- on interroge la page toutes les POLL secondes et on repart dès que la
+  condition est vraie : nombre de cartes en hausse, sélecteur présent,
+  réseau au repos, élément visible...
+- un plafond (`timeout`) borne chaque attente ; à l'expiration on continue
+  comme après l'ancien délai fixe (pas d'exception)
+- chaque attente connaît le délai fixe qu'elle remplace (`fixed`) : le temps
+  gagné est cumulé par étiquette et affiché par log_savings()
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+
+# ================== CONFIGURATION ==================
+POLL = 0.1  # Intervalle entre deux vérifications (secondes)
+TIMEOUT = 10  # Plafond par défaut d'une attente (secondes)
+NETWORK_QUIET = 0.5  # Durée sans nouvelle requête pour considérer le réseau au repos
+
+_stats = {}
+_lock = threading.Lock()
+
+
+# ================== ATTENTE ==================
+def wait_for(driver, condition, timeout=TIMEOUT, fixed=None, label=None):
+    """Attend que `condition(driver)` soit vraie, au plus `timeout` secondes.
+
+    Renvoie la valeur de la condition (False si le plafond est atteint). Une
+    exception WebDriver pendant la vérification compte comme "pas encore".
+    `fixed` : délai fixe remplacé, pour le calcul du temps gagné.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    while True:
+        try:
+            result = condition(driver)
+        except WebDriverException:
+            result = False
+        if result or time.perf_counter() >= deadline:
+            break
+        time.sleep(POLL)
+    _record(label or getattr(condition, "__name__", "?"), time.perf_counter() - start, fixed, bool(result))
+    if not result:
+        logging.debug(f"Attente '{label}' : plafond de {timeout}s atteint")
+    return result
+
+
+def _record(label, waited, fixed, ok):
+    with _lock:
+        entry = _stats.setdefault(label, {"calls": 0, "waited": 0.0, "fixed": 0.0, "timeouts": 0})
+        entry["calls"] += 1
+        entry["waited"] += waited
+        entry["fixed"] += fixed if fixed is not None else waited
+        entry["timeouts"] += not ok
+
+
+def savings():
+    """{étiquette: statistiques} avec le temps gagné sur les délais fixes."""
+    with _lock:
+        return {label: dict(entry, saved=entry["fixed"] - entry["waited"])
+                for label, entry in _stats.items()}
+
+
+def log_savings(log=logging.info):
+    """Temps réellement attendu contre délais fixes remplacés, par étiquette."""
+    total_waited = total_fixed = 0.0
+    for label, entry in sorted(savings().items()):
+        total_waited += entry["waited"]
+        total_fixed += entry["fixed"]
+        log(f"Attente '{label}' : {entry['calls']} fois, {entry['waited']:.1f}s au lieu de "
+            f"{entry['fixed']:.1f}s ({entry['timeouts']} plafonds atteints)")
+    if total_fixed:
+        log(f"Attentes : {total_waited:.1f}s au lieu de {total_fixed:.1f}s, "
+            f"{total_fixed - total_waited:.1f}s gagnées")
+
+
+# ================== CONDITIONS ==================
+def count(driver, css):
+    """Nombre d'éléments correspondant au sélecteur CSS."""
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", css)
+
+
+def selector_present(css, minimum=1):
+    """Au moins `minimum` éléments correspondent au sélecteur."""
+    def condition(driver):
+        return count(driver, css) >= minimum
+    condition.__name__ = f"présence {css}"
+    return condition
+
+
+def count_increased(css, before):
+    """Plus d'éléments qu'avant (`before`) : le lot suivant est arrivé."""
+    def condition(driver):
+        return count(driver, css) > before
+    condition.__name__ = f"hausse {css}"
+    return condition
+
+
+# Compteur de ressources alimenté par un PerformanceObserver, installé une fois
+# par document : performance.getEntriesByType('resource') plafonne au tampon de
+# 250 entrées de Chrome, et une page lourde ou défilée longtemps paraîtrait
+# alors au repos immédiatement. Le tampon est aussi agrandi pour le repli.
+JS_RESSOURCES = """
+if (window.__scrapeRessources === undefined) {
+    try { performance.setResourceTimingBufferSize(100000); } catch (e) {}
+    window.__scrapeRessources = null;
+    try {
+        const initiales = performance.getEntriesByType('resource').length;
+        new PerformanceObserver(liste => { window.__scrapeRessources += liste.getEntries().length; })
+            .observe({type: 'resource'});
+        window.__scrapeRessources = initiales;
+    } catch (e) {}
+}
+const total = window.__scrapeRessources !== null
+    ? window.__scrapeRessources : performance.getEntriesByType('resource').length;
+return [document.readyState, total];
+"""
+
+
+def network_idle(quiet=NETWORK_QUIET):
+    """Page chargée et aucune nouvelle ressource depuis `quiet` secondes."""
+    state = {"resources": -1, "since": time.perf_counter()}
+
+    def condition(driver):
+        ready, resources = driver.execute_script(JS_RESSOURCES)
+        now = time.perf_counter()
+        if resources != state["resources"]:
+            state["resources"], state["since"] = resources, now
+            return False
+        return ready == "complete" and now - state["since"] >= quiet
+    condition.__name__ = "réseau au repos"
+    return condition
+
+
+def in_viewport(element):
+    """L'élément est entièrement visible dans la fenêtre (fin du défilement)."""
+    def condition(driver):
+        return driver.execute_script(
+            "const r = arguments[0].getBoundingClientRect();"
+            "return r.top >= 0 && r.bottom <= window.innerHeight;", element)
+    condition.__name__ = "élément visible"
+    return condition
+
+
+def element_gone(element):
+    """L'élément a disparu (retiré du DOM ou masqué)."""
+    def condition(driver):
+        try:
+            return not element.is_displayed()
+        except StaleElementReferenceException:
+            return True
+    condition.__name__ = "élément disparu"
+    return condition
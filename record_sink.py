@@ -0,0 +1,81 @@
+"""
+Écriture en continu (append-only) des enregistrements scrapés dans un CSV.
+Chaque enregistrement est écrit une seule fois ; le fichier est vidé sur
+disque (flush + fsync) à chaque fin de lot. La mémoire reste constante :
+les enregistrements peuvent venir d'un générateur.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import csv
+import os
+
+import instrumentation
+
+
+class CsvRecordSink:
+    """Puits CSV : `with CsvRecordSink(chemin, colonnes) as sink: sink.write(record)`.
+
+    - `mode='a'` ajoute au fichier existant (en-tête écrit seulement s'il est vide),
+      `mode='w'` le remplace
+    - `batch_size` : nombre d'enregistrements entre deux fsync
+    - `site` : si fourni, le temps d'écriture est compté dans l'étape "write"
+      du site (voir instrumentation)
+    Les clés absentes d'un enregistrement donnent une cellule vide, les clés
+    hors `columns` sont ignorées. Un enregistrement peut être un dictionnaire
+    ou un objet avec `to_dict(colonnes)` (listing.Listing).
+    """
+
+    def __init__(self, path, columns, batch_size=100, mode="a", encoding="utf-8", site=None, **csv_options):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+        self.site = site
+        is_new = mode == "w" or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, mode, newline="", encoding=encoding)
+        self.writer = csv.DictWriter(self.file, fieldnames=self.columns, extrasaction="ignore", **csv_options)
+        if is_new:
+            self.writer.writeheader()
+            self.commit()
+
+    def write(self, record):
+        """Ajoute un enregistrement ; fsync automatique en fin de lot."""
+        if self.site:
+            with instrumentation.timer(self.site, "write"):
+                return self._write(record)
+        return self._write(record)
+
+    def _write(self, record):
+        if hasattr(record, "to_dict"):
+            record = record.to_dict(self.columns)
+        self.writer.writerow(record)
+        self.count += 1
+        if self.count % self.batch_size == 0:
+            self.commit()
+
+    def write_all(self, records):
+        """Consomme un itérable (ou générateur) d'enregistrements ; renvoie le nombre écrit."""
+        start = self.count
+        for record in records:
+            self.write(record)
+        self.commit()
+        return self.count - start
+
+    def commit(self):
+        """Force l'écriture sur disque de tout ce qui a été écrit jusque-là."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.commit()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,96 @@
+"""
+Schéma typé et compact du dataset fusionné (dataset_complet.csv).
+- entiers nullables (Int64) pour les prix (en MRU) et les comptages,
+  Float64 pour les surfaces (parsing : voir normalisation.py)
+- catégories pour les colonnes à peu de valeurs distinctes
+- vraies dates (datetime64) pour date_publication / date_scraping
+- vrai NA à la place des chaînes "Non spécifié", "Non spécifiée", ""...
+
+Usage : python schema.py [dataset_complet.csv]  (affiche le gain mémoire)
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from normalisation import normaliser_entier, normaliser_prix, normaliser_surface
+
+DATASET = "dataset_complet.csv"
+
+# Valeurs qui signifient "pas de donnée" dans les CSV des scrapers
+SENTINELLES = ["Non spécifié", "Non spécifiée", "Non specifie", "", "nan", "NaN", "None", "N/A"]
+
+# ================== SCHÉMA ==================
+ENTIERS = ["nb_chambres", "nb_salons", "nb_sdb",
+           "nb_pieces_total", "nb_images", "nb_vues", "page"]
+CATEGORIES = ["source", "ville", "type_bien", "type_annonce", "quartier",
+              "quartier_canonique", "meuble", "vendeur"]
+DATES = ["date_publication", "date_scraping"]
+# Les autres colonnes (titre, description, url...) restent du texte
+
+MOIS = {
+    "janvier": 1, "février": 2, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
+    "juillet": 7, "août": 8, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11,
+    "décembre": 12, "decembre": 12,
+}
+
+
+def _dates(serie):
+    """Dates ISO (2026-02-14) ou françaises (29 Juin 2023) -> datetime64 ; le reste -> NaT."""
+    texte = serie.astype("string").str.strip()
+    iso = texte.str.extract(r"(\d{4}-\d{1,2}-\d{1,2})", expand=False)
+    parties = texte.str.lower().str.extract(r"(\d{1,2})\s+([a-zéûè]+)\s+(\d{4})")
+    mois = parties[1].map({nom: f"{numero:02d}" for nom, numero in MOIS.items()}).astype("string")
+    francaises = parties[2] + "-" + mois + "-" + parties[0].str.zfill(2)
+    return pd.to_datetime(iso.fillna(francaises), errors="coerce", format="%Y-%m-%d")
+
+
+def typer(df):
+    """Applique le schéma à un DataFrame déjà chargé (colonnes absentes ignorées)."""
+    df = df.copy()
+    for colonne in df.columns:
+        if colonne == "prix":
+            prix = normaliser_prix(df[colonne])
+            df[colonne] = prix["prix_mru"]
+            df["prix_periode"] = prix["prix_periode"].astype("category")
+        elif colonne == "surface_m2":
+            df[colonne] = normaliser_surface(df[colonne])["surface_m2"]
+        elif colonne in ENTIERS:
+            df[colonne] = normaliser_entier(df[colonne])["valeur"]
+        elif colonne in DATES:
+            df[colonne] = _dates(df[colonne])
+        elif colonne in CATEGORIES:
+            df[colonne] = df[colonne].astype("category")
+    return df
+
+
+def charger_dataset(chemin=DATASET, colonnes=None):
+    """Charge le dataset fusionné avec le schéma typé."""
+    df = pd.read_csv(chemin, dtype=str, keep_default_na=False, na_values=SENTINELLES,
+                     usecols=colonnes, encoding="utf-8-sig")
+    return typer(df)
+
+
+def rapport_memoire(chemin=DATASET):
+    """Compare la mémoire du chargement brut (pd.read_csv) et du chargement typé."""
+    brut = pd.read_csv(chemin, encoding="utf-8-sig")
+    type_ = charger_dataset(chemin)
+    avant = brut.memory_usage(deep=True).sum()
+    apres = type_.memory_usage(deep=True).sum()
+    print(f"📦 {chemin} : {len(brut)} lignes, {len(brut.columns)} colonnes")
+    print(f"   - pd.read_csv brut : {avant / 1e6:.2f} Mo")
+    print(f"   - schéma typé      : {apres / 1e6:.2f} Mo ({(1 - apres / avant) * 100:.0f}% de moins)")
+    print("\n📋 Types par colonne:")
+    for colonne in type_.columns:
+        print(f"   - {colonne}: {type_[colonne].dtype} ({type_[colonne].notna().sum()} valeurs)")
+    return avant, apres
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chargement typé du dataset fusionné")
+    parser.add_argument("fichier", nargs="?", default=DATASET)
+    args = parser.parse_args()
+    rapport_memoire(args.fichier)
+    sys.exit(0)
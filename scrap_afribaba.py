@@ -3,10 +3,17 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import re
 from datetime import datetime
+from listing import Listing, listings_vers_dataframe
+import instrumentation
 
-print("="*60)
-print("📁 PARSING AFRIBABA - VERSION AMÉLIORÉE")
-print("="*60)
+SOURCE = 'afribaba.com'
+# Pages enregistrées à la main depuis le navigateur (pas de téléchargement)
+FICHIERS_HTML = [f'data/raw/Immobilier Location - Vente Page {i} - Petites annonces Mauritanie.html'
+                 for i in range(1, 4)]
+
+# Colonnes du CSV de sortie (champs du Listing, dans cet ordre)
+COLONNES = ['source', 'titre', 'prix', 'ville', 'quartier', 'type_bien', 'nb_chambres', 'nb_sdb',
+            'surface_m2', 'date_publication', 'date_scraping', 'url', 'description', 'page']
 
 def clean_text(text):
     """Nettoie le texte en enlevant les espaces multiples et retours à la ligne"""
@@ -100,19 +107,32 @@ def extract_description(annonce_text):
         return clean_text(description)
     return "Non spécifié"
 
-def parse_afribaba_html(html_file, page_num):
-    """Parse un fichier HTML sauvegardé d'Afribaba"""
-    
-    print(f"\n📄 Parsing page {page_num}: {html_file}")
-    
+def lire_html(html_file):
+    """Contenu d'un fichier HTML sauvegardé (None s'il n'existe pas)"""
     if not os.path.exists(html_file):
         print(f"❌ Fichier non trouvé: {html_file}")
-        return []
-    
+        return None
     with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
+        return f.read()
+
+def fetch(fichiers=FICHIERS_HTML):
+    """Lit les pages sauvegardées : génère (numéro de page, HTML)"""
+    for page_num, html_file in enumerate(fichiers, 1):
+        print(f"\n📄 Parsing page {page_num}: {html_file}")
+        content = lire_html(html_file)
+        if content is not None:
+            yield page_num, content
+
+def parse_afribaba_html(html_file, page_num):
+    """Parse un fichier HTML sauvegardé d'Afribaba"""
+    print(f"\n📄 Parsing page {page_num}: {html_file}")
+    content = lire_html(html_file)
+    return parse(page_num, content) if content is not None else []
+
+def parse(page_num, content):
+    """Extrait les annonces immobilières d'une page Afribaba"""
+    with instrumentation.timer(SOURCE, 'parse'):
+        soup = BeautifulSoup(content, 'html.parser')
     
     # Trouver toutes les annonces
     annonces = soup.find_all('div', class_='card')
@@ -121,7 +141,7 @@ def parse_afribaba_html(html_file, page_num):
     
     donnees = []
     
-    for annonce in annonces:
+    for annonce in instrumentation.each(SOURCE, 'extract', annonces):
         try:
             # ----- TITRE ET URL -----
             titre_elem = annonce.find('h3', class_='card-title')
@@ -179,87 +199,97 @@ def parse_afribaba_html(html_file, page_num):
             est_service = any(mot in texte_check for mot in services_exclus)
             
             if not est_immobilier or est_service:
-                print(f"  ⚠️ Exclu (non immobilier): {titre[:30]}")
+                instrumentation.count(SOURCE, 'exclues')  # Non immobilier
                 continue
             
-            donnees.append({
-                'source': 'afribaba.com',
-                'titre': titre,
-                'prix': prix,
-                'ville': ville,
-                'quartier': "Non spécifié",  # À extraire plus tard
-                'type_bien': type_bien,
-                'nb_chambres': nb_chambres,
-                'nb_sdb': nb_sdb,
-                'surface_m2': surface,
-                'date_publication': date_publication,
-                'date_scraping': datetime.now().strftime('%Y-%m-%d'),
-                'url': url_annonce,
-                'description': description,
-                'page': page_num
-            })
+            donnees.append(Listing(
+                source=SOURCE,
+                titre=titre,
+                prix=prix,
+                ville=ville,
+                quartier=None,  # À extraire plus tard
+                type_bien=type_bien,
+                nb_chambres=nb_chambres,
+                nb_sdb=nb_sdb,
+                surface_m2=surface,
+                date_publication=date_publication,
+                date_scraping=datetime.now().strftime('%Y-%m-%d'),
+                url=url_annonce,
+                description=description,
+                page=page_num
+            ))
             
-            print(f"  ✅ {titre[:30]}... - {prix} - {type_bien} - {nb_chambres} ch")
+            instrumentation.progress(SOURCE).update(message=f"{titre[:30]}... - {prix} - {type_bien} - {nb_chambres} ch")
             
         except Exception as e:
+            instrumentation.count(SOURCE, 'erreurs')
             print(f"  ❌ Erreur: {e}")
             continue
     
     return donnees
 
-# Traiter les 3 fichiers
-toutes_annonces = []
+def main():
+    print("="*60)
+    print("📁 PARSING AFRIBABA - VERSION AMÉLIORÉE")
+    print("="*60)
+
+    # Traiter les 3 fichiers
+    toutes_annonces = []
 
-for i in range(1, 4):
-    html_file = f'data/raw/Immobilier Location - Vente Page {i} - Petites annonces Mauritanie.html'
-    annonces = parse_afribaba_html(html_file, i)
-    toutes_annonces.extend(annonces)
+    for page_num, content in instrumentation.pages(SOURCE, fetch()):
+        toutes_annonces.extend(parse(page_num, content))
 
-# Créer le DataFrame
-if toutes_annonces:
-    df = pd.DataFrame(toutes_annonces)
-    
-    # Sauvegarde
-    df.to_csv('data/raw/afribaba_propre.csv', index=False, encoding='utf-8-sig')
-    
-    print("\n" + "="*60)
-    print("📊 RÉSULTAT - AFRIBABA NETTOYÉ")
-    print("="*60)
-    print(f"✅ Total annonces immobilières: {len(df)}")
-    print(f"\n📋 Répartition par type de bien:")
-    print(df['type_bien'].value_counts())
-    print(f"\n📋 Répartition par ville:")
-    print(df['ville'].value_counts())
-    print(f"\n📋 Statistiques:")
-    print(f"   - Annonces avec chambres: {df[df['nb_chambres'] != 'Non spécifié'].shape[0]}")
-    print(f"   - Annonces avec surface: {df[df['surface_m2'] != 'Non spécifié'].shape[0]}")
-    print(f"   - Annonces avec date: {df[df['date_publication'] != 'Non spécifiée'].shape[0]}")
-    
-    print("\n👀 Aperçu des données nettoyées:")
-    print(df[['titre', 'prix', 'type_bien', 'nb_chambres', 'surface_m2']].head(10))
-    
-    # Fusion avec les données existantes
-    print("\n🔄 Fusion avec les données existantes...")
-    
-    # Charger wassit et lagence
-    fichiers_existants = []
-    if os.path.exists('data/raw/wassit_immobilier.csv'):
-        df_wassit = pd.read_csv('data/raw/wassit_immobilier.csv')
-        fichiers_existants.append(df_wassit)
-        print(f"✅ wassit: {len(df_wassit)} annonces")
-    
-    if os.path.exists('data/raw/lagence.csv'):
-        df_lagence = pd.read_csv('data/raw/lagence.csv')
-        fichiers_existants.append(df_lagence)
-        print(f"✅ lagence: {len(df_lagence)} annonces")
-    
-    # Fusionner tout
-    fichiers_existants.append(df)
-    df_final = pd.concat(fichiers_existants, ignore_index=True, sort=False)
-    
-    # Sauvegarder le final
-    df_final.to_csv('data_raw.csv', index=False, encoding='utf-8-sig')
-    print(f"\n✅ Fichier final: data_raw.csv avec {len(df_final)} annonces")
-    
-else:
-    print("❌ Aucune donnée")
\ No newline at end of file
+    # Créer le DataFrame
+    if toutes_annonces:
+        df = listings_vers_dataframe(toutes_annonces, COLONNES)
+        
+        # Sauvegarde
+        with instrumentation.timer(SOURCE, 'write'):
+            df.to_csv('data/raw/afribaba_propre.csv', index=False, encoding='utf-8-sig')
+        
+        print("\n" + "="*60)
+        print("📊 RÉSULTAT - AFRIBABA NETTOYÉ")
+        print("="*60)
+        print(f"✅ Total annonces immobilières: {len(df)}")
+        print(f"\n📋 Répartition par type de bien:")
+        print(df['type_bien'].value_counts())
+        print(f"\n📋 Répartition par ville:")
+        print(df['ville'].value_counts())
+        print(f"\n📋 Statistiques:")
+        print(f"   - Annonces avec chambres: {df['nb_chambres'].notna().sum()}")
+        print(f"   - Annonces avec surface: {df['surface_m2'].notna().sum()}")
+        print(f"   - Annonces avec date: {df['date_publication'].notna().sum()}")
+        
+        print("\n👀 Aperçu des données nettoyées:")
+        print(df[['titre', 'prix', 'type_bien', 'nb_chambres', 'surface_m2']].head(10))
+        
+        # Fusion avec les données existantes
+        print("\n🔄 Fusion avec les données existantes...")
+        
+        # Charger wassit et lagence
+        fichiers_existants = []
+        if os.path.exists('data/raw/wassit_immobilier.csv'):
+            df_wassit = pd.read_csv('data/raw/wassit_immobilier.csv')
+            fichiers_existants.append(df_wassit)
+            print(f"✅ wassit: {len(df_wassit)} annonces")
+        
+        if os.path.exists('data/raw/lagence.csv'):
+            df_lagence = pd.read_csv('data/raw/lagence.csv')
+            fichiers_existants.append(df_lagence)
+            print(f"✅ lagence: {len(df_lagence)} annonces")
+        
+        # Fusionner tout
+        fichiers_existants.append(df)
+        df_final = pd.concat(fichiers_existants, ignore_index=True, sort=False)
+        
+        # Sauvegarder le final
+        df_final.to_csv('data_raw.csv', index=False, encoding='utf-8-sig')
+        print(f"\n✅ Fichier final: data_raw.csv avec {len(df_final)} annonces")
+        
+    else:
+        print("❌ Aucune donnée")
+
+    instrumentation.report(SOURCE)
+
+if __name__ == '__main__':
+    main()
@@ -1,72 +1,82 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import pandas as pd
 import re
 from datetime import datetime
 import os
 import csv
+from gazetteer import resoudre_quartier
+from listing import Listing, listings_vers_dataframe
+import browser_pool
+import page_waits
+import instrumentation
+import page_archive
 
-print("="*60)
-print("SCRAPING ELMINASSA.COM - VERSION FINALE")
-print("="*60)
+SOURCE = 'elminassa.com'
+URL_LISTE = "https://www.elminassa.com/list"
+CARTE = 'div.swiper-slide'  # Conteneur d'une annonce
 
-# Configuration du navigateur
-options = Options()
-options.add_argument('--headless')
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+# Colonnes du CSV de sortie (champs du Listing, dans cet ordre)
+COLONNES = ['source', 'titre', 'prix', 'type_bien', 'quartier', 'surface_m2', 'point_repere',
+            'vendeur', 'date_publication', 'nb_images', 'image_url', 'date_scraping', 'ville',
+            'nb_chambres', 'nb_sdb', 'description', 'id_unique', 'url', 'type_annonce', 'nb_vues',
+            'nb_pieces_total', 'meuble']
 
-print(" Lancement du navigateur...")
-driver = webdriver.Chrome(options=options)
-
-try:
-    url = "https://www.elminassa.com/list"
-    print(f"Chargement de {url}...")
-    
-    driver.get(url)
-    time.sleep(5)
-    
-    # Gérer la popup de localisation si elle apparaît
-    try:
-        for texte in ['حسنا', 'OK', 'Fermer']:
-            try:
-                btn = driver.find_element(By.XPATH, f"//button[contains(text(), '{texte}')]")
-                btn.click()
-                print(f"✅ Popup fermée")
-                time.sleep(2)
-                break
-            except:
-                continue
-    except:
-        pass
-    
-    # CLIQUER SUR "تحميل المزيد" (Charger plus) jusqu'à épuisement
-    clics = 0
-    while True:
+def fetch():
+    """Charge la liste et clique sur "Charger plus" jusqu'au bout : génère (url, HTML rendu)"""
+    # Navigateur headless chaud du pool partagé (images et polices bloquées)
+    with browser_pool.browser() as driver:
+        print(f"Chargement de {URL_LISTE}...")
+        
+        browser_pool.load(driver, URL_LISTE, SOURCE)
+        page_waits.wait_for(driver, page_waits.selector_present(CARTE), timeout=15, fixed=5,
+                            label="elminassa: annonces initiales")
+        
+        # Gérer la popup de localisation si elle apparaît
         try:
-            # Chercher le bouton de chargement
-            load_more = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'تحميل المزيد')]"))
-            )
-            driver.execute_script("arguments[0].scrollIntoView(true);", load_more)
-            time.sleep(1)
-            load_more.click()
-            clics += 1
-            print(f" Clic {clics} - تحميل المزيد")
-            time.sleep(3)
+            for texte in ['حسنا', 'OK', 'Fermer']:
+                try:
+                    btn = driver.find_element(By.XPATH, f"//button[contains(text(), '{texte}')]")
+                    btn.click()
+                    print(f"✅ Popup fermée")
+                    page_waits.wait_for(driver, page_waits.element_gone(btn), timeout=4, fixed=2,
+                                        label="elminassa: popup")
+                    break
+                except:
+                    continue
         except:
-            print(f"✅ Plus de bouton après {clics} clics")
-            break
-    
-    # Récupérer le HTML final
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+            pass
+        
+        # CLIQUER SUR "تحميل المزيد" (Charger plus) jusqu'à épuisement
+        clics = 0
+        while True:
+            try:
+                # Chercher le bouton de chargement
+                load_more = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'تحميل المزيد')]"))
+                )
+                driver.execute_script("arguments[0].scrollIntoView(true);", load_more)
+                page_waits.wait_for(driver, page_waits.in_viewport(load_more), timeout=2, fixed=1,
+                                    label="elminassa: défilement")
+                avant = page_waits.count(driver, CARTE)
+                load_more.click()
+                clics += 1
+                print(f" Clic {clics} - تحميل المزيد")
+                # Le clic suivant attend que le lot soit arrivé (nombre d'annonces en hausse)
+                page_waits.wait_for(driver, page_waits.count_increased(CARTE, avant), timeout=10,
+                                    fixed=3, label="elminassa: lot suivant")
+            except:
+                print(f"✅ Plus de bouton après {clics} clics")
+                break
+        
+        # Récupérer le HTML final
+        yield URL_LISTE, driver.page_source
+
+def parse(url, html):
+    """Extrait les annonces de la liste complète"""
+    with instrumentation.timer(SOURCE, 'parse'):
+        soup = BeautifulSoup(html, 'html.parser')
     
     # Trouver TOUS les conteneurs d'annonces (swiper-slide)
     # Chaque annonce est dans un div avec classe 'swiper-slide'
@@ -76,7 +86,7 @@ try:
     
     donnees = []
     
-    for i, annonce in enumerate(annonces):
+    for i, annonce in enumerate(instrumentation.each(SOURCE, 'extract', annonces)):
         try:
             # ----- PRIX -----
             prix_elem = annonce.find('span', class_='myTopRight2')
@@ -122,70 +132,65 @@ try:
                 surface_m2 = surface_match.group(1) + " m²"
             
             # ----- EXTRAIRE LE QUARTIER DU TITRE -----
-            quartier = "Non spécifié"
-            quartiers = ['تفرغ زينة', 'دار النعيم', 'لكصر', 'الميناء', 'السبخة', 'تيارت', 'الرياض', 'عرفات', 'توجنين']
-            for q in quartiers:
-                if q in titre:
-                    # Convertir en français
-                    quartier_map = {
-                        'تفرغ زينة': 'Tevragh Zeina',
-                        'دار النعيم': 'Dar Naim',
-                        'لكصر': 'Ksar',
-                        'الميناء': 'El Mina',
-                        'السبخة': 'Sebkha',
-                        'تيارت': 'Teyarett',
-                        'الرياض': 'Riyad',
-                        'عرفات': 'Arafat',
-                        'توجنين': 'Toujounine'
-                    }
-                    quartier = quartier_map.get(q, q)
-                    break
+            # Noms arabes et français ramenés au nom canonique par le gazetteer
+            quartier = resoudre_quartier(titre) or "Non spécifié"
             
             # Créer l'annonce
-            annonce_data = {
-                'source': 'elminassa.com',
-                'titre': titre,
-                'prix': prix,
-                'type_bien': type_bien,
-                'quartier': quartier,
-                'surface_m2': surface_m2,
-                'point_repere': 'Non spécifié',
-                'vendeur': 'elminassa.com',
-                'date_publication': 'Non spécifiée',
-                'nb_images': '1',
-                'image_url': image_url,
-                'date_scraping': datetime.now().strftime('%Y-%m-%d'),
-                'ville': 'Nouakchott',
-                'nb_chambres': 'Non spécifié',
-                'nb_sdb': 'Non spécifié',
-                'description': titre,
-                'id_unique': str(i+1),
-                'url': url_annonce,
-                'type_annonce': 'Non spécifié',
-                'nb_vues': 'Non spécifié',
-                'nb_pieces_total': 'Non spécifié',
-                'meuble': 'Non spécifié',
-            }
+            annonce_data = Listing(
+                source=SOURCE,
+                titre=titre,
+                prix=prix,
+                type_bien=type_bien,
+                quartier=quartier,
+                surface_m2=surface_m2,
+                vendeur='elminassa.com',
+                nb_images='1',
+                image_url=image_url,
+                date_scraping=datetime.now().strftime('%Y-%m-%d'),
+                ville='Nouakchott',
+                description=titre,
+                id_unique=str(i+1),
+                url=url_annonce,
+            )
             
             donnees.append(annonce_data)
-            print(f"  ✅ {titre[:50]}... - {prix}")
+            instrumentation.progress(SOURCE).update(message=f"{titre[:50]}... - {prix}")
             
         except Exception as e:
+            instrumentation.count(SOURCE, 'erreurs')
             print(f"  ❌ Erreur annonce {i}: {e}")
             continue
     
+    return donnees
+
+def main():
+    # --replay [archive] : réextraction depuis l'archive des pages, sans réseau
+    replay = page_archive.replay_arg()
+    print("="*60)
+    print("SCRAPING ELMINASSA.COM - VERSION FINALE")
+    print("="*60)
+    
+    donnees = []
+    for url, html in instrumentation.pages(SOURCE, page_archive.source_pages(SOURCE, fetch, replay)):
+        donnees.extend(parse(url, html))
+    
     print(f"\nTotal annonces extraites: {len(donnees)}")
     
     # Sauvegarde
     if donnees:
-        df = pd.DataFrame(donnees)
-        df.to_csv('data_raw/elminassa.csv', index=False, encoding='utf-8-sig')
+        df = listings_vers_dataframe(donnees, COLONNES)
+        with instrumentation.timer(SOURCE, 'write'):
+            df.to_csv('data_raw/elminassa.csv', index=False, encoding='utf-8-sig')
         print(f"Données sauvegardées dans data_raw/elminassa.csv")
         
         
     else:
         print("❌ Aucune donnée extraite")
-        
-finally:
-    driver.quit()
-    print("\n🎉 Scraping terminé!")
\ No newline at end of file
+    
+    browser_pool.log_stats(print)
+    page_waits.log_savings(print)
+    instrumentation.report(SOURCE)
+    print("\n🎉 Scraping terminé!")
+
+if __name__ == '__main__':
+    main()
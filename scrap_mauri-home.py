@@ -1,47 +1,48 @@
-import time
 import pandas as pd
 import re
 from datetime import datetime
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from listing import Listing, listings_vers_dataframe
+import browser_pool
+import page_waits
+import instrumentation
+import page_archive
 
-print("="*60)
-print("🏠 SCRAPING MAURI-HOME.COM - VERSION SELENIUM")
-print("="*60)
+SOURCE = 'mauri-home.com'
+URL_RECHERCHE = "https://www.mauri-home.com/recherche"
 
-# Configuration du navigateur invisible (headless)
-options = Options()
-options.add_argument('--headless')  # Pour que le navigateur ne s'affiche pas
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+# Colonnes du CSV de sortie (champs du Listing, dans cet ordre)
+COLONNES = ['source', 'titre', 'prix', 'type_annonce', 'ville', 'quartier', 'nb_chambres', 'nb_sdb',
+            'surface_m2', 'date_publication', 'date_scraping', 'url', 'image_url']
 
-print("🚀 Lancement du navigateur...")
-driver = webdriver.Chrome(options=options)
+def fetch():
+    """Charge la page de recherche dans Chrome : génère (url, HTML rendu)"""
+    # Navigateur headless chaud du pool partagé (images et polices bloquées)
+    with browser_pool.browser() as driver:
+        print(f"📄 Chargement de {URL_RECHERCHE}...")
+        
+        browser_pool.load(driver, URL_RECHERCHE, SOURCE)
+        
+        # Attendre que les annonces soient chargées (max 10 secondes)
+        print("⏳ Attente du chargement des annonces...")
+        wait = WebDriverWait(driver, 10)
+        wait.until(EC.presence_of_element_located((By.TAG_NAME, "article")))
+        
+        # Pour être sûr que tout est chargé : plus aucune requête en cours
+        page_waits.wait_for(driver, page_waits.network_idle(), timeout=5, fixed=3,
+                            label="mauri-home: réseau au repos")
+        
+        # Récupérer le HTML complet après exécution JavaScript
+        yield URL_RECHERCHE, driver.page_source
 
-try:
-    url = "https://www.mauri-home.com/recherche"
-    print(f"📄 Chargement de {url}...")
-    
-    driver.get(url)
-    
-    # Attendre que les annonces soient chargées (max 10 secondes)
-    print("⏳ Attente du chargement des annonces...")
-    wait = WebDriverWait(driver, 10)
-    wait.until(EC.presence_of_element_located((By.TAG_NAME, "article")))
-    
-    # Petit pause pour être sûr que tout est chargé
-    time.sleep(3)
-    
-    # Récupérer le HTML complet après exécution JavaScript
-    html = driver.page_source
-    soup = BeautifulSoup(html, 'html.parser')
+def parse(url, html):
+    """Extrait les annonces de la page de recherche"""
+    with instrumentation.timer(SOURCE, 'parse'):
+        soup = BeautifulSoup(html, 'html.parser')
     
     # Trouver toutes les annonces
     annonces = soup.find_all('article', class_='group')
@@ -52,11 +53,11 @@ try:
         # Debug: afficher les premières balises pour comprendre
         print("📋 Aperçu du HTML (premiers 500 caractères):")
         print(html[:500])
-        exit()
+        return []
     
     donnees = []
     
-    for annonce in annonces:
+    for annonce in instrumentation.each(SOURCE, 'extract', annonces):
         try:
             # ----- TITRE -----
             titre_elem = annonce.find('h3', class_=re.compile('text-lg.*font-bold'))
@@ -134,32 +135,46 @@ try:
                 elif link['href'].startswith('http'):
                     url_annonce = link['href']
             
-            donnees.append({
-                'source': 'mauri-home.com',
-                'titre': titre,
-                'prix': prix,
-                'type_annonce': type_annonce,
-                'ville': 'Nouakchott',
-                'quartier': quartier,
-                'nb_chambres': chambres,
-                'nb_sdb': sdb,
-                'surface_m2': surface,
-                'date_publication': 'Non spécifiée',
-                'date_scraping': datetime.now().strftime('%Y-%m-%d'),
-                'url': url_annonce,
-                'image_url': image_url,
-            })
+            donnees.append(Listing(
+                source=SOURCE,
+                titre=titre,
+                prix=prix,
+                type_annonce=type_annonce,
+                ville='Nouakchott',
+                quartier=quartier,
+                nb_chambres=chambres,
+                nb_sdb=sdb,
+                surface_m2=surface,
+                date_scraping=datetime.now().strftime('%Y-%m-%d'),
+                url=url_annonce,
+                image_url=image_url,
+            ))
             
-            print(f"  ✅ {titre[:40]}... - {prix} - {quartier}")
+            instrumentation.progress(SOURCE).update(message=f"{titre[:40]}... - {prix} - {quartier}")
             
         except Exception as e:
+            instrumentation.count(SOURCE, 'erreurs')
             print(f"  ❌ Erreur: {e}")
             continue
     
-    df = pd.DataFrame(donnees)
+    return donnees
+
+def main():
+    # --replay [archive] : réextraction depuis l'archive des pages, sans réseau
+    replay = page_archive.replay_arg()
+    print("="*60)
+    print("🏠 SCRAPING MAURI-HOME.COM - VERSION SELENIUM")
+    print("="*60)
+    
+    donnees = []
+    for url, html in instrumentation.pages(SOURCE, page_archive.source_pages(SOURCE, fetch, replay)):
+        donnees.extend(parse(url, html))
+    
+    df = listings_vers_dataframe(donnees, COLONNES)
     
     if len(df) > 0:
-        df.to_csv('data/raw/mauri_home.csv', index=False, encoding='utf-8-sig')
+        with instrumentation.timer(SOURCE, 'write'):
+            df.to_csv('data/raw/mauri_home.csv', index=False, encoding='utf-8-sig')
         print(f"\n💾 Sauvegardé {len(df)} annonces dans data/raw/mauri_home.csv")
         
         # Fusion avec les données existantes
@@ -175,7 +190,11 @@ try:
             
     else:
         print("❌ Aucune donnée extraite")
-        
-finally:
-    driver.quit()
-    print("\n Scraping terminé!")
\ No newline at end of file
+    
+    browser_pool.log_stats(print)
+    page_waits.log_savings(print)
+    instrumentation.report(SOURCE)
+    print("\n Scraping terminé!")
+
+if __name__ == '__main__':
+    main()
@@ -1,186 +1,224 @@
-import time
 import pandas as pd
 import re
 from datetime import datetime
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from gazetteer import resoudre_quartier
+from listing import Listing, listings_vers_dataframe
+import browser_pool
+import page_waits
+import instrumentation
+import page_archive
+import watermarks
 
-print("="*60)
-print("SCRAPING MENAZEL.ORG - VERSION SELENIUM")
-print("="*60)
+SOURCE = 'menazel.org'
+PAGES = range(1, 8)  # Pages de résultats (tri du plus récent au plus ancien)
+PAGES_PAR_VAGUE = 2  # Crawl incrémental : pages chargées ensemble avant de tester le repère
+LIEN_ANNONCE = 'a[href^="/fr/property/"]'
 
-# Configuration du navigateur
-options = Options()
-# options.add_argument('--headless')  # Décommente pour exécuter en arrière-plan
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+# Colonnes du CSV de sortie (champs du Listing, dans cet ordre)
+COLONNES = ['source', 'url', 'titre', 'prix', 'type_bien', 'quartier', 'surface_m2', 'vendeur',
+            'date_publication', 'nb_images', 'image_url', 'date_scraping', 'ville', 'nb_chambres',
+            'nb_sdb', 'description', 'id_unique', 'telephone', 'whatsapp']
 
-print("Lancement du navigateur...")
-driver = webdriver.Chrome(options=options)
+def url_page(page):
+    return f"https://menazel.org/fr/search?page={page}&sort=Newest"
 
-try:
-    toutes_annonces = []
+def fetch(pages=PAGES):
+    """Charge les pages de résultats en parallèle (un onglet par page).
+
+    Génère (numéro de page, HTML rendu) dans l'ordre des pages. Crawl complet :
+    toutes les pages en même temps. Crawl incrémental (repère existant) : par
+    vagues de PAGES_PAR_VAGUE pages, arrêt dès que parse() a atteint les
+    annonces du crawl précédent.
+    """
+    pages = list(pages)
+    marque = watermarks.start(SOURCE)
+    vague = PAGES_PAR_VAGUE if marque.incremental else len(pages)
     
-    # Scraper les pages 1 à 7
-    for page in range(1, 8):
-        url = f"https://menazel.org/fr/search?page={page}&sort=Newest"
-        print(f"\nChargement page {page}/7: {url}")
-        
-        driver.get(url)
-        
-        # Attendre que les annonces soient chargées
-        print("⏳ Attente du chargement des annonces...")
-        time.sleep(5)
-        
+    def rendre(driver):
+        # Attendre que les annonces soient chargées (rendu JavaScript)
+        page_waits.wait_for(driver, page_waits.selector_present(LIEN_ANNONCE), timeout=15, fixed=5,
+                            label="menazel: annonces")
         # Faire défiler la page pour déclencher le chargement
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        
-        # Récupérer le HTML après exécution JavaScript
-        html = driver.page_source
+        page_waits.wait_for(driver, page_waits.network_idle(), timeout=4, fixed=2,
+                            label="menazel: défilement")
+    
+    # Navigateur headless chaud du pool partagé (images et polices bloquées)
+    with browser_pool.browser() as driver:
+        for debut in range(0, len(pages), vague):
+            numeros = {url_page(page): page for page in pages[debut:debut + vague]}
+            lot = list(numeros.values())
+            print(f"\nChargement des pages {lot[0]} à {lot[-1]} en parallèle...")
+            for url, html in browser_pool.load_parallel(driver, list(numeros), SOURCE, ready=rendre):
+                print(f"\nPage {numeros[url]}/{pages[-1]}: {url}")
+                # HTML après exécution JavaScript
+                yield numeros[url], html
+            if marque.reached:
+                print(f"\n🛑 Annonces du crawl précédent atteintes page {lot[-1]} : arrêt de la pagination")
+                break
+    marque.commit()
+
+def parse(page, html):
+    """Extrait les annonces d'une page de résultats"""
+    with instrumentation.timer(SOURCE, 'parse'):
         soup = BeautifulSoup(html, 'html.parser')
-        
-        # Chercher les annonces
-        annonces = soup.find_all('div', class_='group')
-        
-        if not annonces:
-            print(f" Aucune annonce trouvée page {page}")
-            # Afficher un extrait du HTML pour debug
-            print(" Extrait du HTML:")
-            print(html[:500])
-            continue
-        
-        print(f"🔍 Trouvé {len(annonces)} annonces sur cette page")
-        
-        for annonce in annonces:
-            try:
-                # URL et ID
-                link = annonce.find('a', href=True)
-                if link and link['href'].startswith('/fr/property/'):
-                    url_annonce = "https://menazel.org" + link['href']
-                    id_unique = link['href'].split('/')[-1]
-                else:
-                    continue
-                
-                # Titre
-                titre_elem = annonce.find('a', class_='text-lg')
-                titre = titre_elem.text.strip() if titre_elem else "Non spécifié"
-                
-                # Prix
-                prix_span = annonce.find('span', attrs={'dir': 'ltr'})
-                if prix_span:
-                    prix_texte = prix_span.text.strip()
-                    prix_texte = re.sub(r'[^\d]', '', prix_texte)
-                    prix = f"{prix_texte} MRU"
-                else:
-                    prix = "Non spécifié"
-                
-                # Type de bien
-                type_bien = "Non spécifié"
-                if 'appartement' in titre.lower():
-                    type_bien = 'Appartement'
-                elif 'villa' in titre.lower():
-                    type_bien = 'Villa'
-                elif 'terrain' in titre.lower():
-                    type_bien = 'Terrain'
-                elif 'studio' in titre.lower():
-                    type_bien = 'Studio'
-                
-                # Chambres
-                nb_chambres = "Non spécifié"
-                chambres_i = annonce.find('i', class_='mdi-door-sliding')
-                if chambres_i:
-                    span = chambres_i.find_next('span')
-                    if span:
-                        nb_chambres = span.text.strip()
-                
-                # Salles de bain
-                nb_sdb = "Non spécifié"
-                sdb_i = annonce.find('i', class_='mdi-shower')
-                if sdb_i:
-                    span = sdb_i.find_next('span')
-                    if span:
-                        nb_sdb = span.text.strip()
-                
-                # Image
-                image_url = "Non spécifié"
-                img = annonce.find('img')
-                if img and img.has_attr('src'):
-                    src = img['src']
-                    if src.startswith('http'):
-                        image_url = src
-                    else:
-                        image_url = "https://menazel.org" + src
-                
-                # Contact
-                telephone = "Non spécifié"
-                whatsapp = "Non spécifié"
-                for link in annonce.find_all('a', href=True):
-                    href = link['href']
-                    if href.startswith('tel:'):
-                        telephone = href.replace('tel:', '')
-                    elif 'wa.me' in href:
-                        whatsapp = href
-                
-                # Quartier (dans le titre)
-                quartier = "Non spécifié"
-                for q in ['Tevragh Zeina', 'Arafat', 'Dar Naim', 'Teyarett', 'Toujounine']:
-                    if q in titre:
-                        quartier = q
-                        break
-                
-                # Surface
-                surface_m2 = "Non spécifié"
-                surface_match = re.search(r'(\d+)\s*m[²2]', titre)
-                if surface_match:
-                    surface_m2 = surface_match.group(1) + " m²"
-                
-                toutes_annonces.append({
-                    'source': 'menazel.org',
-                    'url': url_annonce,
-                    'titre': titre,
-                    'prix': prix,
-                    'type_bien': type_bien,
-                    'quartier': quartier,
-                    'surface_m2': surface_m2,
-                    'vendeur': 'Non spécifié',
-                    'date_publication': 'Non spécifiée',
-                    'nb_images': '1',
-                    'image_url': image_url,
-                    'date_scraping': datetime.now().strftime('%Y-%m-%d'),
-                    'ville': 'Nouakchott',
-                    'nb_chambres': nb_chambres,
-                    'nb_sdb': nb_sdb,
-                    'description': 'Non spécifié',
-                    'id_unique': id_unique,
-                    'telephone': telephone,
-                    'whatsapp': whatsapp,
-                })
-                
-                print(f"  ✅ {titre[:30]}... - {prix}")
-                
-            except Exception as e:
-                print(f"  ❌ Erreur: {e}")
+    
+    # Chercher les annonces
+    annonces = soup.find_all('div', class_='group')
+    
+    if not annonces:
+        print(f" Aucune annonce trouvée page {page}")
+        # Afficher un extrait du HTML pour debug
+        print(" Extrait du HTML:")
+        print(html[:500])
+        return []
+    
+    print(f"🔍 Trouvé {len(annonces)} annonces sur cette page")
+    
+    donnees = []
+    marque = watermarks.current(SOURCE)
+    
+    for annonce in instrumentation.each(SOURCE, 'extract', annonces):
+        try:
+            # URL et ID
+            link = annonce.find('a', href=True)
+            if link and link['href'].startswith('/fr/property/'):
+                url_annonce = "https://menazel.org" + link['href']
+                id_unique = link['href'].split('/')[-1]
+                # Repère : les cartes n'ont pas de date, seul l'id compte
+                marque.see(id_unique)
+            else:
                 continue
-        
-        # Pause entre les pages
-        if page < 7:
-            print(f"Pause avant page {page+1}...")
-            time.sleep(3)
+            
+            # Titre
+            titre_elem = annonce.find('a', class_='text-lg')
+            titre = titre_elem.text.strip() if titre_elem else "Non spécifié"
+            
+            # Prix
+            prix_span = annonce.find('span', attrs={'dir': 'ltr'})
+            if prix_span:
+                prix_texte = prix_span.text.strip()
+                prix_texte = re.sub(r'[^\d]', '', prix_texte)
+                prix = f"{prix_texte} MRU"
+            else:
+                prix = "Non spécifié"
+            
+            # Type de bien
+            type_bien = "Non spécifié"
+            if 'appartement' in titre.lower():
+                type_bien = 'Appartement'
+            elif 'villa' in titre.lower():
+                type_bien = 'Villa'
+            elif 'terrain' in titre.lower():
+                type_bien = 'Terrain'
+            elif 'studio' in titre.lower():
+                type_bien = 'Studio'
+            
+            # Chambres
+            nb_chambres = "Non spécifié"
+            chambres_i = annonce.find('i', class_='mdi-door-sliding')
+            if chambres_i:
+                span = chambres_i.find_next('span')
+                if span:
+                    nb_chambres = span.text.strip()
+            
+            # Salles de bain
+            nb_sdb = "Non spécifié"
+            sdb_i = annonce.find('i', class_='mdi-shower')
+            if sdb_i:
+                span = sdb_i.find_next('span')
+                if span:
+                    nb_sdb = span.text.strip()
+            
+            # Image
+            image_url = "Non spécifié"
+            img = annonce.find('img')
+            if img and img.has_attr('src'):
+                src = img['src']
+                if src.startswith('http'):
+                    image_url = src
+                else:
+                    image_url = "https://menazel.org" + src
+            
+            # Contact
+            telephone = "Non spécifié"
+            whatsapp = "Non spécifié"
+            for link in annonce.find_all('a', href=True):
+                href = link['href']
+                if href.startswith('tel:'):
+                    telephone = href.replace('tel:', '')
+                elif 'wa.me' in href:
+                    whatsapp = href
+            
+            # Quartier (dans le titre)
+            quartier = resoudre_quartier(titre) or "Non spécifié"
+            
+            # Surface
+            surface_m2 = "Non spécifié"
+            surface_match = re.search(r'(\d+)\s*m[²2]', titre)
+            if surface_match:
+                surface_m2 = surface_match.group(1) + " m²"
+            
+            donnees.append(Listing(
+                source=SOURCE,
+                url=url_annonce,
+                titre=titre,
+                prix=prix,
+                type_bien=type_bien,
+                quartier=quartier,
+                surface_m2=surface_m2,
+                nb_images='1',
+                image_url=image_url,
+                date_scraping=datetime.now().strftime('%Y-%m-%d'),
+                ville='Nouakchott',
+                nb_chambres=nb_chambres,
+                nb_sdb=nb_sdb,
+                id_unique=id_unique,
+                telephone=telephone,
+                whatsapp=whatsapp,
+            ))
+            
+            instrumentation.progress(SOURCE).update(message=f"{titre[:30]}... - {prix}")
+            
+        except Exception as e:
+            instrumentation.count(SOURCE, 'erreurs')
+            print(f"  ❌ Erreur: {e}")
+            continue
+    
+    return donnees
+
+def main():
+    # --replay [archive] : réextraction depuis l'archive des pages, sans réseau
+    replay = page_archive.replay_arg()
+    # --full : toutes les pages, même au-delà des annonces du crawl précédent
+    watermarks.FULL_CRAWL = watermarks.full_arg()
+    print("="*60)
+    print("SCRAPING MENAZEL.ORG - VERSION SELENIUM")
+    print("="*60)
+    
+    toutes_annonces = []
+    for page, html in instrumentation.pages(SOURCE, page_archive.source_pages(SOURCE, fetch, replay)):
+        toutes_annonces.extend(parse(page, html))
     
     # Sauvegarde
-    df = pd.DataFrame(toutes_annonces)
+    df = listings_vers_dataframe(toutes_annonces, COLONNES)
     
     if len(df) > 0:
-        df.to_csv('data_raw/menazel.csv', index=False, encoding='utf-8-sig')
-        print(f"\n Sauvegardé {len(df)} annonces")
+        # Un crawl incrémental ne voit que les nouvelles annonces : on les fusionne
+        # avec celles déjà sauvegardées (même id_unique -> version la plus récente)
+        nouvelles = len(df)
+        if os.path.exists('data_raw/menazel.csv'):
+            df_menazel = pd.read_csv('data_raw/menazel.csv', dtype=str, encoding='utf-8-sig')
+            df = pd.concat([df_menazel, df], ignore_index=True, sort=False)
+            df = df.drop_duplicates(subset=['id_unique'], keep='last')
+        with instrumentation.timer(SOURCE, 'write'):
+            df.to_csv('data_raw/menazel.csv', index=False, encoding='utf-8-sig')
+        print(f"\n Sauvegardé {nouvelles} annonces ({len(df)} dans data_raw/menazel.csv)")
         
         # Fusion avec data_raw.csv
         if os.path.exists('data_raw/final_data_raw.csv'):
@@ -194,7 +232,11 @@ try:
             print(f"✅ Nouveau fichier final créé: {len(df)} annonces")
     else:
         print("❌ Aucune donnée récupérée")
-        
-finally:
-    driver.quit()
-    print("\n Scraping terminé!")
\ No newline at end of file
+    
+    browser_pool.log_stats(print)
+    page_waits.log_savings(print)
+    instrumentation.report(SOURCE)
+    print("\n Scraping terminé!")
+
+if __name__ == '__main__':
+    main()
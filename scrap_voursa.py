@@ -1,44 +1,35 @@
-import time
 import pandas as pd
 import re
 from datetime import datetime, timedelta
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import csv
+from record_sink import CsvRecordSink
+from gazetteer import resoudre_quartier, resoudre_ville
+from listing import Listing
+import browser_pool
+import page_waits
+import instrumentation
+import page_archive
+import watermarks
 
-print("="*60)
-print(" SCRAPING VOURSA - 50 ANNONCES À LA FOIS")
-print("="*60)
-
-
-# Configuration du navigateur
-options = Options()
-options.add_argument('--headless')
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-print(" Lancement du navigateur...")
-driver = webdriver.Chrome(options=options)
+SOURCE = 'voursa.com'
+URL_LISTE = "https://voursa.com/FR/categories/real_estate"
 
 # Fichier de sortie
 fichier_sortie = 'data/raw/voursa.csv'
 
-# Créer le fichier avec en-tête s'il n'existe pas
-if not os.path.exists(fichier_sortie):
-    with open(fichier_sortie, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            'source', 'url', 'titre', 'prix', 'type_bien', 'quartier',
-            'surface_m2', 'point_repere', 'vendeur', 'date_publication',
-            'nb_images', 'image_url', 'date_scraping', 'ville'
-        ])
+colonnes_sortie = [
+    'source', 'url', 'titre', 'prix', 'type_bien', 'quartier',
+    'surface_m2', 'point_repere', 'vendeur', 'date_publication',
+    'nb_images', 'image_url', 'date_scraping', 'ville'
+]
+# Mode incrémental : à chaque clic on ne lit que les cartes ajoutées depuis le
+# clic précédent, puis on masque celles déjà traitées dans le DOM vivant
+ELAGUER_DOM = True  # Mettre False pour garder les cartes lues visibles
+LONGUEUR_MAX_LOCALISATION = 40  # Textes plus longs : titre, description, pas la localisation
 
 def convertir_date_relative(date_texte):
     """Convertit 'il y a X heures/jours/semaines/mois/ans' en date réelle"""
@@ -100,13 +91,31 @@ def convertir_date_relative(date_texte):
     
     return date_texte
 
+def localisation_carte(annonce, titre):
+    """(quartier, ville) d'une carte : ses textes courts isolés (la localisation), sinon le titre.
+
+    Jamais le texte complet de la carte : "route de Rosso" dans le point de
+    repère ou la description donnerait un faux quartier.
+    """
+    quartier = ville = None
+    for texte in annonce.stripped_strings:
+        # "Superficie · 200", "Point le plus proche · ..." : libellés, pas la localisation
+        if '·' in texte or len(texte) > LONGUEUR_MAX_LOCALISATION or texte == titre:
+            continue
+        quartier = quartier or resoudre_quartier(texte)
+        ville = ville or resoudre_ville(texte)
+        if quartier and ville:
+            break
+    return quartier or resoudre_quartier(titre) or "Non spécifié", ville or "Nouakchott"
+
 def extraire_toutes_annonces(soup, urls_deja_vues):
     """Extrait TOUTES les annonces présentes dans la page"""
     
     annonces = soup.find_all('div', class_='mb-6')
     nouvelles_annonces = []
+    marque = watermarks.current(SOURCE)
     
-    for annonce in annonces:
+    for annonce in instrumentation.each(SOURCE, 'extract', annonces):
         try:
             # URL
             link = annonce.find('a', href=True)
@@ -114,6 +123,14 @@ def extraire_toutes_annonces(soup, urls_deja_vues):
                 continue
             url_annonce = "https://voursa.com" + link['href']
             
+            # Date relative
+            date_elem = annonce.find('span', string=re.compile(r'il y a'))
+            date_relative = date_elem.text.strip() if date_elem else "Non spécifiée"
+            date_publication = convertir_date_relative(date_relative)
+            
+            # Repère du crawl (même pour les cartes déjà vues : ce sont elles qui arrêtent le crawl)
+            marque.see(url_annonce, date_publication)
+            
             # Ignorer si déjà vue
             if url_annonce in urls_deja_vues:
                 continue
@@ -126,22 +143,13 @@ def extraire_toutes_annonces(soup, urls_deja_vues):
             prix_elem = annonce.find('p', class_='text-primaryBlue')
             prix = prix_elem.text.strip() if prix_elem else "Non spécifié"
             
-            # Date relative
-            date_elem = annonce.find('span', string=re.compile(r'il y a'))
-            date_relative = date_elem.text.strip() if date_elem else "Non spécifiée"
-            date_publication = convertir_date_relative(date_relative)
-            
             # Type de bien
             type_elem = annonce.find('span', class_='bg-gray-200')
             type_bien = type_elem.text.strip() if type_elem else "Non spécifié"
             
-            # Quartier
+            # Quartier et ville : champ de localisation de la carte, sinon le titre
             texte_annonce = annonce.get_text(" ", strip=True)
-            quartier = "Non spécifié"
-            for q in ['Tevragh Zeina', 'Arafat', 'Dar Naim', 'Teyarett', 'Toujounine']:
-                if q in texte_annonce:
-                    quartier = q
-                    break
+            quartier, ville = localisation_carte(annonce, titre)
             
             # Vendeur
             vendeur = "Non spécifié"
@@ -174,108 +182,199 @@ def extraire_toutes_annonces(soup, urls_deja_vues):
                 src = img_tag['src']
                 image_url = "https://voursa.com" + src if src.startswith('/_next') else src
             
-            nouvelles_annonces.append({
-                'source': 'voursa.com',
-                'url': url_annonce,
-                'titre': titre,
-                'prix': prix,
-                'type_bien': type_bien,
-                'quartier': quartier,
-                'surface_m2': surface,
-                'point_repere': point_repere,
-                'vendeur': vendeur,
-                'date_publication': date_publication,
-                'nb_images': nb_images,
-                'image_url': image_url,
-                'date_scraping': datetime.now().strftime('%Y-%m-%d'),
-                'ville': 'Nouakchott'
-            })
+            nouvelles_annonces.append(Listing(
+                source=SOURCE,
+                url=url_annonce,
+                titre=titre,
+                prix=prix,
+                type_bien=type_bien,
+                quartier=quartier,
+                surface_m2=surface,
+                point_repere=point_repere,
+                vendeur=vendeur,
+                date_publication=date_publication,
+                nb_images=nb_images,
+                image_url=image_url,
+                date_scraping=datetime.now().strftime('%Y-%m-%d'),
+                ville=ville
+            ))
             
         except Exception as e:
+            instrumentation.count(SOURCE, 'erreurs')
             print(f"❌ Erreur: {e}")
             continue
     
+    if nouvelles_annonces:
+        instrumentation.progress(SOURCE).update(len(nouvelles_annonces),
+                                                message=f"{(nouvelles_annonces[-1].titre or '')[:30]}...")
     return nouvelles_annonces
 
+# Sélecteur des cartes d'annonces
+CARTE = 'div.mb-6'
+
+# Curseur : un MutationObserver (installé au premier appel) range dans une file
+# les cartes ajoutées au DOM ; chaque appel vide la file. Le coût d'un clic ne
+# dépend que des cartes qu'il ajoute, jamais de la taille de la page.
+# On renvoie seulement les cartes de plus haut niveau (une carte imbriquée
+# est déjà contenue dans le HTML de sa parente).
+# Élagage des cartes lues : on vide leurs images et on les masque
+# (display:none, plus de boîtes de mise en page ni d'images décodées) sans
+# toucher à leurs enfants, qui restent ceux du framework du site.
+JS_NOUVELLES_CARTES = """
+const CARTE = arguments[1];
+if (!window.__scrapeFile) {
+    window.__scrapeFile = Array.from(document.querySelectorAll(CARTE));
+    window.__scrapeVues = new WeakSet();
+    new MutationObserver(mutations => {
+        for (const mutation of mutations) {
+            for (const noeud of mutation.addedNodes) {
+                if (noeud.nodeType !== 1) { continue; }
+                if (noeud.matches(CARTE)) { window.__scrapeFile.push(noeud); }
+                noeud.querySelectorAll(CARTE).forEach(carte => window.__scrapeFile.push(carte));
+            }
+        }
+    }).observe(document.body, {childList: true, subtree: true});
+}
+const nouvelles = window.__scrapeFile.splice(0).filter(carte => !window.__scrapeVues.has(carte));
+const ensemble = new Set(nouvelles);
+const html = [];
+for (const carte of nouvelles) {
+    window.__scrapeVues.add(carte);
+    let parent = carte.parentElement;
+    while (parent && !ensemble.has(parent)) { parent = parent.parentElement; }
+    if (!parent) { html.push(carte.outerHTML); }
+}
+if (arguments[0]) {
+    for (const carte of nouvelles) {
+        carte.querySelectorAll('img').forEach(img => { img.removeAttribute('srcset'); img.removeAttribute('src'); });
+        carte.style.display = 'none';
+    }
+}
+return html;
+"""
+
+# Des cartes attendent dans la file du curseur (le lot suivant est arrivé)
+JS_CARTES_EN_ATTENTE = "return !!window.__scrapeFile && window.__scrapeFile.length > 0;"
+
+def extraire_nouvelles_cartes(driver, elaguer=ELAGUER_DOM):
+    """Renvoie le HTML des seules cartes apparues depuis le dernier appel"""
+    html_cartes = driver.execute_script(JS_NOUVELLES_CARTES, elaguer, CARTE)
+    return "".join(html_cartes), len(html_cartes)
+
+def cartes_en_attente(driver):
+    """Condition d'attente : le clic a ajouté de nouvelles cartes"""
+    return driver.execute_script(JS_CARTES_EN_ATTENTE)
+
+def fetch():
+    """Charge la liste puis clique sur "Voir plus" jusqu'au bout.
+
+    Génère (numéro du clic, HTML des cartes ajoutées par ce clic) : chaque
+    lot est traité avant le clic suivant. Crawl incrémental (repère existant,
+    sans --full) : plus de clic dès que parse() a atteint les annonces du
+    crawl précédent.
+    """
+    marque = watermarks.start(SOURCE)
+    # Navigateur headless chaud du pool partagé (images et polices bloquées)
+    with browser_pool.browser() as driver:
+        # Charger la page
+        print(f" Chargement de {URL_LISTE}...")
+        browser_pool.load(driver, URL_LISTE, SOURCE)
+        # Les cartes sont rendues par JavaScript : on attend la première
+        page_waits.wait_for(driver, page_waits.selector_present(CARTE), timeout=15, fixed=5,
+                            label="voursa: cartes initiales")
+        
+        clics = 0
+        while True:
+            # Récupérer seulement les cartes chargées depuis le dernier clic
+            # (coût constant par clic, au lieu de re-parser toute la page)
+            html, nb_cartes = extraire_nouvelles_cartes(driver)
+            print(f"\n {nb_cartes} nouvelles cartes lues")
+            yield clics, html
+            
+            if marque.reached:
+                print(f"\n🛑 Annonces du crawl précédent atteintes après {clics} clics : arrêt")
+                break
+            
+            # Cliquer sur "Voir plus" pour charger la suite
+            try:
+                voir_plus = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Voir plus')]"))
+                )
+                driver.execute_script("arguments[0].scrollIntoView(true);", voir_plus)
+                page_waits.wait_for(driver, page_waits.in_viewport(voir_plus), timeout=2, fixed=1,
+                                    label="voursa: défilement")
+                voir_plus.click()
+                clics += 1
+                print(f" Clic {clics} - Chargement du lot suivant...")
+                # On attend que le curseur ait reçu les premières cartes du lot
+                page_waits.wait_for(driver, cartes_en_attente, timeout=15,
+                                    fixed=4, label="voursa: lot suivant")
+                    
+            except Exception as e:
+                print(f"\n✅ Plus de bouton 'Voir plus' après {clics} clics")
+                break
+    marque.commit()
+
+def parse(clic, html, urls_deja_vues=None):
+    """Extrait les annonces d'un lot de cartes (en ignorant les URLs déjà vues)"""
+    with instrumentation.timer(SOURCE, 'parse'):
+        soup = BeautifulSoup(html, 'html.parser')
+    return extraire_toutes_annonces(soup, urls_deja_vues if urls_deja_vues is not None else set())
+
 # ============================================
 # SCRAPING OPTIMISÉ
 # ============================================
 
-try:
-    # Charger la page
-    url = "https://voursa.com/FR/categories/real_estate"
-    print(f" Chargement de {url}...")
-    driver.get(url)
-    time.sleep(5)
+def main():
+    # --replay [archive] : réextraction depuis l'archive des pages, sans réseau
+    replay = page_archive.replay_arg()
+    # --full : tous les clics "Voir plus", même au-delà des annonces du crawl précédent
+    watermarks.FULL_CRAWL = watermarks.full_arg()
+    print("="*60)
+    print(" SCRAPING VOURSA - 50 ANNONCES À LA FOIS")
+    print("="*60)
     
-    # URLs déjà vues
+    # URLs déjà vues (en rejeu, tout est réextrait et le fichier est réécrit)
     urls_deja_vues = set()
-    if os.path.exists(fichier_sortie):
+    if replay is None and os.path.exists(fichier_sortie):
         df_existant = pd.read_csv(fichier_sortie)
         if 'url' in df_existant.columns:
             urls_deja_vues = set(df_existant['url'].dropna().tolist())
             print(f" {len(urls_deja_vues)} annonces déjà scrappées")
     
     total_annonces = len(urls_deja_vues)
-    clics = 0
+    
+    # Fichier ouvert une seule fois en ajout (en-tête créé s'il est vide),
+    # synchronisé sur disque tous les 50 annonces : plus besoin de backup
+    sink = CsvRecordSink(fichier_sortie, colonnes_sortie, batch_size=50, encoding='utf-8-sig', site=SOURCE,
+                         mode='a' if replay is None else 'w')
     
     print("\n🚀 DÉBUT DU SCRAPING PAR LOTS")
     print("="*60)
     
-    while True:
-        try:
-            # Récupérer le HTML actuel
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # Extraire TOUTES les annonces de la page en UNE SEULE FOIS
-            nouvelles_annonces = extraire_toutes_annonces(soup, urls_deja_vues)
+    try:
+        for clic, html in instrumentation.pages(SOURCE, page_archive.source_pages(SOURCE, fetch, replay)):
+            # Extraire les annonces de ces nouvelles cartes
+            nouvelles_annonces = parse(clic, html, urls_deja_vues)
             
             if nouvelles_annonces:
-                # Sauvegarder TOUTES les nouvelles annonces d'un coup
-                with open(fichier_sortie, 'a', newline='', encoding='utf-8-sig') as f:
-                    writer = csv.writer(f)
-                    for annonce in nouvelles_annonces:
-                        writer.writerow([
-                            annonce['source'], annonce['url'], annonce['titre'],
-                            annonce['prix'], annonce['type_bien'], annonce['quartier'],
-                            annonce['surface_m2'], annonce['point_repere'],
-                            annonce['vendeur'], annonce['date_publication'],
-                            annonce['nb_images'], annonce['image_url'],
-                            annonce['date_scraping'], annonce['ville']
-                        ])
-                        urls_deja_vues.add(annonce['url'])
+                # Ajouter chaque nouvelle annonce une seule fois au fichier
+                for annonce in nouvelles_annonces:
+                    sink.write(annonce)
+                    urls_deja_vues.add(annonce.url)
                 
+                # Progression affichée par parse() (une ligne toutes les quelques secondes)
                 total_annonces += len(nouvelles_annonces)
-                print(f"\n LOT DE {len(nouvelles_annonces)} ANNONCES")
-                print(f" TOTAL: {total_annonces} annonces")
-                print(f"   Exemple: {nouvelles_annonces[0]['titre'][:30]}...")
-            
-            # Cliquer sur "Voir plus" pour charger la suite
-            try:
-                voir_plus = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Voir plus')]"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", voir_plus)
-                time.sleep(1)
-                voir_plus.click()
-                clics += 1
-                print(f" Clic {clics} - Chargement du lot suivant...")
-                time.sleep(4)
-                
-                # Backup périodique
-                if total_annonces % 500 == 0:
-                    df_backup = pd.read_csv(fichier_sortie)
-                    df_backup.to_csv('data/raw/voursa_backup.csv', index=False)
-                    print(f" Backup: {total_annonces} annonces")
-                    
-            except Exception as e:
-                print(f"\n✅ Plus de bouton 'Voir plus' après {clics} clics")
-                break
                 
-        except KeyboardInterrupt:
-            print(f"\n\n ARRÊT DEMANDÉ - {total_annonces} annonces sauvegardées")
+    except KeyboardInterrupt:
+        print(f"\n\n ARRÊT DEMANDÉ - {total_annonces} annonces sauvegardées")
             
-            
-finally:
-    driver.quit()
-    print("\n🎉 Scraping terminé!")
\ No newline at end of file
+    finally:
+        sink.close()
+        browser_pool.log_stats(print)
+        page_waits.log_savings(print)
+        instrumentation.report(SOURCE)
+        print("\n🎉 Scraping terminé!")
+
+if __name__ == '__main__':
+    main()
@@ -8,22 +8,30 @@ nb_chambres, nb_salons, nb_sdb, quartier, ville, description, source,
 date_publication, caracteristiques
 """
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 import requests
+import http_client
 from bs4 import BeautifulSoup
-import pandas as pd
-import time
 import re
 import json
+import html
 from urllib.parse import urljoin
 import logging
+import argparse
+from functools import partial
 from datetime import datetime
+from async_fetcher import AsyncFetcher
+from crawl_frontier import CrawlFrontier
+from record_sink import CsvRecordSink
+from keyword_matcher import KeywordMatcher
+from gazetteer import resoudre_quartier, resoudre_ville
+from listing import Listing
+import browser_pool
+import page_waits
+import instrumentation
+import page_archive
 
 # ================== CONFIGURATION ==================
 BASE_URL = "https://voursa.com"
@@ -31,7 +39,16 @@ SOURCE = "voursa.com"
 MAX_ADS = 6000  # Nombre maximal d'annonces à collecter (mettre 0 pour illimité)
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 DELAY = 1  # Délai entre les requêtes HTTP (respect du site)
+CONCURRENCY = 8  # Requêtes simultanées pour les pages de détail (1 = séquentiel)
 HOME_URL = urljoin(BASE_URL, "/FR/categories/real_estate")
+OUTPUT_FILE = "voursa_raw.csv"
+CHECKPOINT_FILE = "voursa_checkpoint.csv"  # Annonces ajoutées au fil du scraping
+AD_LINK_SELECTOR = "a[href*='/ads/']"  # Liens vers les pages de détail
+COLUMN_ORDER = [
+    "titre", "type_bien", "type_annonce", "prix", "surface_m2",
+    "nb_chambres", "nb_salons", "nb_sdb", "quartier", "ville",
+    "description", "source", "date_publication", "caracteristiques"
+]
 
 # Mapping des types de biens
 TYPE_BIEN_MAPPING = {
@@ -65,6 +82,14 @@ CARAC_KEYWORDS = [
     "ensoleillé", "vue mer", "vue dégagée", "proche commodités", "proche écoles",
     "proche commerces", "proche transport", "centre ville", "quartier résidentiel"
 ]
+# Quartiers recherchés dans la description si le JSON n'en donne pas
+QUARTIERS = ["Tevragh Zeina", "Ksar", "Teyarett", "Dar Naim", "Arafat", "Riyadh",
+             "Cité Plage", "Centre Émetteur", "Ilot K", "Ilot M", "Las Palmas",
+             "Socogim", "Mégafoot", "Module M", "Soukouk", "Sahraoui", "Toujounine",
+             "Mederdra", "Ouad Naga"]
+# Automates construits une fois : une seule passe sur la description
+CARAC_MATCHER = KeywordMatcher(CARAC_KEYWORDS)
+QUARTIER_MATCHER = KeywordMatcher(QUARTIERS)
 
 # ================== CONFIGURATION LOGGING ==================
 logging.basicConfig(level=logging.INFO,format='%(asctime)s - %(levelname)s - %(message)s')
@@ -75,30 +100,88 @@ def extract_number(text):
     match = re.search(r'(\d+)', str(text))
     return int(match.group(1)) if match else None
 
-def get_soup(url, retries=3):
-    """Récupère le contenu HTML d'une URL avec BeautifulSoup."""
+def fetch_page(url, delay=DELAY):
+    """Récupère le contenu brut (octets) d'une URL (None si échec).
+
+    Les nouvelles tentatives (backoff exponentiel) sont gérées par le client partagé.
+    """
     headers = {"User-Agent": USER_AGENT}
-    for i in range(retries):
-        try:
-            time.sleep(DELAY)
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            return BeautifulSoup(response.text,'html.parser')
-        except requests.exceptions.RequestException as e:
-            logging.warning(f"Tentative {i+1}/{retries} échouée pour {url} : {e}")
-            time.sleep(DELAY * 2)
-    logging.error(f"Impossible de récupérer {url} après {retries} tentatives.")
-    return None
+    try:
+        # Le délai n'est appliqué que si la page n'est pas servie par le cache
+        response = http_client.get(url, headers=headers, timeout=15, delay=delay)
+        response.raise_for_status()
+        return response.content
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Impossible de récupérer {url} : {e}")
+        return None
+
+def get_soup(url):
+    """Récupère le contenu HTML d'une URL avec BeautifulSoup."""
+    content = fetch_page(url)
+    return BeautifulSoup(content.decode('utf-8', errors='replace'), 'html.parser') if content is not None else None
 
 def extract_property_data(property_url):
     """Extrait les données d'une annonce à partir de son URL."""
-    logging.info(f"Traitement de {property_url}")
-    soup = get_soup(property_url)
-    if not soup:
+    logging.debug(f"Traitement de {property_url}")
+    content = fetch_page(property_url)
+    if content is None:
+        return None
+    return parse_property_page(content, property_url)
+
+def process_url(property_url, frontier=None, delay=DELAY):
+    """Télécharge et extrait une annonce en tenant la frontière de crawl à jour.
+
+    Le rythme réel (délai et requêtes en vol) est ajusté par le contrôleur AIMD de l'hôte.
+    """
+    logging.debug(f"Traitement de {property_url}")
+    with instrumentation.timer(SOURCE, "fetch"):
+        content = fetch_page(property_url, delay=delay)
+    if content is None:
+        if frontier:
+            frontier.mark_failed(property_url, "téléchargement")
+        return None
+    instrumentation.count(SOURCE, "pages")
+    instrumentation.count(SOURCE, "octets", len(content))
+    if frontier:
+        frontier.mark_fetched(property_url)
+    data = parse_property_page(content, property_url)
+    if data:
+        instrumentation.progress(SOURCE).update(message=(data.titre or "")[:40])
+    if frontier:
+        if data:
+            frontier.mark_parsed(property_url, data.to_dict(COLUMN_ORDER))
+        else:
+            frontier.mark_failed(property_url, "extraction", count_attempt=False)
+    return data
+
+def extract_ad_detail_json(content):
+    """Chemin rapide : lit l'attribut data-ad-detail directement dans les octets bruts.
+
+    Aucun arbre DOM n'est construit. Renvoie None si l'attribut est introuvable
+    ou si son contenu n'est pas un JSON valide (on passe alors par BeautifulSoup).
+    """
+    start = content.find(b'data-ad-detail=')
+    if start < 0:
         return None
+    start += len(b'data-ad-detail=')
+    quote = content[start:start + 1]
+    if quote not in (b'"', b"'"):
+        return None
+    end = content.find(quote, start + 1)
+    if end < 0:
+        return None
+    value = content[start + 1:end].decode('utf-8', errors='replace')
+    if '&' in value:
+        value = html.unescape(value)
+    try:
+        ad_data = json.loads(value)
+    except json.JSONDecodeError:
+        return None
+    return ad_data if isinstance(ad_data, dict) else None
 
-    # Recherche du div contenant les données JSON
+def extract_ad_detail_soup(content, property_url):
+    """Chemin lent (secours) : recherche du div data-ad-detail avec BeautifulSoup."""
+    soup = BeautifulSoup(content.decode('utf-8', errors='replace'), 'html.parser')
     ad_detail_div = soup.find('div', attrs={'data-ad-detail': True})
     if not ad_detail_div:
         logging.warning(f"Pas de données JSON trouvées pour {property_url}")
@@ -106,11 +189,25 @@ def extract_property_data(property_url):
 
     try:
         json_str = ad_detail_div['data-ad-detail']
-        ad_data = json.loads(json_str)
+        return json.loads(json_str)
     except (json.JSONDecodeError, KeyError) as e:
         logging.error(f"Erreur de parsing JSON pour {property_url} : {e}")
         return None
 
+def parse_property_page(content, property_url):
+    """Extrait les données d'une annonce à partir de sa page déjà téléchargée."""
+    instrumentation.count(SOURCE, "cartes")
+    with instrumentation.timer(SOURCE, "parse"):
+        ad_data = extract_ad_detail_json(content)
+        if ad_data is None:
+            ad_data = extract_ad_detail_soup(content, property_url)
+    if ad_data is None:
+        return None
+    with instrumentation.timer(SOURCE, "extract"):
+        return build_property_data(ad_data)
+
+def build_property_data(ad_data):
+    """Construit le Listing d'une annonce à partir de son JSON data-ad-detail."""
     # Initialisation du dictionnaire de données
     data = {
         "titre": None,
@@ -142,7 +239,10 @@ def extract_property_data(property_url):
         except:
             pass
     if 'location' in ad_data:
-        data['quartier'] = ad_data['location']
+        # Nom canonique du gazetteer si la localisation est reconnue
+        data['quartier'] = resoudre_quartier(ad_data['location']) or ad_data['location']
+        # Une ville hors Nouakchott (Nouadhibou, Rosso...) va dans la colonne ville
+        data['ville'] = resoudre_ville(ad_data['location']) or data['ville']
     if 'description' in ad_data:
         data['description'] = ad_data['description']
     if 'postedAt' in ad_data:
@@ -259,51 +359,47 @@ def extract_property_data(property_url):
             if salon_count > 0:
                 data['nb_salons'] = salon_count
 
-        if 'nouadhibou' in desc.lower():
+        desc_lower = desc.lower()
+        if 'nouadhibou' in desc_lower:
             data['ville'] = "Nouadhibou"
-        elif 'nouakchott' in desc.lower():
+        elif 'nouakchott' in desc_lower:
             data['ville'] = "Nouakchott"
 
         if not data['quartier']:
-            quartiers = ["Tevragh Zeina", "Ksar", "Teyarett", "Dar Naim", "Arafat", "Riyadh",
-                         "Cité Plage", "Centre Émetteur", "Ilot K", "Ilot M", "Las Palmas",
-                         "Socogim", "Mégafoot", "Module M", "Soukouk", "Sahraoui", "Toujounine",
-                         "Mederdra", "Ouad Naga"]
-            for q in quartiers:
-                if q.lower() in desc.lower():
-                    data['quartier'] = q
-                    break
-
-        for kw in CARAC_KEYWORDS:
-            if kw.lower() in desc.lower() and kw not in data['caracteristiques']:
+            data['quartier'] = QUARTIER_MATCHER.first(desc)
+
+        for kw in CARAC_MATCHER.find_all(desc):
+            if kw not in data['caracteristiques']:
                 data['caracteristiques'].append(kw)
 
     # Nettoyage des caractéristiques
     data['caracteristiques'] = list(dict.fromkeys(data['caracteristiques']))
     data['caracteristiques'] = " | ".join(data['caracteristiques']) if data['caracteristiques'] else ""
 
-    return data
+    return Listing(**data)
 
 # ================== ÉTAPE 1 : COLLECTE DES URLs AVEC SELENIUM ==================
 def collect_urls(max_ads=MAX_ADS):
     """Utilise Selenium pour collecter les URLs des annonces jusqu'à max_ads."""
-    logging.info("Configuration du driver Selenium...")
-    options = webdriver.ChromeOptions()
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    options.add_argument(f"user-agent={USER_AGENT}")
-
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
-    wait = WebDriverWait(driver, 10)
+    # Navigateur headless chaud du pool partagé (driver en cache, images et polices bloquées)
+    with browser_pool.browser() as driver:
+        all_links = list(collect_links(driver, max_ads))
+        page_archive.record_page(SOURCE, HOME_URL, driver.page_source)
+    browser_pool.log_stats()
+    page_waits.log_savings()
+
+    # Limiter au nombre demandé
+    if max_ads > 0 and len(all_links) > max_ads:
+        all_links = all_links[:max_ads]
+    logging.info(f"Collecte terminée : {len(all_links)} URLs.")
+    return all_links
 
+def collect_links(driver, max_ads=MAX_ADS):
+    """Clique sur "Voir plus" et relève les liens d'annonces jusqu'à max_ads."""
     logging.info(f"Chargement de {HOME_URL}")
-    driver.get(HOME_URL)
-    time.sleep(5)
+    browser_pool.load(driver, HOME_URL, SOURCE)
+    page_waits.wait_for(driver, page_waits.selector_present(AD_LINK_SELECTOR), timeout=15, fixed=5,
+                        label="voursa: annonces initiales")
 
     all_links = set()
     last_count = 0
@@ -311,7 +407,7 @@ def collect_urls(max_ads=MAX_ADS):
 
     while True:
         # Récupérer les liens
-        cards = driver.find_elements(By.CSS_SELECTOR, "a[href*='/ads/']")
+        cards = driver.find_elements(By.CSS_SELECTOR, AD_LINK_SELECTOR)
         for c in cards:
             href = c.get_attribute("href")
             if href:
@@ -326,8 +422,11 @@ def collect_urls(max_ads=MAX_ADS):
         try:
             bouton = driver.find_element(By.XPATH, "//button[contains(text(), 'Voir plus') or contains(text(), 'Charger plus')]")
             if bouton.is_enabled():
+                before = len(cards)
                 driver.execute_script("arguments[0].click();", bouton)
-                time.sleep(3)  # Attente chargement
+                # Attente chargement : jusqu'à l'arrivée de nouveaux liens
+                page_waits.wait_for(driver, page_waits.count_increased(AD_LINK_SELECTOR, before),
+                                    timeout=10, fixed=3, label="voursa: lot suivant")
                 continue
         except NoSuchElementException:
             pass
@@ -344,65 +443,97 @@ def collect_urls(max_ads=MAX_ADS):
 
         # Scroll (au cas où)
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
+        page_waits.wait_for(driver, page_waits.network_idle(), timeout=4, fixed=2,
+                            label="voursa: défilement")
 
-    driver.quit()
-    # Limiter au nombre demandé
-    all_links = list(all_links)
-    if max_ads > 0 and len(all_links) > max_ads:
-        all_links = all_links[:max_ads]
-    logging.info(f"Collecte terminée : {len(all_links)} URLs.")
     return all_links
 
 # ================== ÉTAPE 2 : SCRAPING DES DONNÉES ==================
-def scrape_urls(urls, batch_size=100):
-    """Scrape les URLs et sauvegarde par lots."""
-    all_data = []
-    for i, url in enumerate(urls, 1):
-        data = extract_property_data(url)
-        if data:
-            all_data.append(data)
-        if i % batch_size == 0:
-            # Sauvegarde intermédiaire
-            df_temp = pd.DataFrame(all_data)
-            df_temp.to_csv(f"voursa_backup_{i}.csv", index=False, encoding='utf-8')
-            logging.info(f"Backup sauvegardé ({i} annonces).")
-    return all_data
+def iter_scraped_records(urls, batch_size=100, concurrency=CONCURRENCY, frontier=None):
+    """Générateur : télécharge et extrait les annonces, lot par lot.
+
+    Avec `concurrency > 1`, chaque lot est téléchargé par le moteur asyncio ;
+    le nombre de requêtes réellement en vol sur voursa.com suit le contrôleur
+    AIMD partagé (host_limiter). L'ordre des résultats est conservé.
+    Si une frontière est fournie, l'état de chaque URL y est enregistré.
+    """
+    fetcher = AsyncFetcher(partial(process_url, frontier=frontier), concurrency=concurrency,
+                           rate_per_host=0) if concurrency > 1 else None
+    for start in range(0, len(urls), batch_size):
+        batch = urls[start:start + batch_size]
+        if fetcher:
+            results = fetcher.run(batch)
+        else:
+            results = (process_url(url, frontier=frontier) for url in batch)
+        for data in results:
+            if data:
+                yield data
+        logging.info(f"{start + len(batch)}/{len(urls)} URLs traitées.")
+    if fetcher:
+        logging.info(f"Débit moyen : {fetcher.pages_per_sec:.2f} pages/s")
+    http_client.log_connection_stats()
+
+def scrape_urls(urls, batch_size=100, concurrency=CONCURRENCY, frontier=None, checkpoint_file=CHECKPOINT_FILE):
+    """Scrape les URLs et ajoute chaque annonce au fichier de checkpoint.
+
+    Le fichier est ouvert en ajout et synchronisé sur disque à chaque lot :
+    chaque annonce n'est écrite qu'une fois. Renvoie le nombre d'annonces écrites.
+    """
+    with CsvRecordSink(checkpoint_file, COLUMN_ORDER, batch_size=batch_size, site=SOURCE) as sink:
+        return sink.write_all(iter_scraped_records(urls, batch_size, concurrency, frontier))
 
 # ================== MAIN ==================
 def main():
-    logging.info("Début du processus de scraping.")
-    # Collecte des URLs
-    urls = collect_urls(max_ads=MAX_ADS)
-    if not urls:
-        logging.error("Aucune URL collectée. Arrêt.")
+    parser = argparse.ArgumentParser(description="Scraping des annonces immobilières de voursa.com")
+    parser.add_argument("--recollect", action="store_true",
+                        help="relancer la collecte Selenium même si la frontière contient déjà des URLs")
+    parser.add_argument("--replay", nargs="?", const="", metavar="ARCHIVE",
+                        help="réextraire les pages de détail archivées, sans réseau (voir page_archive)")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        replay(args.replay or None)
         return
 
-    # Scraping des données
+    logging.info("Début du processus de scraping.")
+    frontier = CrawlFrontier()
+
+    # Collecte des URLs (seulement si la frontière est vide : sinon on reprend)
+    if args.recollect or len(frontier) == 0:
+        urls = collect_urls(max_ads=MAX_ADS)
+        if not urls:
+            logging.error("Aucune URL collectée. Arrêt.")
+            return
+        frontier.add_urls(urls)
+    else:
+        logging.info(f"Reprise : {len(frontier)} URLs déjà collectées {frontier.counts()}, Chrome n'est pas relancé.")
+
+    # Scraping des données restantes
+    urls = frontier.urls_to_process()
     logging.info(f"Début du scraping de {len(urls)} annonces.")
-    data = scrape_urls(urls, batch_size=100)
+    count = scrape_urls(urls, batch_size=100, concurrency=CONCURRENCY, frontier=frontier)
+    logging.info(f"{count} annonces ajoutées à {CHECKPOINT_FILE}. État de la frontière : {frontier.counts()}")
 
-    if not data:
+    # Export de toutes les annonces extraites, y compris celles des exécutions
+    # précédentes, en flux depuis la frontière (jamais toutes en mémoire)
+    with CsvRecordSink(OUTPUT_FILE, COLUMN_ORDER, mode='w', site=SOURCE) as sink:
+        total = sink.write_all(frontier.iter_records())
+    frontier.close()
+    instrumentation.report(SOURCE, logging.info)
+
+    if not total:
         logging.error("Aucune donnée extraite.")
         return
-
-    # Création du DataFrame final
-    df = pd.DataFrame(data)
-
-    # Réorganisation des colonnes
-    column_order = [
-        "titre", "type_bien", "type_annonce", "prix", "surface_m2",
-        "nb_chambres", "nb_salons", "nb_sdb", "quartier", "ville",
-        "description", "source", "date_publication", "caracteristiques"
-    ]
-    for col in column_order:
-        if col not in df.columns:
-            df[col] = None
-    df = df[column_order]
-
-    output_file = "voursa_raw.csv"
-    df.to_csv(output_file, index=False, encoding='utf-8')
-    logging.info(f"Scraping terminé. {len(df)} annonces sauvegardées dans {output_file}")
+    logging.info(f"Scraping terminé. {total} annonces sauvegardées dans {OUTPUT_FILE}")
+
+def replay(archive=None):
+    """Réextrait toutes les pages de détail archivées vers OUTPUT_FILE (ni réseau, ni délai)."""
+    urls = page_archive.start_replay(archive).urls("/ads/")
+    logging.info(f"Rejeu de {len(urls)} pages de détail archivées.")
+    with CsvRecordSink(OUTPUT_FILE, COLUMN_ORDER, mode='w', site=SOURCE) as sink:
+        total = sink.write_all(data for data in map(extract_property_data, urls) if data)
+    instrumentation.report(SOURCE, logging.info)
+    logging.info(f"Rejeu terminé. {total} annonces sauvegardées dans {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Stockage en colonnes (Parquet) des données scrapées et fusionnées.
+- un dossier par source et par date de scraping (partitionnement "hive" :
+  source=voursa.com/date_scraping=2026-02-14/part-0.parquet)
+- compression zstd, types conservés (Int64, catégories, dates)
+- lecture projetée : seules les colonnes et partitions demandées sont lues,
+  la version "light" n'est plus une copie mais une simple projection
+
+pyarrow est optionnel : sans lui, les scripts gardent la sortie CSV.
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    pa = ds = pq = None
+
+# ================== CONFIGURATION ==================
+PARQUET_DIR = "data_parquet/annonces"
+PARTITIONS = ["source", "date_scraping"]
+COMPRESSION = "zstd"
+PARTITION_INCONNUE = "inconnue"  # valeur de partition quand la colonne est vide
+
+COLONNES_LIGHT = [
+    'source', 'titre', 'prix', 'prix_mru', 'prix_periode', 'type_bien', 'type_annonce',
+    'quartier', 'quartier_canonique', 'ville', 'surface_m2', 'nb_chambres', 'nb_sdb',
+    'nb_salons', 'description', 'date_publication', 'vendeur',
+    'caracteristiques'
+]
+
+
+def parquet_disponible():
+    return pa is not None
+
+
+def _exiger_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est nécessaire pour le stockage Parquet (pip install pyarrow)")
+
+
+def _valeurs_partition(serie):
+    """Valeurs de partition lisibles : dates au format AAAA-MM-JJ, vides -> 'inconnue'."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        serie = serie.dt.strftime("%Y-%m-%d")
+    serie = serie.astype("string").str.strip()
+    return serie.mask(serie.isna() | (serie == ""), PARTITION_INCONNUE)
+
+
+def _schema_partitions(partitions):
+    return ds.partitioning(pa.schema([(colonne, pa.string()) for colonne in partitions]), flavor="hive")
+
+
+# ================== ÉCRITURE ==================
+def ecrire_parquet(df, dossier=PARQUET_DIR, partitions=PARTITIONS, compression=COMPRESSION,
+                   ajout=None):
+    """Écrit `df` dans le dataset Parquet partitionné.
+
+    Par défaut, les partitions présentes dans `df` sont remplacées et les
+    autres conservées : on peut réécrire une seule source ou une seule journée.
+    Avec `ajout` (numéro de bloc), les fichiers sont ajoutés aux partitions
+    existantes : écriture incrémentale bloc par bloc.
+    """
+    _exiger_pyarrow()
+    df = df.copy()
+    for colonne in df.columns:
+        if colonne in partitions:
+            df[colonne] = _valeurs_partition(df[colonne])
+        elif df[colonne].dtype == object:
+            # Colonnes texte mêlant chaînes et NaN (ou nombres) -> chaînes
+            df[colonne] = df[colonne].astype("string")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(
+        table, dossier,
+        partitioning=_schema_partitions(partitions),
+        existing_data_behavior="delete_matching" if ajout is None else "overwrite_or_ignore",
+        compression=compression,
+        basename_template="part-{i}.parquet" if ajout is None else f"part-{ajout}-{{i}}.parquet",
+    )
+    return dossier
+
+
+# ================== LECTURE ==================
+def _filtre(filtres):
+    """{'source': 'voursa.com', 'date_scraping': ['2026-02-14', ...]} -> expression pyarrow."""
+    expression = None
+    for colonne, valeurs in (filtres or {}).items():
+        if isinstance(valeurs, (list, tuple, set)):
+            condition = ds.field(colonne).isin(list(valeurs))
+        else:
+            condition = ds.field(colonne) == valeurs
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def lire_parquet(dossier=PARQUET_DIR, colonnes=None, filtres=None, partitions=PARTITIONS):
+    """Lit seulement les `colonnes` et les partitions retenues par `filtres`."""
+    _exiger_pyarrow()
+    dataset = ds.dataset(dossier, format="parquet", partitioning=_schema_partitions(partitions))
+    if colonnes is not None:
+        colonnes = [c for c in colonnes if c in dataset.schema.names]
+    table = dataset.to_table(columns=colonnes, filter=_filtre(filtres))
+    return table.to_pandas()
+
+
+def lire_light(dossier=PARQUET_DIR, filtres=None):
+    """Version allégée du dataset : projection sur COLONNES_LIGHT."""
+    return lire_parquet(dossier, colonnes=COLONNES_LIGHT, filtres=filtres)
+
+
+def taille_disque(chemin):
+    """Taille totale (octets) d'un fichier ou d'un dossier."""
+    if os.path.isfile(chemin):
+        return os.path.getsize(chemin)
+    return sum(os.path.getsize(os.path.join(racine, f))
+               for racine, _, fichiers in os.walk(chemin) for f in fichiers)
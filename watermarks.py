@@ -0,0 +1,144 @@
+"""
+Repères de crawl ("high-water marks") des sites listés du plus récent au plus
+ancien (menazel, voursa) : un crawl incrémental s'arrête de paginer dès qu'il
+atteint des annonces déjà vues au passage précédent.
+- par site : identifiants (URL ou id) des HEAD_SIZE annonces les plus récentes
+  du dernier crawl terminé et date de publication la plus récente
+- une carte est "connue" si son identifiant est dans le repère ; la date ne
+  sert que de filet : les dates voursa sont approximatives ("il y a 3 jours")
+  et une annonce remontée ou validée en retard arrive dans le désordre, donc
+  seule une carte antérieure de plus de DATE_MARGIN_DAYS jours à la date du
+  repère compte comme connue sans son identifiant ; la pagination s'arrête
+  après KNOWN_TO_STOP cartes connues (une annonce épinglée en tête de liste
+  ne suffit pas à arrêter le crawl)
+- le repère n'avance que si le crawl va à son terme (fin de liste ou zone
+  connue atteinte) : un crawl interrompu laisse l'ancien repère en place
+- crawl complet sur demande (`--full`) : pas d'arrêt anticipé, le repère est
+  quand même mis à jour
+Projet Capstone - Prédiction des prix immobiliers en Mauritanie
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+# ================== CONFIGURATION ==================
+WATERMARKS_FILE = os.path.join("etat", "reperes.json")
+HEAD_SIZE = 20  # Annonces les plus récentes gardées comme repère
+KNOWN_TO_STOP = 3  # Cartes connues à rencontrer avant d'arrêter la pagination
+FULL_CRAWL = False  # True (option --full) : crawl complet, sans arrêt anticipé
+DATE_MARGIN_DAYS = 30  # Ancienneté (vs date du repère) à partir de laquelle une carte non vue compte comme connue
+
+DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_lock = threading.Lock()
+_current = {}
+
+
+# ================== STOCKAGE ==================
+def load(path=None):
+    """{site: repère} enregistrés ({} si aucun)."""
+    try:
+        with open(path or WATERMARKS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save(site, mark, path=None):
+    """Remplace le repère du site (écriture atomique, sûre entre threads)."""
+    path = path or WATERMARKS_FILE
+    with _lock:
+        marks = load(path)
+        marks[site] = mark
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(marks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+
+# ================== REPÈRE D'UN CRAWL ==================
+class Watermark:
+    """Suivi d'un crawl : cartes vues, zone connue atteinte, nouveau repère.
+
+    Un suivi n'est utilisé que par le thread qui fait tourner le site.
+    """
+
+    def __init__(self, site, full=False, path=None):
+        self.site = site
+        self.path = path
+        self.full = full
+        previous = load(path).get(site) or {}
+        self.previous_keys = set(previous.get("cles", []))
+        self.previous_date = previous.get("date_publication")
+        self.known_before = None  # Date en deçà de laquelle une carte est connue sans son identifiant
+        if self.previous_date and DATE.match(self.previous_date):
+            limite = datetime.strptime(self.previous_date, "%Y-%m-%d") - timedelta(days=DATE_MARGIN_DAYS)
+            self.known_before = limite.strftime("%Y-%m-%d")
+        self.head = []  # Identifiants des cartes les plus récentes de ce crawl
+        self.latest_date = None
+        self.known = 0
+
+    @property
+    def incremental(self):
+        """True si le crawl peut s'arrêter avant la fin (repère existant, pas de --full)."""
+        return not self.full and bool(self.previous_keys or self.previous_date)
+
+    @property
+    def reached(self):
+        """True quand la pagination peut s'arrêter (zone connue atteinte)."""
+        if not self.incremental:
+            return False
+        return self.known >= min(KNOWN_TO_STOP, max(1, len(self.previous_keys)))
+
+    def see(self, key, date_publication=None):
+        """Enregistre une carte (dans l'ordre de la liste) ; renvoie True si elle est connue."""
+        date = date_publication if isinstance(date_publication, str) and DATE.match(date_publication) else None
+        if len(self.head) < HEAD_SIZE and key not in self.head:
+            self.head.append(key)
+        if date and (self.latest_date is None or date > self.latest_date):
+            self.latest_date = date
+        known = key in self.previous_keys or bool(date and self.known_before and date < self.known_before)
+        if known:
+            self.known += 1
+        return known
+
+    def commit(self):
+        """Crawl terminé : les annonces les plus récentes deviennent le nouveau repère."""
+        if not self.head:
+            return
+        # La tête de ce crawl contient aussi les cartes connues rencontrées avant l'arrêt
+        dates = [date for date in (self.latest_date, self.previous_date) if date]
+        save(self.site, {
+            "cles": self.head,
+            "date_publication": max(dates) if dates else None,
+            "maj": datetime.now().isoformat(timespec="seconds"),
+        }, self.path)
+        logging.info(f"[{self.site}] nouveau repère : {self.head[0]} ({len(self.head)} annonces récentes)")
+
+
+def start(site, full=None):
+    """Nouveau suivi pour le crawl de `site` (appelé au début de fetch())."""
+    mark = Watermark(site, FULL_CRAWL if full is None else full)
+    with _lock:
+        _current[site] = mark
+    return mark
+
+
+def current(site):
+    """Suivi du crawl en cours du site (un suivi sans effet si fetch() n'a pas démarré)."""
+    with _lock:
+        mark = _current.get(site)
+    return mark if mark is not None else Watermark(site, full=True)
+
+
+def full_arg(argv=None):
+    """Lit `--full` dans la ligne de commande."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--full", action="store_true")
+    return parser.parse_known_args(argv)[0].full